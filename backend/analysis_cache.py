@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Optional
+
+from legal_analyzer import AnalysisResult
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "legal_analyzer_cache")
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache of AnalysisResult objects.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes plus the analyzer
+    fingerprint, so a new model or rule set never serves stale results. A
+    small in-memory LRU sits in front of an on-disk store of JSON files whose
+    total size is bounded; the least recently used files are evicted first.
+    """
+
+    def __init__(self, directory: str = None, max_disk_bytes: int = None, max_memory_entries: int = None):
+        self.directory = directory or os.environ.get("LEGAL_ANALYZER_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else \
+            int(float(os.environ.get("LEGAL_ANALYZER_CACHE_MAX_MB", 512)) * 1024 * 1024)
+        self.max_memory_entries = max_memory_entries if max_memory_entries is not None else \
+            int(os.environ.get("LEGAL_ANALYZER_CACHE_MEMORY_ENTRIES", 64))
+
+        self._memory: "OrderedDict[str, AnalysisResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._disk_bytes = 0
+        if self.max_disk_bytes > 0:
+            os.makedirs(self.directory, exist_ok=True)
+            self._disk_bytes = sum(
+                entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith(".json")
+            )
+
+    @staticmethod
+    def make_key(content_hash: str, fingerprint: str, extension: str = "") -> str:
+        # The extension is part of the key because it decides how the bytes are parsed
+        return hashlib.sha256(f"{content_hash}:{extension.lower()}:{fingerprint}".encode()).hexdigest()
+
+    def key_for_file(self, file_path: str, fingerprint: str) -> str:
+        return self.make_key(file_sha256(file_path), fingerprint, os.path.splitext(file_path)[1])
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[AnalysisResult]:
+        result = self._get_memory(key)
+        return result if result is not None else self._get_disk(key)
+
+    def put(self, key: str, result: AnalysisResult):
+        with self._lock:
+            self._remember(key, result)
+        self._write_disk(key, result)
+
+    # Async variants for the API: hashing and the disk tier run in a thread so they don't
+    # block the event loop, while an in-memory hit is answered inline
+    async def key_for_file_async(self, file_path: str, fingerprint: str) -> str:
+        return await asyncio.to_thread(self.key_for_file, file_path, fingerprint)
+
+    async def get_async(self, key: str) -> Optional[AnalysisResult]:
+        result = self._get_memory(key)
+        if result is not None:
+            return result
+        if self.max_disk_bytes <= 0:
+            return self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def put_async(self, key: str, result: AnalysisResult):
+        with self._lock:
+            self._remember(key, result)
+        if self.max_disk_bytes > 0:
+            await asyncio.to_thread(self._write_disk, key, result)
+
+    def _get_memory(self, key: str) -> Optional[AnalysisResult]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return result
+
+    def _get_disk(self, key: str) -> Optional[AnalysisResult]:
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def _remember(self, key: str, result: AnalysisResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[AnalysisResult]:
+        if self.max_disk_bytes <= 0:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            os.utime(path) # Mark as recently used for eviction
+            return AnalysisResult(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading analysis cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, result: AnalysisResult):
+        if self.max_disk_bytes <= 0:
+            return
+        path = self._path(key)
+        try:
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(asdict(result), file)
+            size = os.path.getsize(tmp_path)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing analysis cache entry {key}: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += size - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                self._disk_bytes -= size
+            except OSError:
+                pass
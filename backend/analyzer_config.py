@@ -0,0 +1,43 @@
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+import model_registry
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass
+class AnalyzerConfig:
+    """Tunable settings for LegalDocumentAnalyzer. Defaults can be overridden with LEGAL_ANALYZER_* environment variables."""
+    # spaCy pipeline to load through model_registry
+    model_name: str = field(default_factory=lambda: model_registry.DEFAULT_MODEL)
+    # "trimmed" only runs the components entity extraction needs, "full" runs everything
+    pipeline_mode: str = field(default_factory=lambda: os.environ.get("LEGAL_ANALYZER_PIPELINE_MODE", "trimmed"))
+    # Documents are split on paragraph boundaries into chunks of at most this many characters for spaCy
+    nlp_chunk_size: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_NLP_CHUNK_SIZE", 100_000))
+    nlp_batch_size: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_NLP_BATCH_SIZE", 4))
+    # Processes nlp.pipe may use for one document; 1 keeps everything in the calling process
+    nlp_n_process: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_NLP_PROCESSES", 1))
+    # PDFs with at least this many pages are extracted by `pdf_workers` processes; 1 worker keeps extraction serial
+    pdf_parallel_min_pages: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_PDF_PARALLEL_MIN_PAGES", 50))
+    pdf_workers: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_PDF_WORKERS", 1))
+    # Summarizer backend: "lsa", "textrank", "centroid" or "sumy" (sumy's LSA over the whole document)
+    summarizer: str = field(default_factory=lambda: os.environ.get("LEGAL_ANALYZER_SUMMARIZER", "lsa"))
+    summary_max_sentences: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_SUMMARY_MAX_SENTENCES", 400))
+    # If set, the best summarizer expected to rank the sentences within this many milliseconds is used instead
+    summary_budget_ms: Optional[float] = field(default_factory=lambda: _env_float("LEGAL_ANALYZER_SUMMARY_BUDGET_MS", None))
+    # Retrieval index for /chat: "bm25", or "hybrid" to add the model's word vectors (when it has them) to BM25
+    retrieval_mode: str = field(default_factory=lambda: os.environ.get("LEGAL_ANALYZER_RETRIEVAL", "bm25"))
+    # Paragraphs are merged into retrieval chunks of at most this many characters
+    retrieval_chunk_chars: int = field(default_factory=lambda: _env_int("LEGAL_ANALYZER_RETRIEVAL_CHUNK_CHARS", 1000))
+    # Text similarity backend used by compare_documents: "auto", "sequence", "shingle" or "minhash"
+    similarity_backend: str = field(default_factory=lambda: os.environ.get("LEGAL_ANALYZER_SIMILARITY", "auto"))
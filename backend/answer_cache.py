@@ -0,0 +1,158 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from retrieval import stem, terms
+
+_WORD = re.compile(r"[^\W_]+(?:['-][^\W_]+)*")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase words only, so case, spacing and punctuation don't make a new question."""
+    return " ".join(_WORD.findall(question.lower()))
+
+
+def question_stems(question: str) -> FrozenSet[str]:
+    """Stems of the question's words without stop words, which near-duplicate lookup compares."""
+    return frozenset(stem(term) for term in terms(question))
+
+
+def stem_similarity(stems1: FrozenSet[str], stems2: FrozenSet[str]) -> float:
+    """Cosine similarity of two stem sets as binary vectors."""
+    if not stems1 or not stems2:
+        return 0.0
+    return len(stems1 & stems2) / math.sqrt(len(stems1) * len(stems2))
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: List[dict]
+    stems: FrozenSet[str]
+    created: float
+
+
+class AnswerCache:
+    """
+    /chat answers keyed by (document id, normalized question, model, options).
+
+    Entries expire `ttl` seconds after they were stored, and beyond `max_entries`
+    the least recently used are dropped. With `similarity` set, a question with
+    no exact entry can reuse the answer to an earlier question about the same
+    document (and model and options) whose stemmed words, without stop words,
+    have at least that cosine similarity. This needs no model or retrieval index,
+    so it works in every retrieval mode and from the first question on.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, similarity: float = None):
+        env = os.environ.get
+        self.max_entries = max_entries if max_entries is not None else \
+            int(env("LEGAL_ANALYZER_ANSWER_CACHE_ENTRIES", 1024))
+        self.ttl = ttl if ttl is not None else float(env("LEGAL_ANALYZER_ANSWER_CACHE_TTL", 24 * 3600))
+        # 0 turns near-duplicate lookup off
+        self.similarity = similarity if similarity is not None else \
+            float(env("LEGAL_ANALYZER_ANSWER_CACHE_SIMILARITY", 0))
+
+        # Least recently used first, for eviction
+        self._entries: "OrderedDict[Tuple[str, str], CachedAnswer]" = OrderedDict()
+        # Oldest first, so expiry stops at the first live entry
+        self._expiry: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        # Per scope, the stems of its questions; replaced rather than changed, so a lookup can scan it unlocked
+        self._scope_stems: Dict[str, Tuple[Tuple[Tuple[str, str], FrozenSet[str]], ...]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def scope(document_id: str, model: str, options: Dict[str, float]) -> str:
+        """The part of the key an answer must share to be reused: same document, model and options."""
+        return f"{document_id}:{model}:{json.dumps(options, sort_keys=True)}"
+
+    def _remove(self, key: Tuple[str, str]):
+        del self._entries[key]
+        del self._expiry[key]
+        if self.similarity > 0:
+            remaining = tuple(item for item in self._scope_stems[key[0]] if item[0] != key)
+            if remaining:
+                self._scope_stems[key[0]] = remaining
+            else:
+                del self._scope_stems[key[0]]
+
+    def _expire(self, now: float):
+        while self._expiry:
+            key, created = next(iter(self._expiry.items()))
+            if now - created < self.ttl:
+                break
+            self._remove(key)
+
+    def get(self, scope: str, question: str) -> Tuple[Optional[CachedAnswer], Optional[float]]:
+        """(entry, similarity): similarity is None for an exact match, and (None, None) on a miss."""
+        if not self.enabled:
+            return None, None
+        key = (scope, normalize_question(question))
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, None
+            candidates = self._scope_stems.get(scope, ()) if self.similarity > 0 else ()
+            if not candidates:
+                self.misses += 1
+                return None, None
+
+        # Scored without the lock; only this scope's questions are compared
+        stems = question_stems(question)
+        best_key, best = None, self.similarity
+        for other_key, other_stems in candidates:
+            score = stem_similarity(stems, other_stems)
+            if score >= best:
+                best_key, best = other_key, score
+
+        with self._lock:
+            # The entry may have expired or been evicted meanwhile
+            self._expire(time.monotonic())
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            return entry, round(best, 4)
+
+    def put(self, scope: str, question: str, answer: str, sources: List[dict]):
+        if not self.enabled:
+            return
+        key = (scope, normalize_question(question))
+        stems = question_stems(question) if self.similarity > 0 else frozenset()
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedAnswer(question, answer, sources, stems, now)
+            self._expiry[key] = now
+            if self.similarity > 0:
+                self._scope_stems[scope] = self._scope_stems.get(scope, ()) + ((key, stems),)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
@@ -1,25 +1,139 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form   
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
 from dataclasses import asdict
 from pydantic import BaseModel
-from typing import Dict     
+from typing import Callable, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
 import tempfile
 import shutil
 import os
 import json
-import requests
+import math
+import threading
+import time
+import zipfile
 
-from legal_analyzer import LegalDocumentAnalyzer
+from legal_analyzer import LegalDocumentAnalyzer, SUPPORTED_EXTENSIONS
 from contract_generator import ContractTemplateGenerator
+import model_registry
+import execution
+from execution import AnalysisExecutor, ExecutorSaturated
+from analysis_cache import AnalysisCache
+from summarization import SUMMARIZERS
+from job_store import JobStore, JOB_KINDS
+from document_sessions import DocumentSessions, DocumentSession
+from answer_cache import AnswerCache
+from llm_client import OllamaClient, LLMStream, LLMError, LLMUnavailable, LLMTimeout
+from metrics import MetricsRegistry, Histogram, Counter, Gauge, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # =========================
 # FastAPI app
 # =========================
-app = FastAPI()
+# The spaCy model is loaded on the first request (pick it with LEGAL_ANALYZER_SPACY_MODEL)
 analyzer = LegalDocumentAnalyzer(verbose=False)
 contract_generator = ContractTemplateGenerator()
 
+# Under a pre-forking server (e.g. `gunicorn --preload`), set PRELOAD_SPACY_MODEL=1 so the
+# model is loaded once in the parent and shared copy-on-write by every worker.
+if os.environ.get("PRELOAD_SPACY_MODEL") == "1":
+    model_registry.preload(analyzer.config.model_name)
+
+# CPU-bound analysis runs in worker processes so the event loop (and /health) stays responsive
+executor = AnalysisExecutor(config=analyzer.config)
+# Results are cached by uploaded bytes + analyzer fingerprint, so re-uploads skip the workers entirely
+analysis_cache = AnalysisCache()
+analysis_fingerprint = analyzer.fingerprint()
+
+# /analyze/batch limits: documents per request (after expanding zips), total bytes, and documents per worker task
+BATCH_MAX_FILES = int(os.environ.get("LEGAL_ANALYZER_BATCH_MAX_FILES", 100))
+BATCH_MAX_BYTES = int(float(os.environ.get("LEGAL_ANALYZER_BATCH_MAX_MB", 200)) * 1024 * 1024)
+BATCH_GROUP_SIZE = int(os.environ.get("LEGAL_ANALYZER_BATCH_GROUP_SIZE", 8))
+
+# Long-running analyses can be submitted as jobs: uploads are stored, queued in SQLite and
+# picked up by the dispatcher whenever a worker is free, so uploads never wait for analysis
+job_store = JobStore()
+JOB_DIR = os.environ.get("LEGAL_ANALYZER_JOB_DIR", os.path.join(tempfile.gettempdir(), "legal_analyzer_jobs"))
+JOB_TIMEOUT = float(os.environ.get("LEGAL_ANALYZER_JOB_TIMEOUT", 3600))
+JOB_TTL = float(os.environ.get("LEGAL_ANALYZER_JOB_TTL", 24 * 3600))
+# Servers sharing the job DB heartbeat their running jobs; one silent for this long is requeued
+JOB_STALE_SECONDS = float(os.environ.get("LEGAL_ANALYZER_JOB_STALE_SECONDS", 60))
+jobs_available = asyncio.Event()
+
+# /chat answers from the chunks of the document most relevant to each question. Indexes are built
+# by the workers (at analysis time, or on the first question about a text) and kept with the
+# document's text in a session, so clients send a document_id instead of the whole text each turn
+CHAT_TOP_K = int(os.environ.get("LEGAL_ANALYZER_CHAT_TOP_K", 4))
+CHAT_CONTEXT_CHARS = int(os.environ.get("LEGAL_ANALYZER_CHAT_CONTEXT_CHARS", 4000))
+document_sessions = DocumentSessions(
+    max_entries=int(os.environ.get("LEGAL_ANALYZER_SESSIONS", 64)),
+    ttl=float(os.environ.get("LEGAL_ANALYZER_SESSION_TTL", 3600))
+)
+
+# One pooled, rate-limited Ollama client shared by every LLM feature (see LEGAL_ANALYZER_LLM_*)
+llm_client = OllamaClient()
+# Repeated questions about a document are answered without a new generation
+answer_cache = AnswerCache()
+
+# Prometheus metrics served on /metrics. Stage timings come back from the workers with each analysis
+# cProfile slows an analysis down several times and saves files, so ?profile=1 is opt-in
+PROFILING_ENABLED = os.environ.get("LEGAL_ANALYZER_PROFILING", "0") == "1"
+metrics = MetricsRegistry()
+ANALYSIS_SECONDS = metrics.register(Histogram(
+    "legal_analyzer_analysis_seconds", "Worker time per analysis call (one document, or one batch group)", ["kind"]
+))
+STAGE_SECONDS = metrics.register(Histogram(
+    "legal_analyzer_stage_seconds", "Time spent in each analysis stage per analysis call", ["stage"]
+))
+STAGE_ITEMS = metrics.register(Counter(
+    "legal_analyzer_stage_items_total", "Pages, characters, clause matches, chunks, entities and sentences processed per stage",
+    ["stage", "item"]
+))
+REQUEST_SECONDS = metrics.register(Histogram(
+    "legal_analyzer_http_request_seconds", "Time until response headers are sent, by route", ["method", "route", "status"]
+))
+CHAT_FIRST_TOKEN_SECONDS = metrics.register(Histogram(
+    "legal_analyzer_chat_first_token_seconds", "Time from a streamed /chat request to its first answer token"
+))
+metrics.register(Gauge("legal_analyzer_analyses_in_flight", "Analysis tasks running or waiting for a worker",
+                       lambda: {(): executor.in_flight}))
+metrics.register(Gauge("legal_analyzer_analysis_workers", "Analysis worker processes",
+                       lambda: {(): executor.max_workers}))
+metrics.register(Gauge("legal_analyzer_analysis_cache", "Analysis cache hits and misses since start, entries in memory and bytes on disk",
+                       lambda: {(name,): value for name, value in analysis_cache.stats().items()}, ["stat"]))
+metrics.register(Gauge("legal_analyzer_jobs", "Jobs in the job store by status",
+                       lambda: {(status,): count for status, count in job_store.counts().items()}, ["status"]))
+metrics.register(Gauge("legal_analyzer_llm", "LLM client requests in flight, concurrency limit, consecutive failures and whether the circuit is open",
+                       lambda: {(name,): value for name, value in llm_client.stats().items()}, ["stat"]))
+metrics.register(Gauge("legal_analyzer_chat_answer_cache", "Chat answer cache exact hits, near-duplicate hits and misses since start, and entries",
+                       lambda: {(name,): value for name, value in answer_cache.stats().items()}, ["stat"]))
+metrics.register(Gauge("legal_analyzer_document_sessions", "Document sessions held for /chat",
+                       lambda: {(): len(document_sessions)}))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    heartbeat = asyncio.create_task(heartbeat_jobs())
+    dispatcher = asyncio.create_task(dispatch_jobs())
+    yield
+    dispatcher.cancel()
+    heartbeat.cancel()
+    await llm_client.aclose()
+    executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template rather than raw path, so ids in URLs don't create a series each
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(time.perf_counter() - started, request.method,
+                            route.path if route is not None else "unmatched", str(response.status_code))
+    return response
+
 # Allow React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -34,7 +148,11 @@ app.add_middleware(
 # =========================
 class ChatRequest(BaseModel):
     question: str
-    document_text: str
+    # document_id from /analyze; document_text (the cleaned_text) still works, and revives an expired session
+    document_id: Optional[str] = None
+    document_text: Optional[str] = None
+    # Stream the answer as NDJSON while Ollama generates it
+    stream: bool = False
 
 class ContractGenerationRequest(BaseModel):
     contract_type: str
@@ -46,7 +164,7 @@ class ContractGenerationRequest(BaseModel):
 # =========================
 def save_temp_file(upload_file: UploadFile) -> str:
     ext = os.path.splitext(upload_file.filename)[1].lower()
-    if ext not in [".pdf", ".docx", ".txt"]:
+    if ext not in SUPPORTED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
     with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
@@ -61,6 +179,136 @@ def cleanup_temp_file(file_path: str):
     except Exception as e:
         print(f"Error cleaning up temp file: {e}")
 
+def release_after(calls: int, cleanup: Callable[[], None]) -> Callable[[], None]:
+    """A callback that runs cleanup on its `calls`-th call; safe to call from the executor's callback thread"""
+    remaining = [calls]
+    lock = threading.Lock()
+    def release():
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            cleanup()
+    return release
+
+async def run_analysis(fn, *args, cleanup=None):
+    """Run an analysis task in the worker pool, mapping saturation and timeouts to HTTP errors"""
+    try:
+        return await executor.run(fn, *args, cleanup=cleanup)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=f"Server is busy, try again shortly. {e}", headers={"Retry-After": "5"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Analysis did not finish within {executor.timeout:.0f} seconds")
+
+def options_fingerprint(summarizer: str = None, summary_budget_ms: float = None) -> str:
+    """Analyzer fingerprint extended with per-request options, for cache keys"""
+    if summarizer is None and summary_budget_ms is None:
+        return analysis_fingerprint
+    return f"{analysis_fingerprint}:{summarizer}:{summary_budget_ms}"
+
+def record_timings(timings: dict, kind: str):
+    """Add the stage timings of one analysis call to the /metrics histograms"""
+    ANALYSIS_SECONDS.observe(timings["total_ms"] / 1000, kind)
+    for stage in timings["stages"]:
+        STAGE_SECONDS.observe(stage["duration_ms"] / 1000, stage["stage"])
+        for item, count in stage.items():
+            if item not in ("stage", "duration_ms", "calls"):
+                STAGE_ITEMS.inc(count, stage["stage"], item)
+
+async def analyze_cached(file_path: str, cleanup=None, summarizer: str = None, summary_budget_ms: float = None,
+                         profile: bool = False):
+    """
+    Analyze one uploaded file, reusing a cached AnalysisResult for identical bytes and options.
+    Returns (result, timings, profile); timings is None for a cache hit, and profiling always skips the cache.
+    """
+    key = await analysis_cache.key_for_file_async(file_path, options_fingerprint(summarizer, summary_budget_ms))
+    result = None if profile else await analysis_cache.get_async(key)
+    if result is not None:
+        if cleanup:
+            cleanup()
+        return result, None, None
+    result, timings, profile_report, chunk_index = await run_analysis(
+        execution.analyze_file_result, file_path, summarizer, summary_budget_ms, profile, cleanup=cleanup
+    )
+    record_timings(timings, "document")
+    await analysis_cache.put_async(key, result)
+    document_sessions.open(result.cleaned_text, chunk_index)
+    return result, timings, profile_report
+
+def chat_session(request: ChatRequest) -> DocumentSession:
+    """The session a /chat request refers to, by id or (re)opened from its text"""
+    if request.document_id is not None:
+        session = document_sessions.get(request.document_id)
+        if session is not None:
+            return session
+        if request.document_text is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired document_id. Analyze the document again, or send its document_text")
+    if request.document_text is None:
+        raise HTTPException(status_code=400, detail="Either document_id or document_text is required")
+    return document_sessions.open(request.document_text)
+
+async def chat_context(session: DocumentSession, question: str) -> Tuple[str, List[dict]]:
+    """The parts of the document to put in the prompt for question, and where they are in the text"""
+    if len(session.text) <= CHAT_CONTEXT_CHARS:
+        return session.text, [{"start": 0, "end": len(session.text)}]
+    if session.index is None:
+        session.index = await run_analysis(execution.build_chunk_index, session.text)
+    chunks = session.index.search(question, k=CHAT_TOP_K, max_chars=CHAT_CONTEXT_CHARS)
+    context = "\n\n[...]\n\n".join(chunk.text for chunk in chunks)
+    return context, [{"start": chunk.start, "end": chunk.end, "score": chunk.score} for chunk in chunks]
+
+def chat_prompt(context: str, question: str) -> str:
+    return f"""You are a legal document assistant. Based on the following excerpts from a document, answer the user's question accurately and concisely.
+
+Document Excerpts:
+{context}
+
+User Question: {question}
+
+Answer:"""
+
+def llm_http_error(e: LLMError) -> HTTPException:
+    if isinstance(e, LLMUnavailable):
+        headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+        return HTTPException(status_code=503, detail=str(e), headers=headers)
+    if isinstance(e, LLMTimeout):
+        return HTTPException(status_code=504, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+def chat_line(kind: str, **fields) -> str:
+    return json.dumps({"type": kind, **fields}) + "\n"
+
+async def stream_cached_answer(answer: str, document_id: str, sources: List[dict], cache: dict):
+    """A cached answer in the streamed format, as a single token line"""
+    yield chat_line("sources", document_id=document_id, sources=sources, cache=cache)
+    yield chat_line("token", text=answer)
+    yield chat_line("done")
+
+async def stream_chat_answer(stream: LLMStream, started: float, document_id: str, sources: List[dict],
+                             remember: Callable[[str], None]):
+    """
+    Yield NDJSON lines: the sources first, then {"type": "token"} lines as Ollama produces
+    them and a final "done" (or "error") line. If the client disconnects, this generator
+    is cancelled and closing the stream makes Ollama stop generating. Only a complete
+    answer is passed to remember.
+    """
+    first_token = True
+    tokens = []
+    try:
+        yield chat_line("sources", document_id=document_id, sources=sources, cache={"hit": False})
+        async for token in stream.tokens():
+            if first_token:
+                first_token = False
+                CHAT_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            tokens.append(token)
+            yield chat_line("token", text=token)
+        remember("".join(tokens).strip())
+        yield chat_line("done")
+    except LLMError as e:
+        yield chat_line("error", error=str(e))
+    finally:
+        await stream.aclose()
+
 def cleanup_temp_dir(dir_path: str):
     """Safely remove temporary directory"""
     try:
@@ -69,6 +317,215 @@ def cleanup_temp_dir(dir_path: str):
     except Exception as e:
         print(f"Error cleaning up temp directory: {e}")
 
+def save_batch_uploads(files: List[UploadFile], temp_dir: str) -> List[Tuple[str, str]]:
+    """Save uploaded documents into temp_dir, expanding .zip archives. Returns (name, path) per document"""
+    documents = []
+    remaining_bytes = BATCH_MAX_BYTES
+
+    def save(name: str, source) -> None:
+        nonlocal remaining_bytes
+        if len(documents) >= BATCH_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"Too many documents, at most {BATCH_MAX_FILES} per batch")
+        # Files are stored under their position, never under the uploaded (or archived) name
+        path = os.path.join(temp_dir, f"{len(documents)}{os.path.splitext(name)[1].lower()}")
+        with open(path, "wb") as target:
+            for block in iter(lambda: source.read(1 << 20), b""):
+                remaining_bytes -= len(block)
+                if remaining_bytes < 0:
+                    raise HTTPException(status_code=413, detail=f"Batch is larger than {BATCH_MAX_BYTES // (1024 * 1024)} MB")
+                target.write(block)
+        documents.append((name, path))
+
+    for upload in files:
+        ext = os.path.splitext(upload.filename)[1].lower()
+        if ext == ".zip":
+            try:
+                with zipfile.ZipFile(upload.file) as archive:
+                    for member in archive.infolist():
+                        member_ext = os.path.splitext(member.filename)[1].lower()
+                        if member.is_dir() or member_ext not in SUPPORTED_EXTENSIONS or member.filename.startswith("__MACOSX/"):
+                            continue
+                        with archive.open(member) as source:
+                            save(f"{upload.filename}/{member.filename}", source)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"Invalid zip archive: {upload.filename}")
+        elif ext in SUPPORTED_EXTENSIONS:
+            save(upload.filename, upload.file)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {upload.filename}")
+    return documents
+
+async def stream_batch_results(documents: List[Tuple[str, str]], temp_dir: str,
+                               summarizer: str = None, summary_budget_ms: float = None):
+    """
+    Yield one NDJSON line per document: cached results straight away, the rest as their worker
+    task finishes. Uncached documents are analyzed in groups, each group in one worker with a
+    single nlp.pipe pass, using at most one worker task per worker at a time.
+    """
+    def line(index: int, status: str, **fields) -> str:
+        return json.dumps({"index": index, "filename": documents[index][0], "status": status, **fields}) + "\n"
+
+    fingerprint = options_fingerprint(summarizer, summary_budget_ms)
+    cached, pending = [], []
+    for index, (_, path) in enumerate(documents):
+        key = await analysis_cache.key_for_file_async(path, fingerprint)
+        result = await analysis_cache.get_async(key)
+        if result is not None:
+            cached.append((index, result))
+        else:
+            pending.append((index, path, key))
+
+    group_size = max(1, min(BATCH_GROUP_SIZE, math.ceil(len(pending) / executor.max_workers)))
+    groups = [pending[start:start + group_size] for start in range(0, len(pending), group_size)]
+    window = asyncio.Semaphore(executor.max_workers)
+    submitted = set()
+    # The temp dir goes once no worker can still be reading from it. Workers release their
+    # group from the executor's thread, groups that never reached one from the loop
+    release_group = release_after(len(groups), lambda: cleanup_temp_dir(temp_dir))
+
+    async def run_group(number: int, group):
+        try:
+            async with window:
+                submitted.add(number)
+                return group, await executor.run(
+                    execution.analyze_file_batch, [path for _, path, _ in group], summarizer, summary_budget_ms,
+                    wait=executor.timeout, cleanup=release_group
+                )
+        except ExecutorSaturated:
+            return group, "Server is busy, try again shortly."
+        except asyncio.TimeoutError:
+            return group, f"Analysis did not finish within {executor.timeout:.0f} seconds"
+        except Exception as e:
+            return group, str(e)
+
+    tasks = [asyncio.create_task(run_group(number, group)) for number, group in enumerate(groups)]
+    try:
+        for index, result in cached:
+            yield line(index, "ok", cached=True, result=asdict(result))
+        for next_done in asyncio.as_completed(tasks):
+            group, outcome = await next_done
+            if isinstance(outcome, str):
+                for index, _, _ in group:
+                    yield line(index, "error", error=outcome)
+                continue
+            outcome, timings = outcome
+            record_timings(timings, "batch")
+            for (index, _, key), (_, result, error) in zip(group, outcome):
+                if result is None:
+                    yield line(index, "error", error=error)
+                else:
+                    await analysis_cache.put_async(key, result)
+                    yield line(index, "ok", cached=False, result=asdict(result))
+    finally:
+        # On client disconnect, stop groups that have not reached a worker yet
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not groups:
+            cleanup_temp_dir(temp_dir)
+        for number in range(len(groups)):
+            if number not in submitted:
+                release_group()
+
+def job_files_release(job_dir: str) -> Callable[[], None]:
+    """
+    A callback that removes a job's uploads on its second call: one call once no worker can
+    still read them, one once the job's outcome is recorded. A job interrupted by shutdown
+    records no outcome, so its uploads stay for the rerun after a restart.
+    """
+    return release_after(2, lambda: cleanup_temp_dir(job_dir))
+
+async def run_job(job: dict):
+    job_id, params = job["job_id"], job["params"]
+    files = params["files"]
+    release = job_files_release(params["dir"])
+    # Once executor.run is called it releases the worker side exactly once: when the worker is
+    # really done (which may be after a timeout was recorded), or right away if it never started
+    handed_to_executor = False
+    try:
+        if job["kind"] == "analyze":
+            summarizer, summary_budget_ms = params.get("summarizer"), params.get("summary_budget_ms")
+            key = await analysis_cache.key_for_file_async(files[0]["path"], options_fingerprint(summarizer, summary_budget_ms))
+            result = await analysis_cache.get_async(key)
+            if result is None:
+                handed_to_executor = True
+                result, timings = await executor.run(
+                    execution.run_analyze_job, job_store.path, job_id, job_store.owner, files[0]["path"],
+                    summarizer, summary_budget_ms, timeout=JOB_TIMEOUT, wait=JOB_TIMEOUT, cleanup=release
+                )
+                record_timings(timings, "job")
+                await analysis_cache.put_async(key, result)
+            recorded = await asyncio.to_thread(job_store.finish, job_id, asdict(result))
+        else:
+            handed_to_executor = True
+            result = await executor.run(
+                execution.run_compare_job, job_store.path, job_id, job_store.owner, files[0]["path"], files[1]["path"],
+                files[0]["filename"], files[1]["filename"],
+                timeout=JOB_TIMEOUT, wait=JOB_TIMEOUT, cleanup=release
+            )
+            recorded = await asyncio.to_thread(job_store.finish, job_id, result)
+    except ExecutorSaturated as e:
+        recorded = await asyncio.to_thread(job_store.fail, job_id, f"No worker became free within {JOB_TIMEOUT:.0f} seconds. {e}")
+    except asyncio.TimeoutError:
+        recorded = await asyncio.to_thread(job_store.fail, job_id, f"Analysis did not finish within {JOB_TIMEOUT:.0f} seconds")
+    except asyncio.CancelledError:
+        # Server shutdown: the job stays running in the store, and is requeued once its heartbeat goes stale
+        raise
+    except Exception as e:
+        recorded = await asyncio.to_thread(job_store.fail, job_id, str(e))
+    if not handed_to_executor:
+        release() # No worker was involved (cache hit, or failed before one was asked for)
+    if recorded:
+        release()
+    else:
+        # Another server requeued the job and owns it now; its rerun still needs the uploads
+        print(f"Job {job_id} was requeued while running here; discarding this outcome")
+
+async def heartbeat_jobs():
+    """Keep this server's running jobs alive in the store, and requeue jobs of servers that stopped"""
+    while True:
+        try:
+            await asyncio.to_thread(job_store.heartbeat)
+            # Jobs running when a server stopped still have their uploads on disk; run them again
+            requeued = await asyncio.to_thread(job_store.requeue_stale, JOB_STALE_SECONDS)
+            if requeued:
+                print(f"Requeued {requeued} analysis job(s) whose server stopped")
+                jobs_available.set()
+        except Exception as e:
+            print(f"Error updating job heartbeats: {e}")
+        await asyncio.sleep(JOB_STALE_SECONDS / 4)
+
+async def dispatch_jobs():
+    """Start queued jobs oldest first, running at most one job per worker at a time"""
+    running = asyncio.Semaphore(executor.max_workers)
+    tasks = set()
+    last_purge = 0.0
+    while True:
+        await running.acquire()
+        job = await asyncio.to_thread(job_store.claim_next)
+        if job is None:
+            running.release()
+            if time.monotonic() - last_purge > 60:
+                last_purge = time.monotonic()
+                await asyncio.to_thread(job_store.purge_finished, JOB_TTL)
+            # Woken early by POST /jobs; the timeout also picks up jobs queued by other server processes
+            jobs_available.clear()
+            try:
+                await asyncio.wait_for(jobs_available.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        task = asyncio.create_task(run_job(job))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _: running.release())
+
+def job_response(job: dict) -> dict:
+    # Server-side paths stay internal; clients see the uploaded file names
+    params = job.pop("params")
+    job["files"] = [f["filename"] for f in params["files"]]
+    return job
+
 # =========================
 # Routes
 # =========================
@@ -78,8 +535,11 @@ async def root():
         "message": "Legal Document Analyzer API",
         "endpoints": {
             "/analyze": "POST - Analyze a single document",
+            "/analyze/batch": "POST - Analyze many documents (or zip archives), streamed back as NDJSON",
             "/compare": "POST - Compare two documents",
+            "/jobs": "POST - Queue an analysis or comparison job; GET /jobs/{id} for its progress and result",
             "/chat": "POST - Chat with document using AI",
+            "/metrics": "GET - Prometheus metrics (stage timing histograms, request latency, workers, cache, jobs)",
             "/contract-templates": "GET - List available contract templates",
             "/generate-contract": "POST - Generate contract from built-in templates",
             "/generate-contract-from-custom-template": "POST - Generate contract from custom template"
@@ -87,83 +547,198 @@ async def root():
     }
 
 @app.post("/analyze")
-async def analyze_document(file: UploadFile = File(...)):
+async def analyze_document(
+    file: UploadFile = File(...),
+    summarizer: Optional[str] = Form(None),
+    summary_budget_ms: Optional[float] = Form(None),
+    timings: bool = False,
+    profile: bool = False
+):
+    """
+    Optional form fields:
+    - summarizer: one of "lsa", "textrank", "centroid", "sumy"
+    - summary_budget_ms: latency budget used to pick a summarizer when none is given
+      (e.g. 100 for interactive use)
+    Optional query parameters:
+    - timings=1: add per-stage durations and counts to the response ("cached": true if none ran)
+    - profile=1: analyze under cProfile, bypassing the cache, and add the profile to the response
+    """
+    if summarizer is not None and summarizer not in SUMMARIZERS:
+        raise HTTPException(status_code=400, detail=f"Unknown summarizer: {summarizer}. Available: {list(SUMMARIZERS)}")
+    if profile and not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled on this server")
     file_path = save_temp_file(file)
     try:
-        results = analyzer.analyze(file_path)
-        return asdict(results)
+        # The temp file is removed once the worker is done with it, even if this request times out
+        results, stage_timings, profile_report = await analyze_cached(
+            file_path, cleanup=lambda: cleanup_temp_file(file_path),
+            summarizer=summarizer, summary_budget_ms=summary_budget_ms, profile=profile
+        )
+        response = asdict(results)
+        # Questions about this document can be sent to /chat with just this id
+        response["document_id"] = document_sessions.open(results.cleaned_text).document_id
+        if timings or profile:
+            response["timings"] = stage_timings or {"cached": True, "stages": []}
+        if profile:
+            response["profile"] = profile_report
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cleanup_temp_file(file_path)
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    summarizer: Optional[str] = Form(None),
+    summary_budget_ms: Optional[float] = Form(None)
+):
+    """
+    Analyze many documents in one request. `files` may include .zip archives of documents.
+    Responds with NDJSON, one line per document as soon as it is done:
+    {"index", "filename", "status": "ok", "cached", "result"} or {"index", "filename", "status": "error", "error"}
+    """
+    if summarizer is not None and summarizer not in SUMMARIZERS:
+        raise HTTPException(status_code=400, detail=f"Unknown summarizer: {summarizer}. Available: {list(SUMMARIZERS)}")
+    temp_dir = tempfile.mkdtemp(prefix="legal_batch_")
+    try:
+        # Copying the uploads and unpacking archives is blocking file I/O
+        documents = await asyncio.to_thread(save_batch_uploads, files, temp_dir)
+        if not documents:
+            raise HTTPException(status_code=400, detail="No supported documents in the batch")
+        if not executor.has_capacity():
+            raise HTTPException(status_code=503, detail="Server is busy, try again shortly.", headers={"Retry-After": "5"})
+    except Exception:
+        cleanup_temp_dir(temp_dir)
+        raise
+    return StreamingResponse(
+        stream_batch_results(documents, temp_dir, summarizer, summary_budget_ms),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    files: List[UploadFile] = File(...),
+    kind: str = Form("analyze"),
+    summarizer: Optional[str] = Form(None),
+    summary_budget_ms: Optional[float] = Form(None)
+):
+    """
+    Queue a job and return its id straight away.
+    kind "analyze" takes one file (plus the optional summarizer fields of /analyze), "compare" takes two.
+    """
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}. Available: {list(JOB_KINDS)}")
+    expected = 1 if kind == "analyze" else 2
+    if len(files) != expected:
+        raise HTTPException(status_code=400, detail=f"A {kind} job takes {expected} file(s), got {len(files)}")
+    if summarizer is not None and summarizer not in SUMMARIZERS:
+        raise HTTPException(status_code=400, detail=f"Unknown summarizer: {summarizer}. Available: {list(SUMMARIZERS)}")
+    for upload in files:
+        if os.path.splitext(upload.filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {upload.filename}")
+
+    os.makedirs(JOB_DIR, exist_ok=True)
+    job_dir = tempfile.mkdtemp(dir=JOB_DIR)
+    saved = []
+    try:
+        for index, upload in enumerate(files):
+            path = os.path.join(job_dir, f"{index}{os.path.splitext(upload.filename)[1].lower()}")
+            with open(path, "wb") as target:
+                shutil.copyfileobj(upload.file, target)
+            saved.append({"filename": upload.filename, "path": path})
+        params = {"dir": job_dir, "files": saved}
+        if kind == "analyze":
+            params.update(summarizer=summarizer, summary_budget_ms=summary_budget_ms)
+        job_id = await asyncio.to_thread(job_store.create, kind, params)
+    except Exception:
+        cleanup_temp_dir(job_dir)
+        raise
+    jobs_available.set()
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status ("queued", "running", "done", "failed"), per-stage progress, and the result once done"""
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
 
 @app.post("/compare")
 async def compare_documents(file1: UploadFile = File(...), file2: UploadFile = File(...)):
     path1, path2 = save_temp_file(file1), save_temp_file(file2)
+
+    def cleanup():
+        cleanup_temp_file(path1)
+        cleanup_temp_file(path2)
+
     try:
-        results = analyzer.compare_documents(path1, path2)
-        return asdict(results)
+        # Both documents are analyzed at the same time in separate workers (or come from the cache), then diffed.
+        # Only cache misses take a worker slot; if none is free, run_analysis answers 503.
+        # A worker's release runs on the executor's thread, a cache hit's on the loop
+        release_one = release_after(2, cleanup)
+        (result1, _, _), (result2, _, _) = await asyncio.gather(
+            analyze_cached(path1, cleanup=release_one),
+            analyze_cached(path2, cleanup=release_one)
+        )
+        return await run_analysis(execution.compare_analysis_results, result1, result2, path1, path2)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cleanup_temp_file(path1)
-        cleanup_temp_file(path2)
 
 @app.post("/chat")
 async def chat_with_document(request: ChatRequest):
+    """
+    With "stream": true the answer comes back as NDJSON: a "sources" line, "token" lines
+    with text to append, then "done" (or "error" if generation failed midway)
+    """
+    started = time.perf_counter()
     try:
-        prompt = f"""You are a legal document assistant. Based on the following document, answer the user's question accurately and concisely.
-
-Document Content:
-{request.document_text[:4000]}
-
-User Question: {request.question}
+        session = chat_session(request)
 
-Answer:"""
-
-        ollama_response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama3.2",
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                }
-            },
-            timeout=60
-        )
+        # Same document, same (normalized or, if enabled, similar) question, same model: reuse the answer
+        scope = AnswerCache.scope(session.document_id, llm_client.model, llm_client.options)
+        cached, similarity = answer_cache.get(scope, request.question)
+        if cached is not None:
+            cache = {"hit": True, "match": "exact" if similarity is None else "similar", "question": cached.question}
+            if similarity is not None:
+                cache["similarity"] = similarity
+            if request.stream:
+                return StreamingResponse(
+                    stream_cached_answer(cached.answer, session.document_id, cached.sources, cache),
+                    media_type="application/x-ndjson"
+                )
+            return {"answer": cached.answer, "sources": cached.sources, "document_id": session.document_id, "cache": cache}
 
-        if not ollama_response.ok:
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Ollama API error: {ollama_response.text}"
-            )
+        # Only the passages relevant to the question are sent, instead of the start of the document
+        context, sources = await chat_context(session, request.question)
+        prompt = chat_prompt(context, request.question)
 
-        ollama_data = ollama_response.json()
-        answer = ollama_data.get("response", "").strip()
+        def remember(answer: str):
+            if answer:
+                answer_cache.put(scope, request.question, answer, sources)
 
-        if not answer:
-            raise HTTPException(
-                status_code=500,
-                detail="No response from Ollama. Make sure the model is loaded."
+        if request.stream:
+            stream = await llm_client.stream(prompt)
+            return StreamingResponse(
+                stream_chat_answer(stream, started, session.document_id, sources, remember),
+                media_type="application/x-ndjson",
+                # Also closes the stream if the client went away before the first line was sent
+                background=BackgroundTask(stream.aclose)
             )
 
-        return {"answer": answer}
+        answer = await llm_client.generate(prompt)
+        remember(answer)
+        return {"answer": answer, "sources": sources, "document_id": session.document_id, "cache": {"hit": False}}
 
-    except requests.exceptions.ConnectionError:
-        raise HTTPException(
-            status_code=503,
-            detail="Cannot connect to Ollama. Make sure Ollama is running on localhost:11434"
-        )
-    except requests.exceptions.Timeout:
-        raise HTTPException(
-            status_code=504,
-            detail="Ollama request timed out. The question might be too complex."
-        )
+    except HTTPException:
+        raise
+    except LLMError as e:
+        raise llm_http_error(e)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -194,8 +769,9 @@ async def get_contract_templates():
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Contract generation is blocking file I/O, so these routes are plain `def` and run in FastAPI's threadpool
 @app.post("/generate-contract")
-async def generate_builtin_contract(request: ContractGenerationRequest):
+def generate_builtin_contract(request: ContractGenerationRequest):
     """
     Generate a contract from built-in templates (NDA, Service Agreement).
     
@@ -269,7 +845,7 @@ async def generate_builtin_contract(request: ContractGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Failed to generate contract: {str(e)}")
 
 @app.post("/generate-contract-from-custom-template")
-async def generate_custom_contract(
+def generate_custom_contract(
     template_file: UploadFile = File(...), 
     fields_json: str = Form(...)
 ):
@@ -371,11 +947,25 @@ async def generate_custom_contract(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to generate contract: {str(e)}")
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Rendering reads the job counts from SQLite
+    return Response(content=await asyncio.to_thread(metrics.render), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "analyzer": "ready",
+        "spacy_models_loaded": model_registry.loaded_models(),
+        "analysis_workers": executor.max_workers,
+        "analysis_in_flight": executor.in_flight,
+        "analysis_capacity": executor.capacity,
+        "analysis_cache": analysis_cache.stats(),
+        "jobs": await asyncio.to_thread(job_store.counts),
+        "document_sessions": len(document_sessions),
+        "llm": llm_client.stats(),
+        "chat_answer_cache": answer_cache.stats(),
         "contract_generator": "ready"
     }
@@ -0,0 +1,481 @@
+"""
+Benchmark of the analysis pipeline.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --out bench-new.json --baseline bench.json
+
+Every document in the corpus (DOCUMENTS/ by default) is benchmarked at several sizes: the
+document itself (1x) and synthetic versions with its text repeated 10x and 100x. For each
+size the stages of LegalDocumentAnalyzer are timed one by one (load, clean_text,
+identify_clauses, extract_entities, summarize_text, calculate_signing_recommendation),
+followed by analyze end to end (which streams the stages together) and compare_documents.
+Results are written as JSON with the commit they were measured on, so two runs can be compared.
+
+    python benchmark.py --rules --out rules.json
+
+only times the scoring rules (no spaCy model needed): ScoringRuleEngine.evaluate against one
+re.finditer per rule, on the corpus text repeated to --rule-chars characters, with the shipped
+rules plus 0, 200 and 1000 synthetic ones.
+
+    python benchmark.py --summarizers --out summarizers.json
+
+times the extractive summarizers on the corpus sentences repeated to 100, 400 and 2000
+sentences. The costs summarization.choose_summarizer budgets with
+(PREPARE_COST_PER_SENTENCE_MS and each summarizer's cost_per_sentence_ms) come from this run.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import spacy
+
+from legal_analyzer import LegalDocumentAnalyzer, SUPPORTED_EXTENSIONS
+from rule_engine import DEFAULT_RULES_PATH, ScoringRuleEngine
+from summarization import SUMMARIZER_CLASSES, CentroidSummarizer, ExtractiveSummarizer
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DOCUMENTS")
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_RULE_COUNTS = (0, 200, 1000)
+DEFAULT_SUMMARY_SENTENCES = (100, 400, 2000)
+STAGES = ("load", "clean_text", "identify_clauses", "extract_entities", "summarize_text",
+          "calculate_signing_recommendation")
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter for this process (Linux only). Returns whether it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size: since the last reset_peak_rss on Linux, otherwise of the whole process."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    milliseconds = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 3),
+        "p95_ms": round(float(np.percentile(milliseconds, 95)), 3),
+        "mean_ms": round(float(milliseconds.mean()), 3),
+        "min_ms": round(float(milliseconds.min()), 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def corpus_documents(corpus: str) -> List[str]:
+    return sorted(
+        os.path.join(corpus, name) for name in os.listdir(corpus)
+        if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def scaled_documents(analyzer: LegalDocumentAnalyzer, documents: List[str], scales: List[int],
+                     work_dir: str) -> List[Tuple[str, int, str]]:
+    """(name, scale, path) for every document and scale. Scaled copies are .txt files of the text repeated."""
+    cases = []
+    for path in documents:
+        name = os.path.basename(path)
+        if path.endswith(".txt"):
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        else:
+            text = analyzer.load_document(path)
+        for scale in scales:
+            if scale == 1:
+                cases.append((name, 1, path))
+                continue
+            scaled_path = os.path.join(work_dir, f"{os.path.splitext(name)[0]}.x{scale}.txt")
+            with open(scaled_path, "w", encoding="utf-8") as f:
+                f.write("\n\n".join([text] * scale))
+            cases.append((name, scale, scaled_path))
+    return cases
+
+
+def time_stages(analyzer: LegalDocumentAnalyzer, path: str) -> Dict[str, float]:
+    """Run the analysis stages one after another on path, returning seconds per stage."""
+    timings = {}
+    clean_seconds = []
+    clean_text = analyzer.clean_text
+
+    def timed_clean_text(text: str) -> str:
+        started = time.perf_counter()
+        try:
+            return clean_text(text)
+        finally:
+            clean_seconds.append(time.perf_counter() - started)
+
+    # Loaders clean as they read; count that time as clean_text rather than load
+    analyzer.clean_text = timed_clean_text
+    try:
+        started = time.perf_counter()
+        text = analyzer.load_document(path)
+        timings["load"] = time.perf_counter() - started - sum(clean_seconds)
+    finally:
+        del analyzer.clean_text
+    timings["clean_text"] = sum(clean_seconds)
+
+    def timed(stage: str, fn: Callable, *args) -> Any:
+        started = time.perf_counter()
+        value = fn(*args)
+        timings[stage] = time.perf_counter() - started
+        return value
+
+    clauses = timed("identify_clauses", analyzer.identify_clauses, text)
+    entities = timed("extract_entities", analyzer.extract_entities, text)
+    timed("summarize_text", analyzer.summarize_text, text)
+    timed("calculate_signing_recommendation", analyzer.calculate_signing_recommendation, text, clauses, entities)
+    return timings
+
+
+def benchmark_case(analyzer: LegalDocumentAnalyzer, path: str, repeats: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        analyzer.analyze(path)
+    reset_peak_rss()
+    stage_samples = {stage: [] for stage in STAGES}
+    analyze_samples = []
+    for _ in range(repeats):
+        for stage, seconds in time_stages(analyzer, path).items():
+            stage_samples[stage].append(seconds)
+        started = time.perf_counter()
+        result = analyzer.analyze(path)
+        analyze_samples.append(time.perf_counter() - started)
+
+    median = float(np.median(analyze_samples))
+    characters = len(result.cleaned_text)
+    return {
+        "characters": characters,
+        "stages": {stage: latency_stats(samples) for stage, samples in stage_samples.items()},
+        "analyze": latency_stats(analyze_samples),
+        "throughput": {
+            "documents_per_s": round(1 / median, 3),
+            "characters_per_s": round(characters / median),
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def benchmark_compare(analyzer: LegalDocumentAnalyzer, path1: str, path2: str, repeats: int) -> Dict[str, Any]:
+    reset_peak_rss()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        analyzer.compare_documents(path1, path2)
+        samples.append(time.perf_counter() - started)
+    return {"compare_documents": latency_stats(samples), "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+
+def run_benchmark(corpus: str = DEFAULT_CORPUS, scales: List[int] = DEFAULT_SCALES, repeats: int = 5,
+                  warmup: int = 1, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    analyzer = LegalDocumentAnalyzer()
+    started = time.perf_counter()
+    analyzer.nlp # Load the model up front so its load time is reported separately
+    model_load_s = time.perf_counter() - started
+
+    documents = corpus_documents(corpus)
+    if not documents:
+        raise ValueError(f"No {', '.join(SUPPORTED_EXTENSIONS)} documents in {corpus}")
+
+    work_dir = tempfile.mkdtemp(prefix="legal_benchmark_")
+    try:
+        cases = scaled_documents(analyzer, documents, scales, work_dir)
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "spacy": spacy.__version__,
+                "analyzer_fingerprint": analyzer.fingerprint(),
+                "config": asdict(analyzer.config),
+                "repeats": repeats,
+                "warmup": warmup,
+                "model_load_s": round(model_load_s, 3),
+            },
+            "documents": [],
+            "compare": [],
+        }
+        for name, scale, path in cases:
+            log(f"{name} x{scale}")
+            entry = {"document": name, "scale": scale}
+            entry.update(benchmark_case(analyzer, path, repeats, warmup))
+            report["documents"].append(entry)
+
+        # Each corpus document against the next one (or itself for a single-document corpus), at every scale
+        for scale in scales:
+            paths = [(name, path) for name, case_scale, path in cases if case_scale == scale]
+            pairs = list(zip(paths, paths[1:])) or [(paths[0], paths[0])]
+            for (name1, path1), (name2, path2) in pairs:
+                log(f"compare {name1} {name2} x{scale}")
+                entry = {"documents": [name1, name2], "scale": scale}
+                entry.update(benchmark_compare(analyzer, path1, path2, repeats))
+                report["compare"].append(entry)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def synthetic_rules(text: str, count: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """`count` rules shaped like the shipped ones ("word (?:word|word)"), using words of text."""
+    words = sorted(set(re.findall(r"[a-z]{4,}", text.lower())))
+    rng = random.Random(seed)
+    rules = {}
+    for i in range(count):
+        first, second, third = rng.sample(words, 3)
+        rules[f"synthetic_{i}"] = {"pattern": f"{first} (?:{second}|{third})", "weight": -1, "description": "synthetic"}
+    return rules
+
+
+def benchmark_rules(corpus: str = DEFAULT_CORPUS, characters: int = 2_700_000,
+                    rule_counts: List[int] = DEFAULT_RULE_COUNTS, repeats: int = 5,
+                    log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """p50 of ScoringRuleEngine.evaluate and of one re.finditer per rule, per number of synthetic rules."""
+    analyzer = LegalDocumentAnalyzer()
+    documents = corpus_documents(corpus)
+    if not documents:
+        raise ValueError(f"No {', '.join(SUPPORTED_EXTENSIONS)} documents in {corpus}")
+    text = "\n\n".join(analyzer.load_document(path) for path in documents)
+    text = (text * (characters // len(text) + 1))[:characters]
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        shipped = json.load(f)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "characters": len(text),
+            "repeats": repeats,
+        },
+        "rules": [],
+    }
+    for count in rule_counts:
+        log(f"rules +{count}")
+        engine = ScoringRuleEngine({**shipped["risk_patterns"], **synthetic_rules(text, count)},
+                                   shipped["favorable_patterns"])
+        regexes = [re.compile(info["pattern"], re.IGNORECASE) for _, _, info in engine._rules]
+
+        def per_rule() -> List[int]:
+            return [sum(1 for _ in regex.finditer(text)) for regex in regexes]
+
+        samples = {"evaluate": [], "per_rule_finditer": []}
+        for _ in range(repeats):
+            for name, fn in (("evaluate", lambda: engine.evaluate(text)), ("per_rule_finditer", per_rule)):
+                started = time.perf_counter()
+                fn()
+                samples[name].append(time.perf_counter() - started)
+        counts = [0] * len(regexes)
+        for rule_id, _, _ in engine.scanner.scan(text):
+            counts[rule_id] += 1
+        report["rules"].append({
+            "rules": len(regexes),
+            "matches": sum(counts),
+            "same_matches": counts == per_rule(),
+            **{name: latency_stats(values) for name, values in samples.items()},
+        })
+    return report
+
+
+class _UnrankedSummarizer(ExtractiveSummarizer):
+    """Everything a summarizer does except scoring: splitting into words and picking candidates."""
+
+    def _rank(self, sentence_words: List[List[str]], sentences: List[str]) -> np.ndarray:
+        return np.zeros(len(sentences))
+
+
+def benchmark_summarizers(corpus: str = DEFAULT_CORPUS, sentence_counts: List[int] = DEFAULT_SUMMARY_SENTENCES,
+                          repeats: int = 5, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    p50 of every extractive summarizer per number of sentences, next to the same run with
+    scoring left out ("prepare"). `per_sentence_ms` is the prepare time per sentence; a
+    summarizer's `per_candidate_ms` is its time beyond prepare, per candidate sentence scored.
+    """
+    analyzer = LegalDocumentAnalyzer()
+    documents = corpus_documents(corpus)
+    if not documents:
+        raise ValueError(f"No {', '.join(SUPPORTED_EXTENSIONS)} documents in {corpus}")
+    text = "\n\n".join(analyzer.load_document(path) for path in documents)
+    corpus_sentences = [text[start:end] for start, end in analyzer.split_sentences(text)]
+    max_sentences = analyzer.config.summary_max_sentences
+    # As in summarize_text: the centroid summarizer uses the model's word vectors when it has them
+    vectorize = analyzer._sentence_vectors if analyzer.nlp.vocab.vectors_length else None
+    engines = {"prepare": _UnrankedSummarizer(max_sentences=max_sentences)}
+    for name, summarizer_class in SUMMARIZER_CLASSES.items():
+        if summarizer_class is CentroidSummarizer:
+            engines[name] = CentroidSummarizer(max_sentences=max_sentences, vectorize=vectorize)
+        else:
+            engines[name] = summarizer_class(max_sentences=max_sentences)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": analyzer.config.model_name,
+            "max_sentences": max_sentences,
+            "repeats": repeats,
+        },
+        "summarizers": [],
+    }
+    for count in sentence_counts:
+        log(f"summarizers on {count} sentences")
+        sentences = (corpus_sentences * (count // len(corpus_sentences) + 1))[:count]
+        candidates = min(count, max_sentences)
+        samples = {name: [] for name in engines}
+        for _ in range(repeats):
+            for name, engine in engines.items():
+                started = time.perf_counter()
+                engine(sentences, 5)
+                samples[name].append(time.perf_counter() - started)
+        stats = {name: latency_stats(values) for name, values in samples.items()}
+        prepare = stats.pop("prepare")
+        report["summarizers"].append({
+            "sentences": count,
+            "candidates": candidates,
+            "prepare": {**prepare, "per_sentence_ms": round(prepare["p50_ms"] / count, 4)},
+            **{name: {**values, "per_candidate_ms": round(max(0.0, values["p50_ms"] - prepare["p50_ms"]) / candidates, 4)}
+               for name, values in stats.items()},
+        })
+    return report
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1,
+                    min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Lines describing the p50 change of every timing present in both reports. Slowdowns beyond
+    `threshold` (relative) and `min_delta_ms` (absolute, so sub-millisecond noise is ignored) are marked.
+    """
+    def timings(report: Dict[str, Any]) -> Dict[str, float]:
+        values = {}
+        for entry in report["documents"]:
+            case = f"{entry['document']} x{entry['scale']}"
+            for stage, stats in entry["stages"].items():
+                values[f"{case} {stage}"] = stats["p50_ms"]
+            values[f"{case} analyze"] = entry["analyze"]["p50_ms"]
+        for entry in report["compare"]:
+            values[f"{' vs '.join(entry['documents'])} x{entry['scale']} compare_documents"] = \
+                entry["compare_documents"]["p50_ms"]
+        return values
+
+    before, after = timings(baseline), timings(current)
+    lines = [f"p50 change from {baseline['meta']['commit']} to {current['meta']['commit']}:"]
+    for key in after:
+        if key not in before:
+            continue
+        change = (after[key] - before[key]) / before[key] if before[key] else 0.0
+        marker = "  REGRESSION" if change > threshold and after[key] - before[key] > min_delta_ms else ""
+        lines.append(f"  {key}: {before[key]:.2f} ms -> {after[key]:.2f} ms ({change:+.1%}){marker}")
+    return lines
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the legal document analysis pipeline")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of documents (default: DOCUMENTS/)")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated size multipliers (default: 1,10,100)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per case (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case first (default: 1)")
+    parser.add_argument("--out", default="benchmark.json", help="JSON report to write (default: benchmark.json)")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative p50 slowdown reported as a regression (default: 0.1)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Smallest absolute p50 slowdown reported as a regression (default: 1.0)")
+    parser.add_argument("--rules", action="store_true", help="Only benchmark scoring rule evaluation")
+    parser.add_argument("--rule-chars", type=int, default=2_700_000,
+                        help="Characters of text the rules are evaluated on (default: 2700000)")
+    parser.add_argument("--rule-counts", default=",".join(map(str, DEFAULT_RULE_COUNTS)),
+                        help="Comma-separated numbers of synthetic rules added to the shipped ones (default: 0,200,1000)")
+    parser.add_argument("--summarizers", action="store_true", help="Only benchmark the extractive summarizers")
+    parser.add_argument("--summary-sentences", default=",".join(map(str, DEFAULT_SUMMARY_SENTENCES)),
+                        help="Comma-separated numbers of sentences to summarize (default: 100,400,2000)")
+    args = parser.parse_args(argv)
+
+    if args.rules:
+        report = benchmark_rules(args.corpus, args.rule_chars, [int(count) for count in args.rule_counts.split(",")],
+                                 args.repeats, log=lambda message: print(message, file=sys.stderr))
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        for entry in report["rules"]:
+            print(f"{entry['rules']} rules on {report['meta']['characters']} chars: evaluate p50 "
+                  f"{entry['evaluate']['p50_ms']:.1f} ms, one finditer per rule p50 "
+                  f"{entry['per_rule_finditer']['p50_ms']:.1f} ms, same matches: {entry['same_matches']}")
+        print(f"Wrote {args.out}")
+        return 0
+
+    if args.summarizers:
+        report = benchmark_summarizers(args.corpus, [int(count) for count in args.summary_sentences.split(",")],
+                                       args.repeats, log=lambda message: print(message, file=sys.stderr))
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        for entry in report["summarizers"]:
+            costs = ", ".join(f"{name} {entry[name]['p50_ms']:.1f} ms ({entry[name]['per_candidate_ms']} ms/candidate)"
+                              for name in SUMMARIZER_CLASSES)
+            print(f"{entry['sentences']} sentences ({entry['candidates']} candidates): prepare "
+                  f"{entry['prepare']['p50_ms']:.1f} ms ({entry['prepare']['per_sentence_ms']} ms/sentence), {costs}")
+        print(f"Wrote {args.out}")
+        return 0
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    report = run_benchmark(args.corpus, scales, args.repeats, args.warmup,
+                           log=lambda message: print(message, file=sys.stderr))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for entry in report["documents"]:
+        print(f"{entry['document']} x{entry['scale']} ({entry['characters']} chars): "
+              f"analyze p50 {entry['analyze']['p50_ms']:.1f} ms, p95 {entry['analyze']['p95_ms']:.1f} ms, "
+              f"{entry['throughput']['documents_per_s']:.2f} docs/s, peak RSS {entry['peak_rss_mb']:.0f} MB")
+    for entry in report["compare"]:
+        print(f"compare {' vs '.join(entry['documents'])} x{entry['scale']}: "
+              f"p50 {entry['compare_documents']['p50_ms']:.1f} ms")
+    print(f"Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines = compare_reports(baseline, report, args.threshold, args.min_delta_ms)
+        print("\n".join(lines))
+        return 1 if any(line.endswith("REGRESSION") for line in lines) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
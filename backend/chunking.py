@@ -0,0 +1,29 @@
+from typing import List, Tuple
+
+
+def chunk_text(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    Split text into contiguous [start, end) spans of at most `max_chars` characters.
+
+    Cuts are made after a paragraph break where possible, then after a line
+    break, then after a space, so chunks rarely split a sentence. The spans
+    cover the whole text, so a chunk offset plus a position inside the chunk
+    gives the position in the original text.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    spans = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            for separator in ('\n\n', '\n', ' '):
+                cut = text.rfind(separator, start, end)
+                if cut > start:
+                    end = cut + len(separator)
+                    break
+        spans.append((start, end))
+        start = end
+    return spans
@@ -0,0 +1,248 @@
+"""
+Offline bulk analysis from the command line.
+
+    python cli.py analyze ../DOCUMENTS --workers 4 --out results.jsonl
+
+Every document under DIR is analyzed in a pool of worker processes, each loading the
+spaCy model once, and one JSON line is appended to --out per document as soon as its
+group finishes. The output file is also the checkpoint: running the same command again
+skips every document already in it, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict
+from typing import Dict, Iterator, List, Set, Tuple
+
+import execution
+import model_registry
+from analyzer_config import AnalyzerConfig
+from legal_analyzer import SUPPORTED_EXTENSIONS
+from summarization import SUMMARIZERS
+
+# Large per-document fields left out of the output unless --include-text is given
+TEXT_FIELDS = ("cleaned_text", "line_starts", "pages")
+
+
+def iter_documents(root: str) -> Iterator[str]:
+    """Paths of supported documents under root, relative to it, in a stable (sorted) order."""
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1].lower() in SUPPORTED_EXTENSIONS:
+                path = os.path.relpath(os.path.join(dir_path, file_name), root)
+                yield path.replace(os.sep, "/")
+
+
+def load_checkpoint(out_path: str, retry_errors: bool = False) -> Set[str]:
+    """
+    Documents already recorded in out_path (the last record of a path decides). A line cut
+    short by an interruption is truncated away so the file stays valid JSONL before new
+    lines are appended. Valid JSON lines without a "path" are ignored.
+    """
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    valid_bytes = 0
+    with open(out_path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            valid_bytes += len(line)
+            path = record.get("path") if isinstance(record, dict) else None
+            if path is None:
+                continue
+            if record.get("status") == "ok" or not retry_errors:
+                done.add(path)
+            else:
+                done.discard(path)
+    if valid_bytes < os.path.getsize(out_path):
+        print(f"Discarding an incomplete last line in {out_path}", file=sys.stderr)
+        with open(out_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+def compact_results(out_path: str):
+    """
+    Keep only the last record of each path, so documents retried with --retry-errors
+    don't leave their old error line behind. Records keep the order they were last written in;
+    lines that aren't records are dropped.
+    """
+    records: Dict[str, bytes] = {}
+    with open(out_path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            path = record.get("path") if isinstance(record, dict) else None
+            if path is not None:
+                records.pop(path, None)
+                records[path] = line
+    # Write a new file and swap it in, so an interruption can't lose results
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.writelines(records.values())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+
+
+def _analyze_group(root: str, paths: List[str], summarizer: str, summary_budget_ms: float,
+                   include_text: bool) -> List[Tuple[str, str]]:
+    """Worker task: analyze one group of documents and return (status, JSON line) per document."""
+    lines = []
+    full_paths = [os.path.join(root, path) for path in paths]
+    results = execution.worker_analyzer().analyze_many(full_paths, summarizer=summarizer,
+                                                       summary_budget_ms=summary_budget_ms)
+    for path, (_, result, error) in zip(paths, results):
+        if result is None:
+            record = {"path": path, "status": "error", "error": error}
+        else:
+            result = asdict(result)
+            if not include_text:
+                for name in TEXT_FIELDS:
+                    result.pop(name, None)
+            record = {"path": path, "status": "ok", "result": result}
+        lines.append((record["status"], json.dumps(record) + "\n"))
+    return lines
+
+
+def _groups(paths: Iterator[str], size: int) -> Iterator[List[str]]:
+    group = []
+    for path in paths:
+        group.append(path)
+        if len(group) == size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def analyze_directory(root: str, out_path: str, workers: int, group_size: int = 8,
+                      summarizer: str = None, summary_budget_ms: float = None,
+                      include_text: bool = False, retry_errors: bool = False,
+                      config: AnalyzerConfig = None) -> Dict[str, int]:
+    """Analyze every document under root into out_path, skipping those already there. Returns counts."""
+    config = config or AnalyzerConfig()
+    done = load_checkpoint(out_path, retry_errors)
+    counts = {"skipped": 0, "ok": 0, "error": 0}
+
+    def pending_documents() -> Iterator[str]:
+        # Counted here rather than len(done), which includes documents no longer in the tree
+        for path in iter_documents(root):
+            if path in done:
+                counts["skipped"] += 1
+            else:
+                yield path
+
+    # With fork, load the model before starting the workers so they share it copy-on-write
+    if multiprocessing.get_start_method() == "fork":
+        model_registry.preload(config.model_name)
+
+    started = time.monotonic()
+    last_report = started
+    with open(out_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=execution._init_worker, initargs=(config, workers)
+    ) as pool:
+        groups = _groups(pending_documents(), group_size)
+        in_flight = {}
+        try:
+            while True:
+                # Keep every worker busy with one group queued behind it, without walking the whole tree up front
+                while len(in_flight) < workers * 2:
+                    group = next(groups, None)
+                    if group is None:
+                        break
+                    future = pool.submit(_analyze_group, root, group, summarizer, summary_budget_ms, include_text)
+                    in_flight[future] = group
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    group = in_flight.pop(future)
+                    try:
+                        lines = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        lines = [("error", json.dumps({"path": path, "status": "error", "error": str(e)}) + "\n")
+                                 for path in group]
+                    for status, line in lines:
+                        out.write(line)
+                        counts[status] += 1
+                out.flush()
+
+                now = time.monotonic()
+                if now - last_report >= 10:
+                    last_report = now
+                    processed = counts["ok"] + counts["error"]
+                    print(f"{processed} analyzed ({counts['error']} failed), "
+                          f"{processed / (now - started):.1f} docs/s", file=sys.stderr)
+        except BaseException:
+            # Interrupted (or a worker died): drop queued groups; everything written so far is kept for resume
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            out.flush()
+            os.fsync(out.fileno())
+    if retry_errors:
+        compact_results(out_path)
+    return counts
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="legal-analyzer", description="Legal document analyzer")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="Analyze every document under a directory into a JSONL file")
+    analyze.add_argument("directory", help="Directory searched recursively for .pdf, .docx and .txt files")
+    analyze.add_argument("--out", default="results.jsonl", help="JSONL output, also used to resume (default: results.jsonl)")
+    analyze.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    analyze.add_argument("--group-size", type=int, default=8,
+                         help="Documents a worker analyzes in one nlp.pipe pass (default: 8)")
+    analyze.add_argument("--summarizer", choices=SUMMARIZERS, help="Summarizer backend (default: from the environment)")
+    analyze.add_argument("--summary-budget-ms", type=float, help="Pick the best summarizer that fits this budget")
+    analyze.add_argument("--include-text", action="store_true",
+                         help=f"Keep {', '.join(TEXT_FIELDS)} in each result (large)")
+    analyze.add_argument("--retry-errors", action="store_true", help="Analyze documents that failed in an earlier run again")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    if args.workers < 1 or args.group_size < 1:
+        parser.error("--workers and --group-size must be at least 1")
+
+    started = time.monotonic()
+    try:
+        counts = analyze_directory(
+            args.directory, args.out, args.workers, args.group_size,
+            summarizer=args.summarizer, summary_budget_ms=args.summary_budget_ms,
+            include_text=args.include_text, retry_errors=args.retry_errors
+        )
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Run the same command again to resume from {args.out}", file=sys.stderr)
+        return 130
+    except BrokenProcessPool:
+        print(f"A worker process died. Run the same command again to resume from {args.out}", file=sys.stderr)
+        return 1
+
+    print(f"Analyzed {counts['ok'] + counts['error']} documents ({counts['error']} failed, "
+          f"{counts['skipped']} already in {args.out}) in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from retrieval import ChunkIndex, text_digest
+
+
+@dataclass
+class DocumentSession:
+    """An analyzed document held server-side, so /chat only needs its id."""
+    document_id: str
+    text: str
+    index: Optional[ChunkIndex] = None # Built on the first question if analysis didn't provide one
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class DocumentSessions:
+    """
+    Bounded TTL cache of DocumentSession objects.
+
+    A document's id is the digest of its cleaned text, so analyzing the same
+    document again (or sending its text to /chat after the session expired)
+    lands on the same id. Sessions expire `ttl` seconds after their last use;
+    beyond `max_entries` the least recently used one is dropped.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, DocumentSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, document_id: str) -> Optional[DocumentSession]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(document_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(document_id)
+            return session
+
+    def open(self, text: str, index: ChunkIndex = None) -> DocumentSession:
+        """The session for text, created if needed; `index` replaces a missing one."""
+        document_id = text_digest(text)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(document_id)
+            if session is None:
+                session = self._sessions[document_id] = DocumentSession(document_id, text, index, now)
+            else:
+                session.last_used = now
+                if session.index is None:
+                    session.index = index
+                self._sessions.move_to_end(document_id)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+            return session
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._sessions)
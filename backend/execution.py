@@ -0,0 +1,226 @@
+import asyncio
+import cProfile
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from legal_analyzer import LegalDocumentAnalyzer, AnalysisResult
+from analyzer_config import AnalyzerConfig
+from job_store import JobStore, ANALYSIS_STAGES
+from instrumentation import StageTimings, profile_report
+from retrieval import ChunkIndex
+
+
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+# =========================
+# Worker process side
+# =========================
+_worker_analyzer: LegalDocumentAnalyzer = None
+
+
+def worker_config(config: AnalyzerConfig, pool_workers: int, cpus: int = None) -> AnalyzerConfig:
+    """
+    The config of one of `pool_workers` pool processes. The pool and the processes its workers
+    start for PDF extraction (pdf_workers) and nlp.pipe (nlp_n_process) share the `cpus` of the
+    machine, so each worker gets an equal share of them, whatever the config asks for.
+    """
+    share = max(1, (cpus or os.cpu_count() or 1) // max(1, pool_workers))
+    # spaCy reads a negative n_process as "every CPU", which for a worker is its share
+    nlp_n_process = share if config.nlp_n_process < 0 else min(max(1, config.nlp_n_process), share)
+    return replace(config, pdf_workers=min(max(1, config.pdf_workers), share), nlp_n_process=nlp_n_process)
+
+
+def _init_worker(config: AnalyzerConfig, pool_workers: int):
+    global _worker_analyzer
+    _worker_analyzer = LegalDocumentAnalyzer(verbose=False, config=worker_config(config, pool_workers))
+    # Load the model once per worker up front (a no-op if it was preloaded before forking)
+    _worker_analyzer.nlp
+
+
+def worker_analyzer() -> LegalDocumentAnalyzer:
+    """The analyzer owned by the current worker process."""
+    return _worker_analyzer
+
+
+def analyze_file_result(file_path: str, summarizer: str = None, summary_budget_ms: float = None, profile: bool = False
+                        ) -> Tuple[AnalysisResult, Dict[str, Any], Optional[Dict[str, Any]], ChunkIndex]:
+    """
+    (result, stage timings, profile report, retrieval index of the cleaned text);
+    the report is None unless `profile` is set.
+    """
+    timings = StageTimings()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        result = _worker_analyzer.analyze(file_path, summarizer=summarizer, summary_budget_ms=summary_budget_ms,
+                                          timings=timings)
+    finally:
+        if profiler:
+            profiler.disable()
+    with timings.span("index"):
+        chunk_index = _worker_analyzer.build_chunk_index(result.cleaned_text)
+    return result, timings.as_dict(), profile_report(profiler) if profiler else None, chunk_index
+
+
+def build_chunk_index(text: str) -> ChunkIndex:
+    return _worker_analyzer.build_chunk_index(text)
+
+
+def analyze_file_batch(file_paths: List[str], summarizer: str = None, summary_budget_ms: float = None
+                       ) -> Tuple[List[Tuple[str, AnalysisResult, str]], Dict[str, Any]]:
+    """(file_path, result, error) per document, and the stage timings of the whole group."""
+    timings = StageTimings()
+    results = list(_worker_analyzer.analyze_many(file_paths, summarizer=summarizer, summary_budget_ms=summary_budget_ms,
+                                                 timings=timings))
+    return results, timings.as_dict()
+
+
+def compare_analysis_results(result1: AnalysisResult, result2: AnalysisResult,
+                             file_path1: str, file_path2: str) -> Dict[str, Any]:
+    return asdict(_worker_analyzer.compare_results(result1, result2, file_path1, file_path2))
+
+
+class _JobProgress:
+    """
+    Forwards analyzer progress to the job store, as long as `owner` still owns the job. The furthest
+    stage reached is written as soon as it changes; page counts within a stage at most once per `interval` seconds.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, owner: str, document: int = None, interval: float = 1.0):
+        self.store = store
+        self.job_id = job_id
+        self.owner = owner
+        self.document = document
+        self.interval = interval
+        self._furthest = -1
+        self._last_write = 0.0
+
+    def __call__(self, stage: str, pages: int):
+        position = ANALYSIS_STAGES.index(stage)
+        now = time.monotonic()
+        if position <= self._furthest and now - self._last_write < self.interval:
+            return
+        self._furthest = max(self._furthest, position)
+        self._last_write = now
+        self.store.report_stage(self.job_id, self.owner, ANALYSIS_STAGES[self._furthest], pages, self.document)
+
+
+def run_analyze_job(job_db: str, job_id: str, owner: str, file_path: str, summarizer: str = None,
+                    summary_budget_ms: float = None) -> Tuple[AnalysisResult, Dict[str, Any]]:
+    progress = _JobProgress(JobStore(job_db), job_id, owner)
+    timings = StageTimings()
+    result = _worker_analyzer.analyze(file_path, summarizer=summarizer, summary_budget_ms=summary_budget_ms,
+                                      progress=progress, timings=timings)
+    return result, timings.as_dict()
+
+
+def run_compare_job(job_db: str, job_id: str, owner: str, file_path1: str, file_path2: str,
+                    name1: str, name2: str) -> Dict[str, Any]:
+    store = JobStore(job_db)
+    result1 = _worker_analyzer.analyze(file_path1, progress=_JobProgress(store, job_id, owner, document=1))
+    result2 = _worker_analyzer.analyze(file_path2, progress=_JobProgress(store, job_id, owner, document=2))
+    store.report_stage(job_id, owner, "compare")
+    return asdict(_worker_analyzer.compare_results(result1, result2, name1, name2))
+
+
+# =========================
+# Event loop side
+# =========================
+class AnalysisExecutor:
+    """
+    Runs CPU-bound analysis in a process pool so the event loop stays free.
+
+    At most `max_workers + max_queue` tasks are accepted at once; beyond that
+    `run` raises ExecutorSaturated instead of letting requests pile up.
+    """
+
+    def __init__(self, config: AnalyzerConfig = None, max_workers: int = None,
+                 max_queue: int = None, timeout: float = None):
+        self.max_workers = max_workers or int(os.environ.get("LEGAL_ANALYZER_WORKERS", min(4, os.cpu_count() or 1)))
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get("LEGAL_ANALYZER_MAX_QUEUE", self.max_workers * 2))
+        self.timeout = timeout or float(os.environ.get("LEGAL_ANALYZER_TIMEOUT", 120))
+        self.capacity = self.max_workers + self.max_queue
+
+        self._config = config or AnalyzerConfig()
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks currently running or waiting for a worker."""
+        return self._in_flight
+
+    def has_capacity(self, tasks: int = 1) -> bool:
+        """Whether `tasks` more tasks would currently be accepted."""
+        return self.capacity - self._in_flight >= tasks
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self._config, self.max_workers)
+            )
+        return self._pool
+
+    def _release(self, cleanup: Callable[[], None] = None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+        if cleanup:
+            cleanup()
+
+    async def _acquire(self, wait: float) -> bool:
+        deadline = time.monotonic() + wait
+        while not self._slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def run(self, fn: Callable, *args, timeout: float = None, cleanup: Callable[[], None] = None,
+                  wait: float = 0) -> Any:
+        """
+        Run `fn(*args)` in a worker process and await its result.
+
+        `cleanup` runs exactly once, when the task has really finished (even if the caller
+        timed out first, so temp files stay around as long as a worker needs them) or when
+        the task is never submitted. If the executor is full, a free slot is awaited for up
+        to `wait` seconds. Raises ExecutorSaturated when still full and asyncio.TimeoutError on timeout.
+        """
+        try:
+            acquired = await self._acquire(wait)
+        except asyncio.CancelledError:
+            if cleanup:
+                cleanup()
+            raise
+        if not acquired:
+            if cleanup:
+                cleanup()
+            raise ExecutorSaturated(f"All {self.max_workers} workers are busy and {self.max_queue} requests are queued")
+        with self._lock:
+            self._in_flight += 1
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._release(cleanup)
+            raise
+        future.add_done_callback(lambda _: self._release(cleanup))
+
+        # On timeout the task is cancelled if it has not started yet; a running worker cannot be interrupted
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,98 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+DEFAULT_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "legal_analyzer_profiles")
+# .prof files kept in the profile directory; older ones are deleted as new ones are saved
+DEFAULT_PROFILE_KEEP = 20
+
+# Stages of a document analysis, in order. Pages stream through load, clean, clauses and
+# ner, so those overlap; progress reports a stage when it first starts.
+ANALYSIS_STAGES = ("load", "clean", "clauses", "ner", "summary", "scoring")
+
+
+class StageTimings:
+    """
+    Time and counters per analysis stage, accumulated over spans.
+
+    Spans nest: a span's duration excludes the spans opened inside it, so the
+    stage durations add up to the time covered by spans. Streaming analysis
+    enters each stage once per page or chunk; every entry counts as a call.
+    A span must be closed before the code inside it yields to other spans'
+    owners, which holds as long as no `yield` happens inside a `with` block.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stack: List[List[float]] = [] # [started, nested seconds] per open span
+
+    @contextmanager
+    def span(self, stage: str, **counters: int) -> Iterator[Dict[str, int]]:
+        """Time the block as `stage`. Counters passed in, or added to the yielded dict, are summed per stage."""
+        record = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield counters
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            record["seconds"] += elapsed - frame[1]
+            record["calls"] += 1
+            for name, value in counters.items():
+                record[name] = record.get(name, 0) + value
+
+    def as_dict(self) -> Dict[str, Any]:
+        """{"total_ms", "stages": [{"stage", "duration_ms", "calls", <counters>}]}, ANALYSIS_STAGES first, in order."""
+        stages = []
+        order = {stage: position for position, stage in enumerate(ANALYSIS_STAGES)}
+        # sorted() is stable, so other stages keep the order they first ran in
+        for stage, record in sorted(self.stages.items(), key=lambda item: order.get(item[0], len(order))):
+            entry = {"stage": stage, "duration_ms": round(record["seconds"] * 1000, 3)}
+            entry.update((name, value) for name, value in record.items() if name != "seconds")
+            stages.append(entry)
+        return {"total_ms": round((time.perf_counter() - self.started) * 1000, 3), "stages": stages}
+
+
+def profile_report(profiler: cProfile.Profile, limit: int = 40, profile_dir: str = None,
+                   keep: int = None) -> Dict[str, Any]:
+    """
+    Save the profile as a pstats file (for snakeviz, `python -m pstats`, ...) and
+    return its path with the `limit` functions of highest cumulative time as text.
+    Only the newest `keep` .prof files of the directory are kept.
+    """
+    profile_dir = profile_dir or os.environ.get("LEGAL_ANALYZER_PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    keep = keep if keep is not None else int(os.environ.get("LEGAL_ANALYZER_PROFILE_KEEP", DEFAULT_PROFILE_KEEP))
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"analyze-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof")
+    profiler.dump_stats(path)
+    prune_profiles(profile_dir, keep)
+
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return {"path": path, "top": output.getvalue()}
+
+
+def prune_profiles(profile_dir: str, keep: int):
+    """Delete all but the `keep` most recently written .prof files in profile_dir."""
+    paths = [os.path.join(profile_dir, name) for name in os.listdir(profile_dir) if name.endswith(".prof")]
+    ages = []
+    for path in paths:
+        try:
+            ages.append((os.path.getmtime(path), path))
+        except OSError: # Pruned by another worker meanwhile
+            pass
+    for _, path in sorted(ages, reverse=True)[max(keep, 1):]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,226 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from instrumentation import ANALYSIS_STAGES
+
+DEFAULT_JOB_DB = os.path.join(tempfile.gettempdir(), "legal_analyzer_jobs.sqlite3")
+
+JOB_KINDS = ("analyze", "compare")
+# A job is queued, then running, then done or failed
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    stage TEXT,
+    document INTEGER,
+    pages INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release, with their types, for databases created before them
+_ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL"}
+
+
+class JobStore:
+    """
+    Persistent store of analysis jobs in SQLite.
+
+    API processes create and claim jobs; worker processes report progress into the
+    same database file, so every call opens its own short-lived connection. Several
+    server processes may share one file: a job is owned by the store instance that
+    claimed it, which keeps it alive with heartbeat(). Only the owner can record its
+    progress and outcome, and a job whose owner stopped heartbeating is requeued.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get("LEGAL_ANALYZER_JOB_DB", DEFAULT_JOB_DB)
+        self.owner = uuid.uuid4().hex
+        with self._connect() as conn:
+            # WAL lets status reads proceed while a worker is writing progress
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._add_missing_columns(conn)
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection):
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, column_type in _ADDED_COLUMNS.items():
+            if name not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+        if "heartbeat_at" not in columns:
+            # Jobs left running by an older server count as last seen at their last update, so they go stale and rerun
+            conn.execute("UPDATE jobs SET heartbeat_at = updated_at WHERE status = 'running'")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit; claim_next opens its own transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind: str, params: Dict[str, Any]) -> str:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}. Available: {list(JOB_KINDS)}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(params), now, now)
+            )
+        return job_id
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job as running, owned by this store, and return it (None if nothing is queued)."""
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front, so two servers sharing the file never claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, started_at = ?, updated_at = ? "
+                        "WHERE id = ?",
+                        (self.owner, now, now, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._to_dict(row)
+        job["status"] = "running"
+        return job
+
+    def report_stage(self, job_id: str, owner: str, stage: str, pages: int = 0, document: int = None):
+        """Progress of a running job, from the worker running it for `owner`."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, pages = ?, document = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (stage, pages, document, time.time(), job_id, owner)
+            )
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> bool:
+        """Record the result of a job this store owns. False if it no longer does (the job was requeued)."""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (json.dumps(result), now, now, job_id, self.owner)
+            ).rowcount == 1
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """Record the failure of a job this store owns. False if it no longer does (the job was requeued)."""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (error, now, now, job_id, self.owner)
+            ).rowcount == 1
+
+    def heartbeat(self) -> int:
+        """Mark the jobs this store is running as alive; returns how many there are."""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                (time.time(), self.owner)
+            ).rowcount
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._to_dict(row)
+        if include_result and row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        return job
+
+    def requeue_stale(self, stale_after: float) -> int:
+        """
+        Put running jobs whose owner has not sent a heartbeat for `stale_after` seconds (it
+        stopped or crashed) back in the queue. Returns how many were requeued.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, heartbeat_at = NULL, stage = NULL, pages = 0, "
+                "document = NULL, started_at = NULL, updated_at = ? WHERE status = 'running' AND heartbeat_at < ?",
+                (now, now - stale_after)
+            ).rowcount
+
+    def purge_finished(self, older_than: float) -> List[str]:
+        """Delete jobs that finished more than `older_than` seconds ago, returning their ids."""
+        cutoff = time.time() - older_than
+        with self._connect() as conn:
+            ids = [row["id"] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+            )]
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
+        return ids
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "params": json.loads(row["params"]),
+            "progress": job_progress(row["kind"], row["status"], row["stage"], row["document"], row["pages"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+
+def job_progress(kind: str, status: str, stage: str, document: int, pages: int) -> Dict[str, Any]:
+    """Current stage and the fraction of stages done; a comparison runs the stages once per document, then "compare"."""
+    stages = list(ANALYSIS_STAGES) if kind == "analyze" else \
+        [f"document{n}:{name}" for n in (1, 2) for name in ANALYSIS_STAGES] + ["compare"]
+    current = stage if kind == "analyze" or stage in (None, "compare") else f"document{document}:{stage}"
+    if status == "done":
+        fraction = 1.0
+    elif current in stages:
+        fraction = stages.index(current) / len(stages)
+    else:
+        fraction = 0.0
+    return {"stage": stage, "document": document, "pages": pages, "stages": stages, "fraction": round(fraction, 3)}
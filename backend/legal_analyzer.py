@@ -1,15 +1,61 @@
 import re
+import json
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from collections import deque
+import hashlib
 import unicodedata
 from PyPDF2 import PdfReader
 from docx import Document
 from dataclasses import dataclass, field 
-from typing import Dict, List, Tuple, Any
-import spacy
+from typing import Dict, List, Tuple, Any, Set, Iterable, Iterator, Callable
+import numpy as np
 from spacy.matcher import Matcher
+from spacy.pipeline import Sentencizer
+from spacy.strings import hash_string
 from sumy.parsers.plaintext import PlaintextParser
 from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
-from difflib import SequenceMatcher
+from sumy.summarizers.lsa import LsaSummarizer as SumyLsaSummarizer
+from similarity import TextSimilarity, SIMILARITY_BACKENDS
+from summarization import SUMMARIZERS, SUMMARIZER_CLASSES, CentroidSummarizer, choose_summarizer
+from pattern_scanner import PatternScanner
+from line_index import LineIndex
+from rule_engine import ScoringRuleEngine, DEFAULT_RULES_PATH
+import model_registry
+from analyzer_config import AnalyzerConfig
+from chunking import chunk_text
+from instrumentation import StageTimings
+from retrieval import ChunkIndex, RETRIEVAL_MODES
+
+# Pipeline components that must run for a token attribute used in matcher patterns to be set.
+# Components missing from the loaded pipeline are simply ignored.
+PIPELINE_COMPONENTS_FOR_ATTR = {
+    "POS": ("tok2vec", "tagger", "attribute_ruler"),
+    "TAG": ("tok2vec", "tagger"),
+    "MORPH": ("tok2vec", "tagger", "morphologizer", "attribute_ruler"),
+    "LEMMA": ("tok2vec", "tagger", "attribute_ruler", "lemmatizer"),
+    "DEP": ("tok2vec", "parser"),
+    "HEAD": ("tok2vec", "parser"),
+    "SENT_START": ("tok2vec", "parser"),
+    "IS_SENT_START": ("tok2vec", "parser"),
+    "ENT_TYPE": ("ner",),
+    "ENT_IOB": ("ner",),
+    "ENT_ID": ("ner",),
+}
+# doc.ents is always consumed by extract_entities
+ENTITY_COMPONENTS = ("ner",)
+
+PIPELINE_MODES = ("trimmed", "full")
+
+# Whitespace-trimmed text that does not cross a blank line
+_PARAGRAPH_PART = re.compile(r'\S+(?:(?:(?!\n[ \t]*\n)\s)+\S+)*')
+
+# Formats load_document reads
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# Bump when a code change alters analysis output, so cached results are not reused
+ANALYSIS_VERSION = 2
 
  # Update the ComparisonResult dataclass to include new fields
 @dataclass
@@ -21,6 +67,10 @@ class AnalysisResult:
     statistics: Dict[str, int] = field(default_factory=dict)
     cleaned_text: str = ""
     signing_recommendation: Dict[str, Any] = field(default_factory=dict)
+    line_starts: List[int] = field(default_factory=list) # Offset of each line in cleaned_text, see LineIndex
+    nlp_components: List[str] = field(default_factory=list) # spaCy components that ran in extract_entities
+    pages: List[Dict[str, int]] = field(default_factory=list) # {page_number, start, end} of each non-empty page in cleaned_text
+    summarizer: str = "" # Summarizer backend that produced `summary`
 
 @dataclass
 class ComparisonResult:
@@ -42,21 +92,104 @@ class AnalysisResult:
     statistics: Dict[str, int] = field(default_factory=dict)
     cleaned_text: str = ""
     signing_recommendation: Dict[str, Any] = field(default_factory=dict)
+    line_starts: List[int] = field(default_factory=list) # Offset of each line in cleaned_text, see LineIndex
+    nlp_components: List[str] = field(default_factory=list) # spaCy components that ran in extract_entities
+    pages: List[Dict[str, int]] = field(default_factory=list) # {page_number, start, end} of each non-empty page in cleaned_text
+    summarizer: str = "" # Summarizer backend that produced `summary`
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Raw text of pages [start, stop) of a PDF; runs in a worker process for parallel extraction."""
+    with open(file_path, 'rb') as file:
+        reader = PdfReader(file)
+        return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+class _StreamedDocument:
+    """
+    Per-document state while its pages stream through analysis: each page is clause-scanned
+    and fed to spaCy in chunks before the next one is read, and the full text is joined only once.
+    """
+
+    def __init__(self, analyzer: "LegalDocumentAnalyzer", file_path: str,
+                 progress: Callable[[str, int], None] = None, timings: StageTimings = None):
+        self.analyzer = analyzer
+        self.file_path = file_path
+        self.progress = progress
+        self.timings = timings or StageTimings()
+        self.page_texts: List[str] = []
+        self.pages: List[Dict[str, int]] = []
+        self.line_starts: List[int] = []
+        self.clauses = {name: [] for name in analyzer.legal_clauses}
+        self.entity_spans: List[Tuple[str, int, int]] = []
+        self.matcher_spans: List[Tuple[str, int, int]] = []
+        self.sentence_spans: List[Tuple[int, int]] = []
+        self.error: str = None
+
+    def report(self, stage: str):
+        if self.progress:
+            self.progress(stage, len(self.page_texts))
+
+    def segments(self) -> Iterator[Tuple[int, str]]:
+        """(offset, chunk) pieces of the document for spaCy, recording pages, lines and clauses on the way."""
+        analyzer = self.analyzer
+        timings = self.timings
+        offset = 0
+        self.report("load")
+        pages = analyzer.iter_pages(self.file_path)
+        while True:
+            # Spans never stay open across a yield, since other documents' segments run in between
+            with timings.span("load") as load, analyzer._timing_clean(timings):
+                page = next(pages, None)
+                if page is not None:
+                    load.update(pages=1, characters=len(page[1]))
+            if page is None:
+                break
+            page_number, page_text = page
+            if self.page_texts:
+                offset += 1 # Pages are joined with a newline
+            self.page_texts.append(page_text)
+            self.report("clean") # Pages come back from iter_pages already cleaned
+            self.pages.append({"page_number": page_number, "start": offset, "end": offset + len(page_text)})
+
+            page_lines = LineIndex(page_text)
+            first_line = len(self.line_starts)
+            self.line_starts.extend(offset + start for start in page_lines.starts)
+            # No clause pattern can match across a newline, so scanning page by page finds the same clauses
+            self.report("clauses")
+            with timings.span("clauses") as clauses:
+                for name, start, end in analyzer.clause_scanner.scan(page_text):
+                    self.clauses[name].append({
+                        "text": page_text[start:end],
+                        "positions": [offset + start, offset + end],
+                        "line_number": first_line + page_lines.line_number(start)
+                    })
+                    clauses["matches"] = clauses.get("matches", 0) + 1
+
+            self.report("ner")
+            for start, end in chunk_text(page_text, analyzer.config.nlp_chunk_size):
+                yield offset + start, page_text[start:end]
+            offset += len(page_text)
 
 class LegalDocumentAnalyzer:
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, rules_path: str = DEFAULT_RULES_PATH, config: AnalyzerConfig = None):
         self.verbose = verbose
-        try:
-            self.nlp = spacy.load("en_core_web_lg")
-            self.nlp.max_length = 10_000_000 # Increased max_length
-        except OSError:
-            raise ImportError(
-                "Please install the spaCy English model: 'python -m spacy download en_core_web_lg' "
-                "(recommended) or 'python -m spacy download en_core_web_sm')"
-            )
-
-        self.matcher = Matcher(self.nlp.vocab)
-        self._add_custom_matcher_patterns()
+        self.config = config or AnalyzerConfig()
+        if self.config.pipeline_mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode: {self.config.pipeline_mode}. Available: {list(PIPELINE_MODES)}")
+        if self.config.similarity_backend not in SIMILARITY_BACKENDS:
+            raise ValueError(f"Unknown similarity backend: {self.config.similarity_backend}. Available: {list(SIMILARITY_BACKENDS)}")
+        if self.config.summarizer not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarizer: {self.config.summarizer}. Available: {list(SUMMARIZERS)}")
+        if self.config.retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {self.config.retrieval_mode}. Available: {list(RETRIEVAL_MODES)}")
+
+        # The spaCy pipeline is loaded lazily on first use and shared per process (see model_registry)
+        self._matcher = None
+        self._sentence_segmenter = None
+        self._matcher_attrs: Set[str] = set()
+        # Set while a streamed document loads, so clean_text inside the loaders is timed as its own stage
+        self._clean_timings: StageTimings = None
+        # Started by the first large PDF and kept for the next ones (see _extract_pdf_pages_parallel)
+        self._pdf_pool: ProcessPoolExecutor = None
 
         # Increased specificity for legal clauses
         self.legal_clauses = {
@@ -72,167 +205,179 @@ class LegalDocumentAnalyzer:
             "warranty": r"warrant(?:y|ies|s)",
             "severability": r"severability"
         }
-
-        # More detailed risk patterns with potentially higher weights
-        self.risk_patterns = {
-            "unlimited_liability": {
-                "pattern": r"unlimited liability|all liability|full liability|no limitation of liability",
-                "weight": -20, # Increased impact
-                "description": "Unlimited or no limitation on liability"
-            },
-            "unilateral_changes": {
-                "pattern": r"(?:may|can|will) (?:modify|change|alter|amend) (?:at any time|without notice|in its sole discretion|unilaterally)",
-                "weight": -15, # Increased impact
-                "description": "Party has unilateral modification rights"
-            },
-            "broad_indemnification": {
-                "pattern": r"indemnif(?:y|ication) (?:against|from) any and all (?:claims|losses|damages)",
-                "weight": -12, # A broad indemnification could be a risk depending on context
-                "description": "Broad indemnification clause"
-            },
-            "automatic_renewal": {
-                "pattern": r"automatically renew(?:s|ed|al)",
-                "weight": -8,
-                "description": "Automatic renewal without clear termination notice"
-            },
-            "no_assignment_without_consent": {
-                "pattern": r"not assign(?:ed)? this agreement without.{1,50}prior (?:written )?consent",
-                "weight": -7,
-                "description": "Restriction on assignment without consent"
-            },
-            "broad_confidentiality": {
-                "pattern": r"all(?: |\b)information(?: |\b)shall be considered confidential",
-                "weight": -6,
-                "description": "Overly broad confidentiality definition"
-            },
-            "non_negotiable": {
-                "pattern": r"non-negotiable|not negotiable|as is|without recourse",
-                "weight": -10,
-                "description": "Non-negotiable terms"
-            },
-            "waiver_of_rights": {
-                "pattern": r"waive(?:s|r of) (?:right|jury trial|class action)",
-                "weight": -15,
-                "description": "Waiver of significant rights (e.g., jury trial)"
-            },
-            "perpetual_obligations": {
-                "pattern": r"(?:perpetual|eternal|indefinite|survive termination)",
-                "weight": -8,
-                "description": "Perpetual obligations after termination"
-            }
-        }
-
-        # More detailed favorable patterns with potentially higher weights
-        self.favorable_patterns = {
-            "mutual_termination": {
-                "pattern": r"(?:either|both|any) part(?:y|ies) may terminate",
-                "weight": 12, # Increased impact
-                "description": "Mutual termination rights for all parties"
-            },
-            "limited_liability": {
-                "pattern": r"liability (?:limited to|shall not exceed) (?:[$€£]\d{1,3}(?:,\d{3})*(?:\.\d{2})?|the amount of this agreement)",
-                "weight": 15, # Strong positive impact
-                "description": "Liability is clearly limited to a specific amount"
-            },
-            "reasonable_notice_period": {
-                "pattern": r"(?:notice period|notice of \d+ (?:business )?(?:day|week|month|year)s) prior to termination",
-                "weight": 8,
-                "description": "Clearly defined reasonable notice period for termination"
-            },
-            "clear_dispute_resolution": {
-                "pattern": r"dispute resolution clause|(?:binding )?arbitration|(?:mandatory )?mediation",
-                "weight": 10,
-                "description": "Clear and defined alternative dispute resolution mechanism"
-            },
-            "mutual_confidentiality": {
-                "pattern": r"(?:both|all|either|respective) part(?:y|ies).{1,50}confidential(?:ity)? obligations",
-                "weight": 7,
-                "description": "Mutual confidentiality obligations"
-            },
-            "governing_law_defined": {
-                "pattern": r"governed by and construed in accordance with the laws of (?:the State of )?[A-Za-z ]+",
-                "weight": 8,
-                "description": "Clearly defined governing law and jurisdiction"
-            },
-            "right_to_cure": {
-                "pattern": r"(?:right to cure|opportunity to cure) (?:breach)?",
-                "weight": 7,
-                "description": "Opportunity to cure breaches before termination"
-            }
+        # All clause patterns are compiled once and scanned in a single pass
+        self.clause_scanner = PatternScanner(self.legal_clauses)
+
+        # Risk and favorable scoring rules live in a data file (see scoring_rules.json)
+        # and are compiled into a single scanner once per analyzer
+        self.rule_engine = ScoringRuleEngine.from_file(rules_path)
+        self.risk_patterns = self.rule_engine.risk_patterns
+        self.favorable_patterns = self.rule_engine.favorable_patterns
+
+    @property
+    def nlp(self):
+        return model_registry.get_model(self.config.model_name)
+
+    @property
+    def matcher(self) -> Matcher:
+        if self._matcher is None:
+            self._matcher = Matcher(self.nlp.vocab)
+            self._add_custom_matcher_patterns()
+        return self._matcher
+
+    @property
+    def sentence_segmenter(self):
+        """
+        Sets sentence boundaries on docs whose pipeline run did not (the parser is skipped in
+        trimmed mode): the model's own senter if it ships one, a punctuation-based sentencizer otherwise.
+        """
+        if self._sentence_segmenter is None:
+            if "senter" in self.nlp.component_names:
+                self._sentence_segmenter = self.nlp.get_pipe("senter")
+            else:
+                self._sentence_segmenter = Sentencizer()
+        return self._sentence_segmenter
+
+    def required_components(self) -> List[str]:
+        """Loaded pipeline components needed for doc.ents and the attributes used by the matcher."""
+        required = set(ENTITY_COMPONENTS)
+        self.matcher # Make sure the pattern attributes have been collected
+        for attr in self._matcher_attrs:
+            required.update(PIPELINE_COMPONENTS_FOR_ATTR.get(attr, ()))
+        return [name for name in self.nlp.pipe_names if name in required]
+
+    def disabled_components(self) -> List[str]:
+        """Components skipped by extract_entities in the current pipeline mode."""
+        if self.config.pipeline_mode == "full":
+            return []
+        required = self.required_components()
+        return [name for name in self.nlp.pipe_names if name not in required]
+
+    def active_components(self) -> List[str]:
+        """Components that run in extract_entities in the current pipeline mode."""
+        disabled = self.disabled_components()
+        return [name for name in self.nlp.pipe_names if name not in disabled]
+
+    def fingerprint(self) -> str:
+        """Short hash of every setting that affects analysis output, used in cache keys."""
+        settings = {
+            "analysis_version": ANALYSIS_VERSION,
+            "model": self.config.model_name,
+            "pipeline_mode": self.config.pipeline_mode,
+            "nlp_chunk_size": self.config.nlp_chunk_size,
+            "summarizer": self.config.summarizer,
+            "summary_max_sentences": self.config.summary_max_sentences,
+            "summary_budget_ms": self.config.summary_budget_ms,
+            "clauses": self.legal_clauses,
+            "rules_version": self.rule_engine.version,
+            "risk_patterns": self.risk_patterns,
+            "favorable_patterns": self.favorable_patterns,
         }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
 
     def print_debug(self, message: str):
         if self.verbose:
             print(f"[DEBUG] {message}")
 
+    def _add_matcher_pattern(self, label: str, patterns: List[List[Dict[str, Any]]]):
+        # Remember which token attributes the patterns rely on, so the pipeline can be trimmed to match
+        for pattern in patterns:
+            for token_spec in pattern:
+                self._matcher_attrs.update(key.upper() for key in token_spec if key not in ("OP",))
+        self._matcher.add(label, patterns)
+
     def _add_custom_matcher_patterns(self):
         # Define patterns for common legal entities that spaCy might miss or misclassify.
         # These patterns are designed to be more specific to legal contexts.
 
         # --- Document Identifiers ---
-        self.matcher.add("LEGAL_DOC_TYPE", [[{"LOWER": "this"}, {"LOWER": {"IN": ["agreement", "contract", "memorandum", "indenture", "deed"]}}]])
-        self.matcher.add("CONTRACT_TITLE", [[{"POS": "PROPN", "OP": "*"}, {"LOWER": "agreement"}],
+        self._add_matcher_pattern("LEGAL_DOC_TYPE", [[{"LOWER": "this"}, {"LOWER": {"IN": ["agreement", "contract", "memorandum", "indenture", "deed"]}}]])
+        self._add_matcher_pattern("CONTRACT_TITLE", [[{"POS": "PROPN", "OP": "*"}, {"LOWER": "agreement"}],
                                              [{"POS": "PROPN", "OP": "*"}, {"LOWER": "contract"}],
                                              [{"IS_TITLE": True, "OP": "+"}, {"LOWER": {"IN": ["agreement", "contract"]}}]]) # e.g. "Software License Agreement"
 
         # --- Parties to the Agreement ---
-        self.matcher.add("LEGAL_PARTY_ROLE", [
+        self._add_matcher_pattern("LEGAL_PARTY_ROLE", [
             [{"LOWER": {"IN": ["client", "contractor", "vendor", "licensor", "licensee", "supplier", "grantor", "grantee", "employer", "employee", "customer"]}}],
             [{"LOWER": "party"}, {"TEXT": {"REGEX": "[A-Z]"}}], # e.g., "Party A", "Party B"
             [{"LOWER": "parties"}],
             [{"LOWER": "the"}, {"LOWER": {"IN": ["undersigned", "company", "corporation", "inc.", "llc", "ltd.", "llp", "pte ltd", "plc", "gmbh", "ag", "sa", "co.", "inc"]}}] # Added more common suffixes
         ])
         # Add a pattern for specific company names that aren't picked up by ORG
-        self.matcher.add("COMPANY_NAME_PAT", [[{"POS": "PROPN", "OP": "+"}, {"LOWER": {"IN": ["inc.", "llc", "corp.", "ltd.", "co."]}}]])
+        self._add_matcher_pattern("COMPANY_NAME_PAT", [[{"POS": "PROPN", "OP": "+"}, {"LOWER": {"IN": ["inc.", "llc", "corp.", "ltd.", "co."]}}]])
 
 
         # --- Dates and Durations ---
-        self.matcher.add("EFFECTIVE_DATE", [[{"LOWER": "effective"}, {"LOWER": "as"}, {"LOWER": "of"}, {"ENT_TYPE": "DATE"}]])
-        self.matcher.add("AGREEMENT_DATE", [[{"LOWER": "date"}, {"LOWER": "of"}, {"LOWER": "this"}, {"LOWER": "agreement"}, {"IS_PUNCT": False, "OP": "*"}, {"ENT_TYPE": "DATE"}]])
-        self.matcher.add("LEGAL_DURATION", [[{"ENT_TYPE": "CARDINAL"}, {"LOWER": {"IN": ["day", "days", "week", "weeks", "month", "months", "year", "years", "business days", "calendar days"]}}]])
+        self._add_matcher_pattern("EFFECTIVE_DATE", [[{"LOWER": "effective"}, {"LOWER": "as"}, {"LOWER": "of"}, {"ENT_TYPE": "DATE"}]])
+        self._add_matcher_pattern("AGREEMENT_DATE", [[{"LOWER": "date"}, {"LOWER": "of"}, {"LOWER": "this"}, {"LOWER": "agreement"}, {"IS_PUNCT": False, "OP": "*"}, {"ENT_TYPE": "DATE"}]])
+        self._add_matcher_pattern("LEGAL_DURATION", [[{"ENT_TYPE": "CARDINAL"}, {"LOWER": {"IN": ["day", "days", "week", "weeks", "month", "months", "year", "years", "business days", "calendar days"]}}]])
 
         # --- Monetary Terms ---
-        self.matcher.add("LEGAL_MONEY", [
+        self._add_matcher_pattern("LEGAL_MONEY", [
             [{"TEXT": {"REGEX": r"\$|€|£|¥"}}, {"IS_DIGIT": True, "OP": "+"}, {"TEXT": ".", "OP": "?"}, {"IS_DIGIT": True, "OP": "*"}], # Currency symbol then digits
             [{"TEXT": {"REGEX": r"\d{1,3}(?:,\d{3})*(?:\.\d{2})?"}}, {"LOWER": {"IN": ["usd", "eur", "gbp", "dollars", "euros", "pounds", "yen"]}, "OP": "+"}], # Digits then currency code/word
             [{"ENT_TYPE": "CARDINAL"}, {"LOWER": {"IN": ["dollars", "euros", "pounds"]}}] # "One thousand dollars"
         ])
 
         # --- Governing Law and Jurisdiction ---
-        self.matcher.add("GOVERNING_LAW_LOC", [[{"LOWER": {"IN": ["laws", "jurisdiction"]}}, {"LOWER": "of"}, {"ENT_TYPE": "GPE"}]])
-        self.matcher.add("STATE_NAME", [[{"LOWER": "state"}, {"LOWER": "of"}, {"POS": "PROPN", "OP": "+"}]])
-        self.matcher.add("COMMONWEALTH_NAME", [[{"LOWER": "commonwealth"}, {"LOWER": "of"}, {"POS": "PROPN", "OP": "+"}]])
+        self._add_matcher_pattern("GOVERNING_LAW_LOC", [[{"LOWER": {"IN": ["laws", "jurisdiction"]}}, {"LOWER": "of"}, {"ENT_TYPE": "GPE"}]])
+        self._add_matcher_pattern("STATE_NAME", [[{"LOWER": "state"}, {"LOWER": "of"}, {"POS": "PROPN", "OP": "+"}]])
+        self._add_matcher_pattern("COMMONWEALTH_NAME", [[{"LOWER": "commonwealth"}, {"LOWER": "of"}, {"POS": "PROPN", "OP": "+"}]])
         # Broader pattern for governing law phrases
-        self.matcher.add("GOVERNING_LAW_PHRASE", [[{"LOWER": "governed"}, {"LOWER": "by"}, {"LOWER": "and"}, {"LOWER": "construed"}, {"LOWER": "in"}, {"LOWER": "accordance"}, {"LOWER": "with"}, {"LOWER": "the"}, {"LOWER": "laws"}, {"LOWER": "of"}, {"ENT_TYPE": "GPE", "OP": "*"}, {"POS": "PROPN", "OP": "+"}, {"LOWER": "state", "OP": "?"}]])
+        self._add_matcher_pattern("GOVERNING_LAW_PHRASE", [[{"LOWER": "governed"}, {"LOWER": "by"}, {"LOWER": "and"}, {"LOWER": "construed"}, {"LOWER": "in"}, {"LOWER": "accordance"}, {"LOWER": "with"}, {"LOWER": "the"}, {"LOWER": "laws"}, {"LOWER": "of"}, {"ENT_TYPE": "GPE", "OP": "*"}, {"POS": "PROPN", "OP": "+"}, {"LOWER": "state", "OP": "?"}]])
 
 
         # --- Legal Processes/Concepts (often misclassified by general NER) ---
-        self.matcher.add("LEGAL_CONCEPT", [[{"LOWER": {"IN": ["arbitration", "mediation", "litigation", "injunction", "subrogation", "negotiation", "termination", "indemnification", "confidentiality", "governing law", "jurisdiction", "amendment", "waiver", "notice", "breach", "remedies", "damages", "force majeure", "severability", "assignment", "warranty", "exclusive", "non-exclusive", "royalty", "licence"]}}]])
-        self.matcher.add("LEGAL_CONCEPT", [[{"LOWER": "limitation"}, {"LOWER": "of"}, {"LOWER": "liability"}]])
-        self.matcher.add("LEGAL_CONCEPT", [[{"LOWER": "dispute"}, {"LOWER": "resolution"}]])
-        self.matcher.add("LEGAL_CONCEPT", [[{"LOWER": "intellectual"}, {"LOWER": "property"}]])
+        self._add_matcher_pattern("LEGAL_CONCEPT", [[{"LOWER": {"IN": ["arbitration", "mediation", "litigation", "injunction", "subrogation", "negotiation", "termination", "indemnification", "confidentiality", "governing law", "jurisdiction", "amendment", "waiver", "notice", "breach", "remedies", "damages", "force majeure", "severability", "assignment", "warranty", "exclusive", "non-exclusive", "royalty", "licence"]}}]])
+        self._add_matcher_pattern("LEGAL_CONCEPT", [[{"LOWER": "limitation"}, {"LOWER": "of"}, {"LOWER": "liability"}]])
+        self._add_matcher_pattern("LEGAL_CONCEPT", [[{"LOWER": "dispute"}, {"LOWER": "resolution"}]])
+        self._add_matcher_pattern("LEGAL_CONCEPT", [[{"LOWER": "intellectual"}, {"LOWER": "property"}]])
 
 
+    @contextmanager
+    def _timing_clean(self, timings: StageTimings):
+        self._clean_timings = timings
+        try:
+            yield
+        finally:
+            self._clean_timings = None
+
     def clean_text(self, text: str) -> str:
-        replacements = {
-            'Ɵ': 't', 'Ʃ': 's', 'ƚ': 'l', 'ƭ': 't',
-            'ﬁ': 'fi', 'ﬂ': 'fl', 'ﬀ': 'ff', 'ﬃ': 'ffi',
-            'conﬁdenƟal': 'confidential',
-            'Terminaton': 'Termination',
-            'Compensa ton': 'Compensation',
-            'informa ton': 'information',
-            'arbitra ton': 'arbitration',
-            'Arbitra': 'Arbitration'
-        }
-        for bad_char, good_char in replacements.items():
-            text = text.replace(bad_char, good_char)
-        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
+        if self._clean_timings is not None:
+            with self._clean_timings.span("clean", characters=len(text)):
+                return self._clean_text(text)
+        return self._clean_text(text)
+
+    # Ligature and OCR fixes applied by clean_text, in order (later entries see the output of earlier ones)
+    _TEXT_REPLACEMENTS = (
+        ('Ɵ', 't'), ('Ʃ', 's'), ('ƚ', 'l'), ('ƭ', 't'),
+        ('ﬁ', 'fi'), ('ﬂ', 'fl'), ('ﬀ', 'ff'), ('ﬃ', 'ffi'),
+        ('conﬁdenƟal', 'confidential'),
+        ('Terminaton', 'Termination'),
+        ('Compensa ton', 'Compensation'),
+        ('informa ton', 'information'),
+        ('arbitra ton', 'arbitration'),
+        ('Arbitra', 'Arbitration'),
+    )
+    # Runs of spaces/tabs that differ from a single space, and runs of three or more newlines
+    _SPACE_RUNS = re.compile(r'\t[ \t]*| [ \t]+')
+    _NEWLINE_RUNS = re.compile(r'\n{3,}')
+
+    def _clean_text(self, text: str) -> str:
+        # Each step only copies the text when it actually has something to change
+        for bad_char, good_char in self._TEXT_REPLACEMENTS:
+            if bad_char in text:
+                text = text.replace(bad_char, good_char)
+        if not text.isascii():
+            text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
 
         # Replace multiple spaces with a single space, but preserve newlines.
-        text = re.sub(r'[ \t]+', ' ', text) # Replace multiple spaces/tabs with single space
-        text = re.sub(r'\n{2,}', '\n\n', text).strip() # Reduce multiple newlines to max two for paragraphs
+        if '\t' in text or '  ' in text:
+            text = self._SPACE_RUNS.sub(' ', text)
+        if '\n\n\n' in text:
+            text = self._NEWLINE_RUNS.sub('\n\n', text) # Reduce multiple newlines to max two for paragraphs
 
-        return text
+        return text.strip()
 
     def load_document(self, file_path: str) -> str:
         if file_path.endswith('.pdf'):
@@ -242,18 +387,75 @@ class LegalDocumentAnalyzer:
         else:
             return self._load_text(file_path)
 
-    def _load_pdf(self, file_path: str) -> str:
-        text = ""
+    def iter_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (page_number, cleaned_text) for each non-empty page of the document.
+        PDFs are read one page at a time; other formats are a single page.
+        """
+        if file_path.endswith('.pdf'):
+            yield from self.iter_pdf_pages(file_path)
+        else:
+            yield 1, self.load_document(file_path)
+
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
         try:
             with open(file_path, 'rb') as file:
                 reader = PdfReader(file)
-                for page in reader.pages:
-                    page_text = page.extract_text()
+                page_count = len(reader.pages)
+                if self.config.pdf_workers > 1 and page_count >= self.config.pdf_parallel_min_pages:
+                    raw_pages = self._extract_pdf_pages_parallel(file_path, page_count)
+                else:
+                    raw_pages = (page.extract_text() for page in reader.pages)
+                for page_number, page_text in enumerate(raw_pages, start=1):
                     if page_text:
-                        text += page_text + "\n"
+                        page_text = self.clean_text(page_text)
+                    if page_text:
+                        yield page_number, page_text
         except Exception as e:
             raise ValueError(f"Error reading PDF: {str(e)}")
-        return self.clean_text(text)
+
+    def _extract_pdf_pages_parallel(self, file_path: str, page_count: int) -> Iterator[str]:
+        """
+        Extract page texts across `pdf_workers` processes, yielding them in page order. The
+        processes start with the first large PDF and are reused for later ones. Only about
+        `pdf_workers` shards are submitted at a time, so memory stays flat however long the
+        PDF is, and shards not yet started are cancelled if the caller stops early.
+        """
+        workers = self.config.pdf_workers
+        # Several shards per worker keeps the workers busy when some pages are much slower than others
+        shard_size = max(1, -(-page_count // (workers * 4)))
+        shards = iter(range(0, page_count, shard_size))
+        self.print_debug(f"Extracting {page_count} PDF pages with {workers} workers in shards of {shard_size}")
+
+        if self._pdf_pool is None:
+            self._pdf_pool = ProcessPoolExecutor(max_workers=workers)
+        pool = self._pdf_pool
+        pending = deque()
+
+        def submit_next():
+            start = next(shards, None)
+            if start is not None:
+                pending.append(pool.submit(_extract_pdf_pages, file_path, start, min(start + shard_size, page_count)))
+
+        try:
+            for _ in range(workers):
+                submit_next()
+            while pending:
+                shard = pending.popleft().result()
+                submit_next()
+                yield from shard
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool; start a fresh one for the next PDF
+            self._pdf_pool = None
+            raise
+        finally:
+            # After an early exit, drop shards nobody will read; the pool stays up for the next PDF
+            for future in pending:
+                future.cancel()
+
+    def _load_pdf(self, file_path: str) -> str:
+        # Pages are cleaned individually and joined once, instead of growing one string page by page
+        return "\n".join(page_text for _, page_text in self.iter_pdf_pages(file_path))
 
     def _load_docx(self, file_path: str) -> str:
         try:
@@ -270,37 +472,107 @@ class LegalDocumentAnalyzer:
         except Exception as e:
             raise ValueError(f"Error reading text file: {str(e)}")
 
-    def identify_clauses(self, text: str) -> Dict[str, List[Dict[str, Any]]]:
-        found_clauses = {}
-        
-        for name, pattern in self.legal_clauses.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            clause_matches = []
-            for match in matches:
-                # Calculate line number
-                line_number = text.count('\n', 0, match.start()) + 1
-                clause_matches.append({
-                    "text": match.group(),
-                    "positions": [match.start(), match.end()],
-                    "line_number": line_number
-                })
-            # Sort by line number for consistent output
-            found_clauses[name] = sorted(clause_matches, key=lambda x: x['line_number'])
+    def identify_clauses(self, text: str, line_index: LineIndex = None) -> Dict[str, List[Dict[str, Any]]]:
+        found_clauses = {name: [] for name in self.legal_clauses}
+        if line_index is None:
+            line_index = LineIndex(text)
+
+        # Matches come back in document order, so each list is already sorted by line number
+        for name, start, end in self.clause_scanner.scan(text):
+            found_clauses[name].append({
+                "text": text[start:end],
+                "positions": [start, end],
+                "line_number": line_index.line_number(start)
+            })
         return found_clauses
 
 
-    def extract_entities(self, text: str) -> Dict[str, List[str]]:
-        doc = self.nlp(text)
-        temp_entities = {}
+    def find_entity_spans(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Run NER and the custom matcher over the text in paragraph-aligned chunks.
 
-        for ent in doc.ents:
-            temp_entities.setdefault(ent.label_, []).append(ent.text)
+        Returns (label, start, end) for every entity and matcher span, with offsets
+        into the full text: NER entities first, then matcher spans, each in document order.
+        """
+        return self.find_entity_spans_in_segments(
+            (start, text[start:end]) for start, end in chunk_text(text, self.config.nlp_chunk_size)
+        )
 
-        matches = self.matcher(doc)
-        for match_id, start, end in matches:
+    def find_entity_spans_in_segments(self, segments: Iterable[Tuple[int, str]],
+                                      sentence_spans: List[Tuple[int, int]] = None) -> List[Tuple[str, int, int]]:
+        """
+        Like find_entity_spans, for (offset, text) segments of a document.
+        `segments` may be a generator; it is consumed lazily as spaCy asks for more input.
+        If `sentence_spans` is given, the (start, end) offsets of every sentence are appended
+        to it, so the summarizer can reuse this pass instead of segmenting the text again.
+        """
+        entity_spans = []
+        matcher_spans = []
+        chunk_count = 0
+        # Each Doc is released as soon as its spans are collected, which bounds peak memory to one batch
+        for _, offset, doc in self._pipe((None, offset, segment) for offset, segment in segments):
+            self._collect_spans(doc, offset, entity_spans, matcher_spans, sentence_spans)
+            chunk_count += 1
+        self.print_debug(f"spaCy components run: {self.active_components()} over {chunk_count} chunk(s)")
+        return entity_spans + matcher_spans
+
+    def _pipe(self, segments: Iterable[Tuple[Any, int, str]]) -> Iterator[Tuple[Any, int, Any]]:
+        """Run the pipeline over (key, offset, text) segments, yielding (key, offset, doc) in order."""
+        keys = []
+
+        def texts():
+            for key, offset, segment in segments:
+                keys.append((key, offset))
+                yield segment
+
+        # Components are skipped per call rather than with nlp.select_pipes, because the
+        # pipeline is shared process-wide and select_pipes would change it for every caller
+        docs = self.nlp.pipe(
+            texts(),
+            batch_size=self.config.nlp_batch_size,
+            n_process=self.config.nlp_n_process,
+            disable=self.disabled_components()
+        )
+        for index, doc in enumerate(docs):
+            key, offset = keys[index]
+            keys[index] = None
+            yield key, offset, doc
+
+    def _collect_spans(self, doc, offset: int, entity_spans: List[Tuple[str, int, int]],
+                       matcher_spans: List[Tuple[str, int, int]], sentence_spans: List[Tuple[int, int]] = None):
+        for ent in doc.ents:
+            entity_spans.append((ent.label_, offset + ent.start_char, offset + ent.end_char))
+        for match_id, start, end in self.matcher(doc):
             span = doc[start:end]
-            label = self.nlp.vocab.strings[match_id]
-            temp_entities.setdefault(label, []).append(span.text)
+            matcher_spans.append((self.nlp.vocab.strings[match_id], offset + span.start_char, offset + span.end_char))
+        if sentence_spans is not None:
+            sentence_spans.extend((offset + start, offset + end) for start, end in self._sentence_offsets(doc))
+
+    def _sentence_offsets(self, doc) -> Iterator[Tuple[int, int]]:
+        if not doc.has_annotation("SENT_START"):
+            doc = self.sentence_segmenter(doc)
+        text = doc.text # Rebuilt from the tokens on every access
+        for sent in doc.sents:
+            # A blank line always ends a sentence, as in sumy's plaintext parser
+            for part in _PARAGRAPH_PART.finditer(text, sent.start_char, sent.end_char):
+                yield part.start(), part.end()
+
+    def split_sentences(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of the sentences in text, segmented chunk by chunk."""
+        spans = []
+        for chunk_start, chunk_end in chunk_text(text, self.config.nlp_chunk_size):
+            doc = self.nlp.make_doc(text[chunk_start:chunk_end])
+            spans.extend((chunk_start + start, chunk_start + end) for start, end in self._sentence_offsets(doc))
+        return spans
+
+    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+        return self.entities_from_spans(text, self.find_entity_spans(text))
+
+    def entities_from_spans(self, text: str, spans: List[Tuple[str, int, int]]) -> Dict[str, List[str]]:
+        """Group and filter raw NER/matcher spans into the legal entity categories."""
+        temp_entities = {}
+        for label, start, end in spans:
+            temp_entities.setdefault(label, []).append(text[start:end])
 
         final_entities: Dict[str, List[str]] = {
             "CONTRACT_PARTIES": [],
@@ -466,11 +738,73 @@ class LegalDocumentAnalyzer:
         return final_cleaned_entities
 
 
-    def summarize_text(self, text: str, sentences_count: int = 3) -> str:
-        parser = PlaintextParser.from_string(text, Tokenizer("english"))
-        summarizer = LsaSummarizer()
-        summary = summarizer(parser.document, sentences_count)
-        return " ".join(str(sentence) for sentence in summary)
+    def summarize_text(self, text: str, sentences_count: int = 3, sentence_spans: List[Tuple[int, int]] = None,
+                       summarizer: str = None, budget_ms: float = None) -> str:
+        return self.summarize(text, sentences_count, sentence_spans, summarizer, budget_ms)[0]
+
+    def summarize(self, text: str, sentences_count: int = 3, sentence_spans: List[Tuple[int, int]] = None,
+                  summarizer: str = None, budget_ms: float = None) -> Tuple[str, str]:
+        """
+        Extractive summary of text, returned with the name of the summarizer used.
+
+        `summarizer` picks a backend from SUMMARIZERS. Without one, a latency budget in
+        milliseconds (`budget_ms`, else the configured one) picks the best backend expected
+        to fit it, and with no budget either the configured summarizer is used.
+        `sentence_spans` are sentence offsets from an earlier spaCy pass (see
+        find_entity_spans_in_segments); without them the text is segmented here.
+        """
+        if summarizer is None and budget_ms is None:
+            budget_ms = self.config.summary_budget_ms
+        if summarizer is None and budget_ms is None:
+            summarizer = self.config.summarizer
+        if summarizer is not None and summarizer not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarizer: {summarizer}. Available: {list(SUMMARIZERS)}")
+
+        if summarizer == "sumy":
+            parser = PlaintextParser.from_string(text, Tokenizer("english"))
+            summary = SumyLsaSummarizer()(parser.document, sentences_count)
+            return " ".join(str(sentence) for sentence in summary), summarizer
+
+        if sentence_spans is None:
+            sentence_spans = self.split_sentences(text)
+        if summarizer is None:
+            summarizer = choose_summarizer(budget_ms, len(sentence_spans), self.config.summary_max_sentences)
+            self.print_debug(f"Summarizer for {len(sentence_spans)} sentences within {budget_ms} ms: {summarizer}")
+
+        sentences = [text[start:end] for start, end in sentence_spans]
+        # Section leads and sentences mentioning a clause are preferred when the document has to be pre-filtered
+        priority = [
+            not text[text.rfind('\n', 0, start) + 1:start].strip() or
+            next(self.clause_scanner.scan(sentence), None) is not None
+            for (start, _), sentence in zip(sentence_spans, sentences)
+        ]
+        if summarizer == "centroid":
+            # Use the model's word vectors when it has them (e.g. en_core_web_lg), TF-IDF otherwise
+            vectorize = self._sentence_vectors if self.nlp.vocab.vectors_length else None
+            engine = CentroidSummarizer(max_sentences=self.config.summary_max_sentences, vectorize=vectorize)
+        else:
+            engine = SUMMARIZER_CLASSES[summarizer](max_sentences=self.config.summary_max_sentences)
+        best = engine(sentences, sentences_count, priority)
+        return " ".join(" ".join(sentences[index].split()) for index in best), summarizer
+
+    def _sentence_vectors(self, sentences: List[str]) -> list:
+        # Averages the static word vectors of each sentence; only the tokenizer runs
+        return [self.nlp.make_doc(sentence).vector for sentence in sentences]
+
+    def build_chunk_index(self, text: str) -> ChunkIndex:
+        """Retrieval index over the paragraphs of text, for answering questions about it (see retrieval.py)."""
+        use_vectors = self.config.retrieval_mode == "hybrid" and self.nlp.vocab.vectors_length
+        return ChunkIndex.build(text, max_chars=self.config.retrieval_chunk_chars,
+                                word_vectors=self._word_vectors if use_vectors else None)
+
+    def _word_vectors(self, words: List[str]) -> np.ndarray:
+        # Looked up by hash in the vectors table, so unseen words are not added to the vocab
+        vectors = self.nlp.vocab.vectors
+        rows = vectors.find(keys=[hash_string(word) for word in words])
+        table = np.zeros((len(words), vectors.shape[1]), dtype=np.float32)
+        found = rows >= 0
+        table[found] = vectors.data[rows[found]]
+        return table
 
     def calculate_signing_recommendation(self, text: str, clause_data: Dict[str, Any], extracted_entities: Dict[str, List[str]]) -> Dict[str, Any]:
         # Start with a neutral base score
@@ -482,35 +816,11 @@ class LegalDocumentAnalyzer:
             "risk_factors": []
         }
 
-        # Factor 1: Risk Patterns
-        for name, risk_info in self.risk_patterns.items():
-            matches = list(re.finditer(risk_info["pattern"], text, re.IGNORECASE))
-            if matches:
-                # Apply weight based on number of matches, but cap impact
-                impact = risk_info["weight"] * min(len(matches), 3) # Cap impact for multiple occurrences
-                score += impact
-                findings["risk_factors"].append({
-                    "type": name,
-                    "description": risk_info["description"],
-                    "weight": impact,
-                    "matches": len(matches),
-                    "examples": [text[max(0, m.start()-50):min(len(text), m.end()+50)] for m in matches[:2]]
-                })
-
-        # Factor 2: Favorable Patterns
-        for name, favorable_info in self.favorable_patterns.items():
-            matches = list(re.finditer(favorable_info["pattern"], text, re.IGNORECASE))
-            if matches:
-                # Apply weight based on number of matches, but cap impact
-                impact = favorable_info["weight"] * min(len(matches), 3) # Cap impact for multiple occurrences
-                score += impact
-                findings["favorable_factors"].append({
-                    "type": name,
-                    "description": favorable_info["description"],
-                    "weight": impact,
-                    "matches": len(matches),
-                    "examples": [text[max(0, m.start()-50):min(len(text), m.end()+50)] for m in matches[:2]]
-                })
+        # Factor 1 & 2: Risk and Favorable Patterns, evaluated in one pass over the text
+        pattern_impact, pattern_findings = self.rule_engine.evaluate(text)
+        score += pattern_impact
+        findings["risk_factors"].extend(pattern_findings["risk_factors"])
+        findings["favorable_factors"].extend(pattern_findings["favorable_factors"])
 
         # Factor 3: Presence/Absence of Key Clauses (from `identify_clauses`)
         critical_clauses = {
@@ -608,23 +918,114 @@ class LegalDocumentAnalyzer:
             "missing_clauses": missing_clauses
         }
 
-    def analyze(self, file_path: str) -> AnalysisResult:
-        raw_text = self.load_document(file_path)
+    def analyze(self, file_path: str, summarizer: str = None, summary_budget_ms: float = None,
+                progress: Callable[[str, int], None] = None, timings: StageTimings = None) -> AnalysisResult:
+        """
+        Full analysis of one document. `summarizer` / `summary_budget_ms` override the
+        configured summarization for this call (see summarize). `progress(stage, pages_read)`
+        is called as each stage of job_store.ANALYSIS_STAGES starts, and again for every page.
+        If `timings` is given, the time and counts of every stage are recorded in it.
+        """
+        for _, result, _ in self._analyze_documents([file_path], summarizer, summary_budget_ms,
+                                                    raise_errors=True, progress=progress, timings=timings):
+            return result
+
+    def analyze_many(self, file_paths: List[str], summarizer: str = None, summary_budget_ms: float = None,
+                     timings: StageTimings = None) -> Iterator[Tuple[str, AnalysisResult, str]]:
+        """
+        Analyze several documents with a single nlp.pipe call, so spaCy batches chunks across
+        documents. Yields (file_path, result, error) in input order as soon as each document is
+        done; a document that fails yields result None and the error message instead of stopping the batch.
+        `timings` records the stages of all the documents together.
+        """
+        return self._analyze_documents(file_paths, summarizer, summary_budget_ms, raise_errors=False, timings=timings)
+
+    def _analyze_documents(self, file_paths: List[str], summarizer: str, summary_budget_ms: float,
+                           raise_errors: bool, progress: Callable[[str, int], None] = None,
+                           timings: StageTimings = None) -> Iterator[Tuple[str, AnalysisResult, str]]:
+        timings = timings or StageTimings()
+        documents = [_StreamedDocument(self, file_path, progress, timings) for file_path in file_paths]
+
+        def segments():
+            for index, document in enumerate(documents):
+                try:
+                    for offset, segment in document.segments():
+                        yield index, offset, segment
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    document.error = str(e)
+
+        def finish(document: _StreamedDocument):
+            if document.error is None:
+                try:
+                    return document.file_path, self._finish_analysis(document, summarizer, summary_budget_ms), None
+                except Exception as e:
+                    if raise_errors:
+                        raise
+                    document.error = str(e)
+            return document.file_path, None, document.error
+
+        finished = 0
+        chunk_count = 0
+        docs = self._pipe(segments())
+        while True:
+            # Reading pages for the next chunks happens inside this span, but is timed as its own stages
+            with timings.span("ner") as ner:
+                item = next(docs, None)
+                if item is not None:
+                    index, offset, doc = item
+                    document = documents[index]
+                    self._collect_spans(doc, offset, document.entity_spans, document.matcher_spans,
+                                        document.sentence_spans)
+                    ner.update(chunks=1, tokens=len(doc))
+            if item is None:
+                break
+            chunk_count += 1
+            # Segments arrive in document order, so every document before this one is complete
+            while finished < index:
+                yield finish(documents[finished])
+                documents[finished] = None
+                finished += 1
+        self.print_debug(f"spaCy components run: {self.active_components()} over {chunk_count} chunk(s) of {len(documents)} document(s)")
+        while finished < len(documents):
+            yield finish(documents[finished])
+            documents[finished] = None
+            finished += 1
+
+    def _finish_analysis(self, document: "_StreamedDocument", summarizer: str, summary_budget_ms: float) -> AnalysisResult:
+        """Everything after the spaCy pass: entities, summary, statistics and the recommendation."""
+        clauses = document.clauses
+        raw_text = "\n".join(document.page_texts)
         cleaned_text = raw_text # Keep raw_text for line numbering based on original structure
-        clauses = self.identify_clauses(cleaned_text)
-        entities = self.extract_entities(cleaned_text) # Extract entities first
+        line_index = LineIndex.from_starts(document.line_starts or [0])
+        timings = document.timings
+        with timings.span("ner") as ner:
+            entities = self.entities_from_spans(cleaned_text, document.entity_spans + document.matcher_spans) # Extract entities first
+            ner["entities"] = sum(len(values) for values in entities.values())
+        document.report("summary")
+        with timings.span("summary", sentences=len(document.sentence_spans)):
+            summary, summarizer = self.summarize(cleaned_text, sentence_spans=document.sentence_spans,
+                                                 summarizer=summarizer, budget_ms=summary_budget_ms)
+        document.report("scoring")
+        with timings.span("scoring"):
+            # Pass extracted_entities to calculate_signing_recommendation
+            signing_recommendation = self.calculate_signing_recommendation(cleaned_text, clauses, entities)
         return AnalysisResult(
             clauses=clauses,
             entities=entities, # Pass extracted entities
-            summary=self.summarize_text(cleaned_text),
+            summary=summary,
             statistics={
                 "word_count": len(cleaned_text.split()),
                 "char_count": len(cleaned_text),
                 "paragraph_count": len(re.findall(r'\n\s*\n', raw_text)) # Use raw_text for paragraph count
             },
             cleaned_text=cleaned_text,
-            # Pass extracted_entities to calculate_signing_recommendation
-            signing_recommendation=self.calculate_signing_recommendation(cleaned_text, clauses, entities)
+            signing_recommendation=signing_recommendation,
+            line_starts=line_index.starts,
+            nlp_components=self.active_components(),
+            pages=document.pages,
+            summarizer=summarizer
         )
    
 
@@ -636,9 +1037,20 @@ class LegalDocumentAnalyzer:
         Enhanced document comparison with detailed clause and entity analysis.
         Provides actionable insights on differences between two legal documents.
         """
-        # Analyze both documents
-        result1 = self.analyze(file_path1)
-        result2 = self.analyze(file_path2)
+        # Both documents share one nlp.pipe pass, as in analyze_many; the API additionally
+        # analyzes them in separate worker processes and diffs the results with compare_results
+        (_, result1, _), (_, result2, _) = self._analyze_documents([file_path1, file_path2], None, None,
+                                                                   raise_errors=True)
+        return self.compare_results(result1, result2, file_path1, file_path2)
+
+    def compare_results(self, result1: AnalysisResult, result2: AnalysisResult,
+                        file_path1: str = "", file_path2: str = "") -> ComparisonResult:
+        """
+        Compare two documents that have already been analyzed.
+        Lets callers analyze both sides concurrently (or reuse earlier results) before diffing.
+        """
+        # One similarity engine per comparison, so repeated text pairs are only scored once
+        similarity_engine = TextSimilarity(self.config.similarity_backend)
 
         # ===== Enhanced Clause Comparison =====
         clause_diff = {}
@@ -658,7 +1070,8 @@ class LegalDocumentAnalyzer:
                 # Calculate similarity between clause texts
                 similarity = self._calculate_text_similarity(
                     " ".join(doc1_texts), 
-                    " ".join(doc2_texts)
+                    " ".join(doc2_texts),
+                    similarity_engine
                 )
             elif doc1_clauses and not doc2_clauses:
                 status = "only_in_doc1"
@@ -683,7 +1096,7 @@ class LegalDocumentAnalyzer:
                     "line_numbers": [c["line_number"] for c in doc2_clauses]
                 },
                 "analysis": self._analyze_clause_difference(
-                    clause_name, doc1_texts, doc2_texts
+                    clause_name, doc1_texts, doc2_texts, similarity_engine
                 )
             }
 
@@ -716,7 +1129,8 @@ class LegalDocumentAnalyzer:
         # ===== Enhanced Summary Comparison =====
         summary_similarity = self._calculate_text_similarity(
             result1.summary, 
-            result2.summary
+            result2.summary,
+            similarity_engine
         )
         
         summary_comp = {
@@ -787,17 +1201,14 @@ class LegalDocumentAnalyzer:
         )
 
 
-    def _calculate_text_similarity(self, text1: str, text2: str) -> float:
-        """Calculate similarity ratio between two texts using SequenceMatcher."""
-        if not text1 and not text2:
-            return 1.0
-        if not text1 or not text2:
-            return 0.0
-        return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+    def _calculate_text_similarity(self, text1: str, text2: str, similarity_engine: TextSimilarity = None) -> float:
+        """Calculate similarity ratio between two texts with the configured similarity backend."""
+        similarity_engine = similarity_engine or TextSimilarity(self.config.similarity_backend)
+        return similarity_engine(text1, text2)
 
 
     def _analyze_clause_difference(self, clause_name: str, doc1_texts: List[str], 
-                                doc2_texts: List[str]) -> str:
+                                doc2_texts: List[str], similarity_engine: TextSimilarity = None) -> str:
         """Provide human-readable analysis of clause differences."""
         if not doc1_texts and not doc2_texts:
             return "Clause absent in both documents"
@@ -813,9 +1224,11 @@ class LegalDocumentAnalyzer:
                 return f"Clause appears more frequently in Doc 1 ({count_diff} occurrence(s))"
             else:
                 # Same count, check text similarity
+                # Served from the engine's memo when called from compare_results
                 similarity = self._calculate_text_similarity(
                     " ".join(doc1_texts), 
-                    " ".join(doc2_texts)
+                    " ".join(doc2_texts),
+                    similarity_engine
                 )
                 if similarity > 0.9:
                     return "Clauses are substantially similar"
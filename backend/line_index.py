@@ -0,0 +1,43 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Tuple
+
+
+class LineIndex:
+    """
+    Maps character offsets in a document to 1-based line and column numbers.
+
+    The start offset of every line is computed once, after which any lookup is
+    a binary search instead of counting newlines from the top of the document.
+    """
+
+    def __init__(self, text: str = "", starts: List[int] = None):
+        if starts is None:
+            lines = text.split('\n')
+            starts = [0]
+            starts.extend(accumulate(len(line) + 1 for line in lines[:-1]))
+        self.starts: List[int] = starts
+
+    @classmethod
+    def from_starts(cls, starts: List[int]) -> "LineIndex":
+        """Rebuild an index from `AnalysisResult.line_starts`."""
+        return cls(starts=list(starts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line_number(self, offset: int) -> int:
+        """1-based line containing the character at `offset`."""
+        return bisect_right(self.starts, offset)
+
+    def line_col(self, offset: int) -> Tuple[int, int]:
+        """1-based (line, column) of the character at `offset`."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def line_span(self, line_number: int, text_length: int) -> Tuple[int, int]:
+        """[start, end) offsets of a 1-based line, excluding its trailing newline."""
+        start = self.starts[line_number - 1]
+        if line_number < len(self.starts):
+            return start, self.starts[line_number] - 1
+        return start, text_length
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+
+DEFAULT_URL = "http://localhost:11434"
+DEFAULT_MODEL = "llama3.2"
+DEFAULT_OPTIONS = {"temperature": 0.7, "top_p": 0.9}
+
+# Ollama answers these while it is starting up, loading a model or overloaded; worth retrying
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class LLMError(Exception):
+    """The LLM server returned an error or an unusable answer."""
+
+
+class LLMUnavailable(LLMError):
+    """The LLM server can't be reached, is busy, or the circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeout(LLMError):
+    """The LLM server stopped responding partway through."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the LLM server is down. After `failure_threshold` failed requests
+    (retries included) in a row the circuit opens and calls are refused for `reset_seconds`; then one trial call
+    is let through, which closes the circuit if it succeeds and reopens it if not.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self) -> bool:
+        """Raise LLMUnavailable while the circuit is open; True if this call is the trial call."""
+        if self.opened_at is None:
+            return False
+        remaining = self.opened_at + self.reset_seconds - time.monotonic()
+        if remaining > 0 or self._trial_running:
+            raise LLMUnavailable("The LLM server is failing; not sending requests for a while",
+                                 retry_after=max(remaining, 1))
+        self._trial_running = True
+        return True
+
+    @contextmanager
+    def attempt(self) -> Iterator[None]:
+        """
+        Guard one request. A trial that ends without record_success or record_failure
+        (cancelled, or an unexpected error) counts as neither, and lets the next call be
+        the trial instead of leaving the circuit open for good.
+        """
+        trial = self.before_call()
+        try:
+            yield
+        finally:
+            if trial:
+                self._trial_running = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class LLMStream:
+    """A streamed generation. Iterate tokens(), and always aclose() it (also when abandoned early)."""
+
+    def __init__(self, client: "OllamaClient", response: httpx.Response):
+        self._client = client
+        self._response = response
+        self._closed = False
+
+    async def tokens(self) -> AsyncIterator[str]:
+        try:
+            async for line in self._response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise LLMError(f"Ollama API error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+        except httpx.TimeoutException:
+            self._client.breaker.record_failure()
+            raise LLMTimeout("Ollama stopped sending tokens. The question might be too complex.")
+        except httpx.HTTPError as e:
+            self._client.breaker.record_failure()
+            raise LLMUnavailable(f"Lost the connection to Ollama: {e}")
+        raise LLMError("Ollama closed the stream before the answer was done")
+
+    async def aclose(self):
+        # Closing the response drops the connection, which makes Ollama stop generating
+        if not self._closed:
+            self._closed = True
+            await self._response.aclose()
+            self._client._release()
+
+
+class OllamaClient:
+    """
+    Async client for Ollama's /api/generate, shared by every LLM feature.
+
+    One httpx.AsyncClient keeps a pool of keep-alive connections. At most
+    `max_concurrency` generations run at once; further calls wait up to
+    `queue_timeout` seconds for a slot. Connection failures and
+    retryable statuses are retried `retries` times with jittered exponential
+    backoff, and a CircuitBreaker stops calls while the server keeps failing.
+    Settings default to LEGAL_ANALYZER_LLM_* environment variables.
+    """
+
+    def __init__(self, base_url: str = None, model: str = None, max_concurrency: int = None,
+                 timeout: float = None, queue_timeout: float = None, retries: int = None,
+                 backoff: float = 0.5, breaker: CircuitBreaker = None, options: Dict[str, float] = None):
+        env = os.environ.get
+        self.base_url = (base_url or env("LEGAL_ANALYZER_LLM_URL", DEFAULT_URL)).rstrip("/")
+        self.model = model or env("LEGAL_ANALYZER_LLM_MODEL", DEFAULT_MODEL)
+        self.max_concurrency = max_concurrency or int(env("LEGAL_ANALYZER_LLM_CONCURRENCY", 4))
+        self.timeout = timeout or float(env("LEGAL_ANALYZER_LLM_TIMEOUT", 60))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else \
+            float(env("LEGAL_ANALYZER_LLM_QUEUE_TIMEOUT", 30))
+        self.retries = retries if retries is not None else int(env("LEGAL_ANALYZER_LLM_RETRIES", 2))
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker(
+            int(env("LEGAL_ANALYZER_LLM_BREAKER_FAILURES", 5)), float(env("LEGAL_ANALYZER_LLM_BREAKER_RESET", 30))
+        )
+        self.options = options if options is not None else dict(DEFAULT_OPTIONS)
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created on first use so it belongs to the serving event loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                # The read timeout applies between chunks, so long streamed answers are fine as long as tokens keep coming
+                timeout=httpx.Timeout(self.timeout, connect=5),
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "consecutive_failures": self.breaker.failures,
+            "circuit_open": int(self.breaker.is_open),
+        }
+
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMUnavailable(f"All {self.max_concurrency} LLM slots are busy", retry_after=5)
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def _send(self, prompt: str, stream: bool) -> httpx.Response:
+        """POST the prompt, retrying what is worth retrying. Returns a 200 response, unread if streaming."""
+        payload = {"model": self.model, "prompt": prompt, "stream": stream, "options": self.options}
+        client = self._client()
+        for attempt in range(self.retries + 1):
+            with self.breaker.attempt():
+                try:
+                    response = await client.send(client.build_request("POST", "/api/generate", json=payload), stream=stream)
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    self.breaker.record_failure()
+                    if attempt == self.retries:
+                        raise LLMUnavailable(f"Cannot connect to Ollama at {self.base_url}. Make sure Ollama is running") from e
+                except httpx.TimeoutException as e:
+                    # The server accepted the request but didn't answer in time; retrying would double the wait
+                    self.breaker.record_failure()
+                    raise LLMTimeout("Ollama request timed out. The question might be too complex.") from e
+                except httpx.HTTPError as e:
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(f"Lost the connection to Ollama: {e}") from e
+                else:
+                    if response.status_code == 200:
+                        self.breaker.record_success()
+                        return response
+                    detail = (await response.aread()).decode(errors="replace")
+                    await response.aclose()
+                    if response.status_code not in RETRY_STATUSES:
+                        # e.g. an unknown model: the server is up, so this doesn't count against the breaker
+                        self.breaker.record_success()
+                        raise LLMError(f"Ollama API error: {detail}")
+                    self.breaker.record_failure()
+                    if attempt == self.retries:
+                        raise LLMUnavailable(f"Ollama API error: {detail}")
+            # Full jitter, so clients retrying after the same outage don't arrive together
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def generate(self, prompt: str) -> str:
+        """The complete answer to prompt."""
+        await self._acquire()
+        try:
+            response = await self._send(prompt, stream=False)
+            try:
+                answer = response.json().get("response", "").strip()
+            except ValueError:
+                raise LLMError("Ollama returned a response that is not JSON")
+        finally:
+            self._release()
+        if not answer:
+            raise LLMError("No response from Ollama. Make sure the model is loaded.")
+        return answer
+
+    async def stream(self, prompt: str) -> LLMStream:
+        """Start generating an answer to prompt; the concurrency slot is held until the stream is closed."""
+        await self._acquire()
+        try:
+            return LLMStream(self, await self._send(prompt, stream=True))
+        except BaseException:
+            self._release()
+            raise
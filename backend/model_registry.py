@@ -0,0 +1,61 @@
+import gc
+import os
+import threading
+from typing import Dict, List
+
+import spacy
+from spacy.language import Language
+
+SUPPORTED_MODELS = ("en_core_web_sm", "en_core_web_md", "en_core_web_lg")
+
+# Which pipeline to use when none is passed explicitly, e.g. LEGAL_ANALYZER_SPACY_MODEL=en_core_web_sm
+DEFAULT_MODEL = os.environ.get("LEGAL_ANALYZER_SPACY_MODEL", "en_core_web_lg")
+
+_models: Dict[str, Language] = {}
+_lock = threading.Lock()
+
+
+def get_model(model_name: str = None) -> Language:
+    """
+    Return the spaCy pipeline for `model_name`, loading it on first use.
+
+    Each pipeline is loaded at most once per process and shared by every
+    analyzer in that process.
+    """
+    model_name = model_name or DEFAULT_MODEL
+    nlp = _models.get(model_name)
+    if nlp is not None:
+        return nlp
+
+    with _lock:
+        nlp = _models.get(model_name)
+        if nlp is None:
+            try:
+                nlp = spacy.load(model_name)
+            except OSError:
+                raise ImportError(
+                    f"Please install the spaCy English model: 'python -m spacy download {model_name}' "
+                    f"(supported: {', '.join(SUPPORTED_MODELS)})"
+                )
+            nlp.max_length = 10_000_000 # Increased max_length
+            _models[model_name] = nlp
+    return nlp
+
+
+def preload(model_name: str = None) -> Language:
+    """
+    Load a pipeline in the current (parent) process before workers are forked.
+
+    The loaded objects are moved out of the garbage collector's reach so that
+    forked workers keep sharing their memory pages copy-on-write instead of
+    each touching (and therefore copying) them on the first collection.
+    """
+    nlp = get_model(model_name)
+    gc.collect()
+    gc.freeze()
+    return nlp
+
+
+def loaded_models() -> List[str]:
+    """Names of the pipelines loaded in this process."""
+    return list(_models.keys())
@@ -0,0 +1,284 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+
+def _first_chars(items) -> Optional[Set[str]]:
+    """Characters a parsed pattern can start with, or None if that cannot be bounded."""
+    if not items:
+        return None
+    op, av = items[0]
+    op = str(op)
+    if op == "LITERAL":
+        return {chr(av)}
+    if op == "IN":
+        chars = set()
+        for set_op, value in av:
+            set_op = str(set_op)
+            if set_op == "LITERAL":
+                chars.add(chr(value))
+            elif set_op == "RANGE" and value[1] - value[0] < 256:
+                chars.update(chr(c) for c in range(value[0], value[1] + 1))
+            else:
+                return None
+        return chars
+    if op == "BRANCH":
+        chars = set()
+        for branch in av[1]:
+            branch_chars = _first_chars(list(branch))
+            if branch_chars is None:
+                return None
+            chars |= branch_chars
+        return chars
+    if op == "SUBPATTERN":
+        return _first_chars(list(av[-1]))
+    if op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") and av[0] >= 1:
+        return _first_chars(list(av[2]))
+    return None
+
+
+# Zero-width items never change what a match starts with, and `match` checks them anyway
+_ZERO_WIDTH = ("AT", "ASSERT", "ASSERT_NOT")
+# A pattern whose alternatives multiply into more literal prefixes than this stops extending them
+_MAX_PREFIXES = 64
+
+
+def _prefixes(items, limit: int = _MAX_PREFIXES) -> Tuple[Set[str], bool]:
+    """
+    (prefixes, complete): literal strings every match of the parsed pattern starts with one of,
+    and whether they are the whole pattern (so whatever follows can extend them).
+    """
+    prefixes = {""}
+    for op, av in items:
+        op = str(op)
+        if op == "LITERAL":
+            prefixes = {prefix + chr(av) for prefix in prefixes}
+            continue
+        if op in _ZERO_WIDTH:
+            continue
+        if op == "SUBPATTERN" and not av[1] and not av[2]: # Scoped flags could change how literals match
+            parts, complete = _prefixes(list(av[-1]), limit)
+        elif op == "BRANCH":
+            parts, complete = set(), True
+            for branch in av[1]:
+                branch_parts, branch_complete = _prefixes(list(branch), limit)
+                parts |= branch_parts
+                complete = complete and branch_complete
+        elif op == "IN" and len(av) <= 8 and all(str(set_op) == "LITERAL" for set_op, _ in av):
+            parts, complete = {chr(value) for _, value in av}, True
+        elif op in ("MAX_REPEAT", "MIN_REPEAT") and av[:2] == (0, 1):
+            parts, complete = _prefixes(list(av[2]), limit)
+            if not complete:
+                return prefixes, False
+            parts.add("")
+        else:
+            return prefixes, False
+        if len(prefixes) * len(parts) > limit:
+            return prefixes, False
+        prefixes = {prefix + part for prefix in prefixes for part in parts}
+        if not complete:
+            return prefixes, False
+    return prefixes, True
+
+
+def literal_prefixes(pattern: str, flags: int = 0) -> Optional[List[str]]:
+    """
+    Literals every match of pattern starts with one of, shortest first and without any
+    that start with another. None if they cannot be bounded.
+    """
+    try:
+        prefixes, _ = _prefixes(list(sre_parse.parse(pattern, flags)))
+    except Exception:
+        return None
+    if "" in prefixes:
+        return None
+    minimal = []
+    for prefix in sorted(prefixes, key=lambda prefix: (len(prefix), prefix)):
+        if not any(prefix.startswith(shorter) for shorter in minimal):
+            minimal.append(prefix)
+    return minimal
+
+
+# Non-ASCII characters Python's re matches to an ASCII letter case-insensitively
+_ASCII_CASE_EQUIVALENTS = {"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"}
+
+
+def _fold_text(text: str) -> str:
+    """
+    Lowercased text in which every character re matches to an ASCII letter case-insensitively
+    is that letter, one character for one so positions line up with text.
+    """
+    if text.isascii():
+        return text.lower()
+    if "\u0130" in text:
+        text = text.replace("\u0130", "i") # Lowercases to two characters
+    text = text.lower()
+    for char, letter in _ASCII_CASE_EQUIVALENTS.items():
+        if char in text:
+            text = text.replace(char, letter)
+    return text
+
+
+def _fold_literal(literal: str) -> str:
+    """
+    A case-insensitive literal as it appears in _fold_text: lowercased and cut at its first
+    non-ASCII character, which may match characters the fold leaves alone.
+    """
+    literal = literal.lower()
+    for position, char in enumerate(literal):
+        if not char.isascii():
+            return literal[:position]
+    return literal
+
+
+def _trie_regex(literals: List[str]) -> str:
+    """Regex matching the longest of literals at a position, nested as a trie so each character is tried once."""
+    trie: Dict[str, dict] = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class PatternScanner:
+    """
+    Finds matches for many named regex patterns in a single pass over the text.
+
+    Produces exactly what running `re.finditer(pattern, text, flags)` once per
+    pattern would: every pattern is wrapped in its own capturing lookahead so
+    matches of different patterns may overlap, and matches of the same pattern
+    are kept non-overlapping, in document order.
+    """
+
+    def __init__(self, patterns: Dict[Any, str], flags: int = re.IGNORECASE):
+        self.names: List[Any] = list(patterns.keys())
+        self._groups = [f"g{i}" for i in range(len(self.names))]
+        pattern_list = list(patterns.values())
+
+        if not pattern_list:
+            self._regex = None
+            return
+
+        # The leading lookahead only lets the engine stop where at least one
+        # pattern matches, so the scan between hits stays inside the C engine.
+        gate = "(?=" + "|".join(f"(?:{p})" for p in pattern_list) + ")"
+        captures = "".join(
+            f"(?:(?=(?P<{group}>{p})))?" for group, p in zip(self._groups, pattern_list)
+        )
+        self._regex = re.compile(self._prefilter(pattern_list, flags) + gate + captures, flags)
+
+    @staticmethod
+    def _prefilter(pattern_list: List[str], flags: int) -> str:
+        """Character-class lookahead that skips positions no pattern can start at."""
+        chars: Set[str] = set()
+        for pattern in pattern_list:
+            try:
+                pattern_chars = _first_chars(list(sre_parse.parse(pattern, flags)))
+            except Exception:
+                pattern_chars = None
+            if pattern_chars is None:
+                return ""
+            chars |= pattern_chars
+        if flags & re.IGNORECASE:
+            chars |= {c.lower() for c in chars} | {c.upper() for c in chars}
+        return "(?=[" + "".join(re.escape(c) for c in sorted(chars)) + "])"
+
+    def scan(self, text: str) -> Iterator[Tuple[Any, int, int]]:
+        """Yield (name, start, end) for every match, ordered by start position."""
+        if self._regex is None:
+            return
+        last_end = [0] * len(self.names)
+        for match in self._regex.finditer(text):
+            for i, group in enumerate(self._groups):
+                start = match.start(group)
+                if start == -1 or start < last_end[i]:
+                    continue
+                end = match.end(group)
+                # Mirror finditer: an empty match must not repeat at the same spot
+                last_end[i] = end if end > start else start + 1
+                yield self.names[i], start, end
+
+
+class LiteralGatedScanner:
+    """
+    Finds matches for many named regex patterns, trying each pattern only where it can start.
+
+    Produces exactly what running `re.finditer(pattern, text, flags)` once per pattern
+    would. The literals every match of a pattern must start with are worked out up front
+    (e.g. "arbitration" and "binding arbitration" for "(?:binding )?arbitration"). One
+    pass of a trie-shaped regex of all of them over the text finds where they occur, and
+    each pattern is only tried with `match` at those positions. The cost of the pass
+    barely depends on the number of patterns. Case-insensitive scans look for the
+    literals in a lowercased copy of the text. Patterns whose literals cannot be
+    bounded use finditer.
+    """
+
+    def __init__(self, patterns: Dict[Any, str], flags: int = re.IGNORECASE):
+        self.names: List[Any] = list(patterns.keys())
+        self._regexes = [re.compile(pattern, flags) for pattern in patterns.values()]
+        self._fold = any(regex.flags & re.IGNORECASE for regex in self._regexes)
+
+        # literal -> every pattern with a literal prefix of it (itself included), as one
+        # trie match at a position stands for all the shorter literals found there too
+        literal_patterns: Dict[str, Set[int]] = {}
+        self._gated: List[bool] = []
+        for i, pattern in enumerate(patterns.values()):
+            literals = literal_prefixes(pattern, flags)
+            if literals is not None and self._fold:
+                # Folded literals of case-sensitive patterns still find every place they occur
+                literals = [_fold_literal(literal) for literal in literals]
+                if "" in literals:
+                    literals = None
+            self._gated.append(literals is not None)
+            for literal in literals or ():
+                literal_patterns.setdefault(literal, set()).add(i)
+        self._owners = {
+            literal: sorted({i for end in range(1, len(literal) + 1) for i in literal_patterns.get(literal[:end], ())})
+            for literal in literal_patterns
+        }
+        self._gate = re.compile(f"(?=({_trie_regex(list(literal_patterns))}))") if literal_patterns else None
+
+    def candidates(self, text: str) -> Optional[List[List[int]]]:
+        """Positions each gated pattern could match at, in order (None if no pattern is gated)."""
+        if self._gate is None:
+            return None
+        if self._fold:
+            text = _fold_text(text)
+        starts: List[List[int]] = [[] for _ in self.names]
+        for match in self._gate.finditer(text):
+            position = match.start()
+            for i in self._owners[match.group(1)]:
+                starts[i].append(position)
+        return starts
+
+    def scan(self, text: str) -> Iterator[Tuple[Any, int, int]]:
+        """Yield (name, start, end) for every match, pattern by pattern, each pattern's in document order."""
+        starts = self.candidates(text)
+        for i, (name, regex) in enumerate(zip(self.names, self._regexes)):
+            if starts is None or not self._gated[i]:
+                for match in regex.finditer(text):
+                    yield name, match.start(), match.end()
+                continue
+            # Matches start with a non-empty literal, so they are never empty and never overlap
+            last_end = 0
+            for start in starts[i]:
+                if start < last_end:
+                    continue
+                match = regex.match(text, start)
+                if match is not None:
+                    last_end = match.end()
+                    yield name, start, last_end
@@ -0,0 +1,194 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from nltk.stem.snowball import SnowballStemmer
+from spacy.lang.en.stop_words import STOP_WORDS
+
+from chunking import chunk_text
+
+# "hybrid" adds the spaCy model's word vectors (if it has any) to BM25
+RETRIEVAL_MODES = ("bm25", "hybrid")
+
+# Words and numbers (section numbers, amounts and dates matter in legal questions)
+_TERM = re.compile(r"[^\W_](?:[^\W_]|['-])*")
+_PARAGRAPH = re.compile(r"\S(?:.*\S)?(?:\n[ \t]*\S.*)*", re.MULTILINE)
+
+
+def text_digest(text: str) -> str:
+    """Key identifying a document text, e.g. the cleaned_text of an analysis."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def terms(text: str) -> List[str]:
+    """Lowercased words and numbers of text, without stop words."""
+    return [term for term in _TERM.findall(text.lower()) if term not in STOP_WORDS]
+
+
+_stemmer = SnowballStemmer("english")
+
+
+@lru_cache(maxsize=100_000)
+def stem(term: str) -> str:
+    """BM25 matches stems, so "terminated" finds "termination"."""
+    return _stemmer.stem(term)
+
+
+def _stems(counts: Counter) -> Counter:
+    stems = Counter()
+    for term, frequency in counts.items():
+        stems[stem(term)] += frequency
+    return stems
+
+
+def paragraph_chunks(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    [start, end) spans of whole paragraphs, merged while they fit in `max_chars`, so a
+    heading stays with the clause under it. Longer paragraphs are split with chunk_text.
+    """
+    spans = []
+    for match in _PARAGRAPH.finditer(text):
+        start, end = match.span()
+        if end - start > max_chars:
+            spans.extend((start + piece_start, start + piece_end)
+                         for piece_start, piece_end in chunk_text(text[start:end], max_chars))
+        elif spans and end - spans[-1][0] <= max_chars:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+@dataclass
+class RetrievedChunk:
+    start: int
+    end: int
+    score: float
+    text: str
+
+
+class ChunkIndex:
+    """
+    Retrieval index over the paragraph chunks of one document.
+
+    Chunks are scored with BM25 over word stems and, when word vectors are available, by cosine
+    similarity of IDF-weighted mean word vectors. Both scores are scaled to [0, 1] over
+    the chunks and added, the vector score at `vector_weight` (chunks of one document
+    all look alike to mean word vectors, so exact terms should usually win). Only vectors of the document's own terms are kept, so a
+    query is embedded without the spaCy model; query words the document never uses
+    are ignored by both scores.
+    """
+
+    def __init__(self, text: str, spans: List[Tuple[int, int]],
+                 postings: Dict[str, Tuple[np.ndarray, np.ndarray]], idf: Dict[str, float],
+                 chunk_vectors: Optional[np.ndarray] = None, term_rows: Dict[str, int] = None,
+                 term_vectors: Optional[np.ndarray] = None, vector_weight: float = 0.5):
+        self.text = text
+        self.spans = spans
+        self.postings = postings
+        self.idf = idf
+        self.chunk_vectors = chunk_vectors
+        self.term_rows = term_rows or {}
+        self.term_vectors = term_vectors
+        self.vector_weight = vector_weight
+
+    @classmethod
+    def build(cls, text: str, max_chars: int = 1000,
+              word_vectors: Callable[[Sequence[str]], np.ndarray] = None,
+              max_terms: int = 4000, k1: float = 1.5, b: float = 0.75) -> "ChunkIndex":
+        """
+        Index text. `word_vectors(words)` returns one row per word (zeros for words
+        without a vector); without it only BM25 is used. `max_terms` caps the
+        number of term vectors kept, preferring terms found in the most chunks.
+        """
+        spans = paragraph_chunks(text, max_chars)
+        chunk_terms = [Counter(terms(text[start:end])) for start, end in spans]
+        chunk_stems = [_stems(counts) for counts in chunk_terms]
+        count = len(spans)
+        lengths = np.array([sum(counts.values()) for counts in chunk_terms], dtype=float)
+        average_length = lengths.mean() if count else 0.0
+
+        # Lucene's BM25 IDF, which stays positive for terms found in most chunks
+        def inverse_frequencies(frequencies: Counter) -> Dict[str, float]:
+            return {term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+                    for term, frequency in frequencies.items()}
+
+        document_frequency = Counter(term for counts in chunk_terms for term in counts)
+        stem_idf = inverse_frequencies(Counter(term for counts in chunk_stems for term in counts))
+
+        chunk_ids: Dict[str, List[int]] = {}
+        weights: Dict[str, List[float]] = {}
+        for chunk, counts in enumerate(chunk_stems):
+            norm = k1 * (1 - b + b * lengths[chunk] / average_length) if average_length else k1
+            for term, frequency in counts.items():
+                chunk_ids.setdefault(term, []).append(chunk)
+                weights.setdefault(term, []).append(stem_idf[term] * frequency * (k1 + 1) / (frequency + norm))
+        postings = {term: (np.array(chunk_ids[term], dtype=np.int32), np.array(weights[term], dtype=np.float32))
+                    for term in chunk_ids}
+
+        # Word (not stem) IDFs weight the word vectors
+        index = cls(text, spans, postings, inverse_frequencies(document_frequency))
+        if word_vectors is not None and count:
+            vocabulary = [term for term, _ in document_frequency.most_common(max_terms)]
+            vectors = np.asarray(word_vectors(vocabulary), dtype=np.float32)
+            known = np.flatnonzero(np.abs(vectors).sum(axis=1))
+            if len(known):
+                index.term_rows = {vocabulary[row]: position for position, row in enumerate(known)}
+                index.term_vectors = vectors[known].astype(np.float16) # Half precision halves the memory kept per document
+                index.chunk_vectors = np.stack([index._embed(counts) for counts in chunk_terms])
+        return index
+
+    def _embed(self, counts: Counter) -> np.ndarray:
+        """Unit-length IDF-weighted mean of the term vectors (zeros if no term has one)."""
+        vector = np.zeros(self.term_vectors.shape[1], dtype=np.float32)
+        for term, frequency in counts.items():
+            row = self.term_rows.get(term)
+            if row is not None:
+                vector += frequency * self.idf.get(term, 1.0) * self.term_vectors[row].astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, query: str, k: int = 4, max_chars: int = None) -> List[RetrievedChunk]:
+        """
+        The `k` chunks most relevant to query, in document order. With `max_chars`, chunks
+        are taken best first only while their total length fits (the best one always does).
+        """
+        if not self.spans:
+            return []
+        query_terms = Counter(terms(query))
+        bm25 = np.zeros(len(self.spans), dtype=np.float32)
+        for term in _stems(query_terms):
+            posting = self.postings.get(term)
+            if posting is not None:
+                bm25[posting[0]] += posting[1]
+
+        scores = bm25
+        if self.chunk_vectors is not None:
+            query_vector = self._embed(query_terms)
+            if query_vector.any():
+                cosine = self.chunk_vectors @ query_vector
+                scores = _rescale(bm25) + self.vector_weight * _rescale(cosine)
+
+        ranked = np.argsort(-scores, kind="stable")
+        selected, used = [], 0
+        for chunk in ranked[:k]:
+            start, end = self.spans[chunk]
+            if selected and max_chars is not None and used + end - start > max_chars:
+                continue
+            selected.append(int(chunk))
+            used += end - start
+        return [RetrievedChunk(self.spans[chunk][0], self.spans[chunk][1], round(float(scores[chunk]), 6),
+                               self.text[self.spans[chunk][0]:self.spans[chunk][1]])
+                for chunk in sorted(selected)]
+
+
+def _rescale(scores: np.ndarray) -> np.ndarray:
+    """Min-max scale scores to [0, 1] (all zeros if they are all equal)."""
+    low, high = scores.min(), scores.max()
+    return (scores - low) / (high - low) if high > low else np.zeros_like(scores)
+
@@ -0,0 +1,75 @@
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from pattern_scanner import LiteralGatedScanner
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_rules.json")
+
+
+class ScoringRuleEngine:
+    """
+    Risk and favorable scoring rules, compiled once. Each rule's regex only runs where
+    a literal its matches start with occurs (see LiteralGatedScanner).
+
+    Rules are loaded from a JSON file with "risk_patterns" and
+    "favorable_patterns" sections, each mapping a rule name to its
+    pattern, weight and description.
+    """
+
+    def __init__(self, risk_patterns: Dict[str, Dict[str, Any]],
+                 favorable_patterns: Dict[str, Dict[str, Any]],
+                 version: Any = None, impact_cap: int = 3, max_examples: int = 2):
+        self.risk_patterns = risk_patterns
+        self.favorable_patterns = favorable_patterns
+        self.version = version
+        self.impact_cap = impact_cap
+        self.max_examples = max_examples
+
+        self._rules: List[Tuple[str, str, Dict[str, Any]]] = (
+            [("risk_factors", name, info) for name, info in risk_patterns.items()] +
+            [("favorable_factors", name, info) for name, info in favorable_patterns.items()]
+        )
+        self.scanner = LiteralGatedScanner({i: info["pattern"] for i, (_, _, info) in enumerate(self._rules)})
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_PATH, **kwargs) -> "ScoringRuleEngine":
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except Exception as e:
+            raise ValueError(f"Error reading scoring rules: {str(e)}")
+        return cls(
+            data.get("risk_patterns", {}),
+            data.get("favorable_patterns", {}),
+            version=data.get("version"),
+            **kwargs
+        )
+
+    def evaluate(self, text: str) -> Tuple[float, Dict[str, List[Dict[str, Any]]]]:
+        """Return the total score impact and the matched factors, in rule order."""
+        counts = [0] * len(self._rules)
+        spans: List[List[Tuple[int, int]]] = [[] for _ in self._rules]
+
+        for rule_id, start, end in self.scanner.scan(text):
+            counts[rule_id] += 1
+            # Only the first few matches are ever shown, so stop keeping spans after that
+            if len(spans[rule_id]) < self.max_examples:
+                spans[rule_id].append((start, end))
+
+        score = 0
+        findings: Dict[str, List[Dict[str, Any]]] = {"favorable_factors": [], "risk_factors": []}
+        for rule_id, (kind, name, info) in enumerate(self._rules):
+            if not counts[rule_id]:
+                continue
+            # Apply weight based on number of matches, but cap impact
+            impact = info["weight"] * min(counts[rule_id], self.impact_cap)
+            score += impact
+            findings[kind].append({
+                "type": name,
+                "description": info["description"],
+                "weight": impact,
+                "matches": counts[rule_id],
+                "examples": [text[max(0, start-50):min(len(text), end+50)] for start, end in spans[rule_id]]
+            })
+        return score, findings
@@ -0,0 +1,79 @@
+import re
+import zlib
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Tuple
+
+import numpy as np
+
+SIMILARITY_BACKENDS = ("auto", "sequence", "shingle", "minhash")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class TextSimilarity:
+    """
+    Pairwise text similarity in [0, 1] with a switchable backend.
+
+    - "sequence": difflib.SequenceMatcher ratio over characters (worst-case quadratic)
+    - "shingle":  Jaccard similarity of word n-gram shingles (linear)
+    - "minhash":  MinHash estimate of the shingle Jaccard similarity (linear, fixed-size signatures)
+    - "auto":     "sequence" while the pair is small enough to be cheap, "shingle" beyond that
+
+    Results are memoized per instance, so use one instance per comparison.
+    """
+
+    def __init__(self, backend: str = "auto", shingle_size: int = 3, num_perm: int = 128,
+                 auto_max_product: int = 1_000_000):
+        if backend not in SIMILARITY_BACKENDS:
+            raise ValueError(f"Unknown similarity backend: {backend}. Available: {list(SIMILARITY_BACKENDS)}")
+        self.backend = backend
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        # "auto" uses SequenceMatcher while len(text1) * len(text2) stays under this
+        self.auto_max_product = auto_max_product
+        self._cache: Dict[Tuple[str, str], float] = {}
+
+        generator = np.random.RandomState(1)
+        self._perm_a = generator.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._perm_b = generator.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def __call__(self, text1: str, text2: str) -> float:
+        if not text1 and not text2:
+            return 1.0
+        if not text1 or not text2:
+            return 0.0
+        key = (text1, text2)
+        if key not in self._cache:
+            self._cache[key] = self._compute(text1.lower(), text2.lower())
+        return self._cache[key]
+
+    def _compute(self, text1: str, text2: str) -> float:
+        backend = self.backend
+        if backend == "auto":
+            backend = "sequence" if len(text1) * len(text2) <= self.auto_max_product else "shingle"
+        if backend == "sequence":
+            return SequenceMatcher(None, text1, text2).ratio()
+
+        tokens1 = re.findall(r"\w+", text1)
+        tokens2 = re.findall(r"\w+", text2)
+        # Short texts fall back to smaller shingles so they still get a meaningful score
+        size = max(1, min(self.shingle_size, len(tokens1), len(tokens2)))
+        shingles1 = self._shingles(tokens1, size)
+        shingles2 = self._shingles(tokens2, size)
+        if not shingles1 or not shingles2:
+            return 1.0 if shingles1 == shingles2 else 0.0
+
+        if backend == "minhash":
+            return float(np.mean(self._signature(shingles1) == self._signature(shingles2)))
+        return len(shingles1 & shingles2) / len(shingles1 | shingles2)
+
+    @staticmethod
+    def _shingles(tokens, size: int) -> FrozenSet[str]:
+        return frozenset(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+    def _signature(self, shingles: FrozenSet[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # One universal hash per permutation, applied to every shingle at once
+        permuted = (np.outer(hashes, self._perm_a) + self._perm_b) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=0)
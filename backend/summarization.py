@@ -0,0 +1,242 @@
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# "sumy" runs sumy's LsaSummarizer over the whole document; the others are the extractive summarizers below
+SUMMARIZERS = ("lsa", "textrank", "centroid", "sumy")
+
+# Costs choose_summarizer budgets with, from `python benchmark.py --summarizers` (p50, Python 3.11,
+# x86-64 Linux) on 2000 sentences: there the longest sentences become the candidates, so the
+# per-candidate costs are upper bounds. Rerun it and update them when a summarizer changes.
+# Milliseconds per document sentence to split it into words and pick candidates
+PREPARE_COST_PER_SENTENCE_MS = 0.016
+
+# Same notion of a word as sumy's tokenizer: a letter followed by letters, apostrophes or hyphens
+_WORD = re.compile(r"[^\W\d_](?:[^\W\d_]|['-])*")
+
+
+def sentence_words(sentences: Sequence[str]) -> List[List[str]]:
+    """The lowercased words of each sentence, as the summarizers see them."""
+    return [_WORD.findall(sentence.lower()) for sentence in sentences]
+
+
+class ExtractiveSummarizer(ABC):
+    """
+    Base class for summarizers that pick whole sentences.
+
+    Subclasses implement `_rank`, scoring the candidate sentences. At most
+    `max_sentences` candidates are scored, preferring priority sentences
+    (section leads, clause keywords) and then longer ones, so the cost of
+    a summary stops growing with the length of the document.
+    """
+
+    # Milliseconds per candidate sentence to score it, measured as described at PREPARE_COST_PER_SENTENCE_MS
+    cost_per_sentence_ms = 0.0
+
+    def __init__(self, max_sentences: int = 400, max_terms: int = 4000):
+        self.max_sentences = max_sentences
+        self.max_terms = max_terms
+
+    def __call__(self, sentences: Sequence[str], sentences_count: int,
+                 priority: Sequence[bool] = None) -> List[int]:
+        """Indices of the `sentences_count` best sentences, in document order."""
+        words = sentence_words(sentences)
+        candidates = [index for index, sentence_words in enumerate(words) if sentence_words]
+        if len(candidates) > self.max_sentences:
+            # sorted() is stable, so earlier sentences win ties
+            ranked = sorted(
+                candidates,
+                key=lambda index: (bool(priority and priority[index]), len(set(words[index]))),
+                reverse=True
+            )
+            candidates = sorted(ranked[:self.max_sentences])
+        if not candidates:
+            return []
+
+        ranks = self._rank([words[index] for index in candidates], [sentences[index] for index in candidates])
+        best = self._select(ranks, sentences_count)
+        return sorted(candidates[column] for column in best)
+
+    @abstractmethod
+    def _rank(self, sentence_words: List[List[str]], sentences: List[str]) -> np.ndarray:
+        """A score per candidate sentence, higher is better."""
+
+    def _select(self, ranks: np.ndarray, sentences_count: int) -> List[int]:
+        return sorted(range(len(ranks)), key=lambda column: ranks[column], reverse=True)[:sentences_count]
+
+    def _vocabulary(self, sentence_words: List[List[str]]) -> Tuple[Dict[str, int], Counter]:
+        """The `max_terms` terms found in the most sentences, with their sentence counts."""
+        document_frequency = Counter(word for words in sentence_words for word in set(words))
+        vocabulary = {word: column for column, (word, _) in enumerate(document_frequency.most_common(self.max_terms))}
+        return vocabulary, document_frequency
+
+    @staticmethod
+    def _count_matrix(sentence_words: List[List[str]], vocabulary: Dict[str, int]) -> np.ndarray:
+        """Sentence×term occurrence counts."""
+        rows, columns = [], []
+        for row, words in enumerate(sentence_words):
+            for word in words:
+                column = vocabulary.get(word)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        matrix = np.zeros((len(sentence_words), len(vocabulary)))
+        np.add.at(matrix, (rows, columns), 1)
+        return matrix
+
+    def _tfidf(self, sentence_words: List[List[str]]) -> np.ndarray:
+        """L2-normalized sentence×term TF-IDF matrix."""
+        vocabulary, document_frequency = self._vocabulary(sentence_words)
+        matrix = self._count_matrix(sentence_words, vocabulary)
+        frequencies = np.array([document_frequency[word] for word in vocabulary], dtype=float)
+        matrix *= np.log((1 + len(sentence_words)) / (1 + frequencies)) + 1
+        return _normalize_rows(matrix)
+
+
+class LsaSummarizer(ExtractiveSummarizer):
+    """
+    Latent semantic analysis, ranked like sumy's LsaSummarizer: a smoothed max-TF
+    term×sentence matrix is decomposed and each sentence is scored by the norm of
+    its weighted singular vectors. Above `max_dimensions` a randomized truncated
+    SVD replaces the full one.
+    """
+
+    cost_per_sentence_ms = 0.125
+
+    def __init__(self, max_sentences: int = 400, max_terms: int = 4000, max_dimensions: int = 100,
+                 smooth: float = 0.4, seed: int = 0):
+        super().__init__(max_sentences, max_terms)
+        self.max_dimensions = max_dimensions
+        self.smooth = smooth
+        self.seed = seed
+
+    def _rank(self, sentence_words: List[List[str]], sentences: List[str]) -> np.ndarray:
+        vocabulary, _ = self._vocabulary(sentence_words)
+        matrix = self._count_matrix(sentence_words, vocabulary).T
+
+        # Max-TF normalization with smoothing, as in sumy (every cell of a non-empty column is smoothed)
+        max_frequencies = matrix.max(axis=0)
+        non_empty = max_frequencies > 0
+        matrix[:, non_empty] = self.smooth + (1.0 - self.smooth) * matrix[:, non_empty] / max_frequencies[non_empty]
+
+        if min(matrix.shape) <= self.max_dimensions:
+            _, sigma, v_matrix = np.linalg.svd(matrix, full_matrices=False)
+        else:
+            sigma, v_matrix = self._randomized_svd(matrix, self.max_dimensions)
+        return np.sqrt(((sigma[:, None] ** 2) * v_matrix ** 2).sum(axis=0))
+
+    def _randomized_svd(self, matrix: np.ndarray, rank: int, oversamples: int = 10,
+                        power_iterations: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+        """Top `rank` singular values and right singular vectors (Halko et al. range finder)."""
+        generator = np.random.default_rng(self.seed)
+        basis, _ = np.linalg.qr(matrix @ generator.standard_normal((matrix.shape[1], rank + oversamples)))
+        for _ in range(power_iterations):
+            basis, _ = np.linalg.qr(matrix.T @ basis)
+            basis, _ = np.linalg.qr(matrix @ basis)
+        _, sigma, v_matrix = np.linalg.svd(basis.T @ matrix, full_matrices=False)
+        return sigma[:rank], v_matrix[:rank]
+
+
+class TextRankSummarizer(ExtractiveSummarizer):
+    """
+    TextRank: PageRank over a graph of sentences linked by TF-IDF cosine similarity.
+    Edges weaker than `min_similarity` are dropped. The graph is a dense matrix: with
+    at most `max_sentences` candidates (400 by default) it stays around a megabyte, which
+    does not justify a sparse-matrix dependency.
+    """
+
+    cost_per_sentence_ms = 0.045
+
+    def __init__(self, max_sentences: int = 400, max_terms: int = 4000, damping: float = 0.85,
+                 min_similarity: float = 0.05, max_iterations: int = 100, tolerance: float = 1e-6):
+        super().__init__(max_sentences, max_terms)
+        self.damping = damping
+        self.min_similarity = min_similarity
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+    def _rank(self, sentence_words: List[List[str]], sentences: List[str]) -> np.ndarray:
+        vectors = self._tfidf(sentence_words)
+        graph = vectors @ vectors.T
+        np.fill_diagonal(graph, 0.0)
+        graph[graph < self.min_similarity] = 0.0
+
+        count = len(sentence_words)
+        out_weights = graph.sum(axis=1)
+        # Sentences without edges spread their score evenly, as in PageRank's handling of dangling nodes
+        transition = np.where(out_weights[:, None] > 0, graph / np.maximum(out_weights, 1e-12)[:, None], 1.0 / count)
+        ranks = np.full(count, 1.0 / count)
+        for _ in range(self.max_iterations):
+            updated = (1 - self.damping) / count + self.damping * (transition.T @ ranks)
+            converged = np.abs(updated - ranks).sum() < self.tolerance
+            ranks = updated
+            if converged:
+                break
+        return ranks
+
+
+class CentroidSummarizer(ExtractiveSummarizer):
+    """
+    Centroid-based scoring: sentences closest to the mean sentence vector win, skipping
+    sentences nearly identical to one already picked. `vectorize` maps sentences to
+    vectors (e.g. spaCy word vectors); without it TF-IDF vectors are used.
+    """
+
+    cost_per_sentence_ms = 0.055 # With TF-IDF vectors; word vectors from the model add their tokenizer pass
+
+    def __init__(self, max_sentences: int = 400, max_terms: int = 4000,
+                 vectorize: Callable[[List[str]], np.ndarray] = None, redundancy: float = 0.95):
+        super().__init__(max_sentences, max_terms)
+        self.vectorize = vectorize
+        self.redundancy = redundancy
+        self._vectors = None
+
+    def _rank(self, sentence_words: List[List[str]], sentences: List[str]) -> np.ndarray:
+        vectors = self.vectorize(sentences) if self.vectorize else self._tfidf(sentence_words)
+        self._vectors = _normalize_rows(np.asarray(vectors, dtype=float))
+        centroid = self._vectors.mean(axis=0)
+        norm = np.linalg.norm(centroid)
+        return self._vectors @ (centroid / norm) if norm else np.zeros(len(sentences))
+
+    def _select(self, ranks: np.ndarray, sentences_count: int) -> List[int]:
+        selected = []
+        for column in super()._select(ranks, len(ranks)):
+            if len(selected) == sentences_count:
+                break
+            if selected and np.max(self._vectors[selected] @ self._vectors[column]) > self.redundancy:
+                continue
+            selected.append(column)
+        return selected
+
+
+SUMMARIZER_CLASSES = {
+    "lsa": LsaSummarizer,
+    "textrank": TextRankSummarizer,
+    "centroid": CentroidSummarizer,
+}
+# Best summaries first; choose_summarizer takes the first one that fits the budget
+SUMMARIZER_QUALITY_ORDER = ("textrank", "lsa", "centroid")
+
+
+def choose_summarizer(budget_ms: float, sentence_count: int, max_sentences: int = 400) -> str:
+    """
+    Highest-quality summarizer whose estimated cost for `sentence_count` sentences fits
+    `budget_ms`, or the cheapest one if none does.
+    """
+    candidates = min(sentence_count, max_sentences)
+    estimates = {
+        name: PREPARE_COST_PER_SENTENCE_MS * sentence_count + SUMMARIZER_CLASSES[name].cost_per_sentence_ms * candidates
+        for name in SUMMARIZER_QUALITY_ORDER
+    }
+    for name in SUMMARIZER_QUALITY_ORDER:
+        if estimates[name] <= budget_ms:
+            return name
+    return min(SUMMARIZER_QUALITY_ORDER, key=estimates.get)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
@@ -0,0 +1,73 @@
+import os
+import sys
+
+# Backend modules import each other as top-level modules (`from legal_analyzer import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import spacy
+from spacy.language import Language
+
+import model_registry
+
+
+@Language.component("title_case_tagger")
+def title_case_tagger(doc):
+    """Tag title-case tokens PROPN and everything else NOUN, enough for the clause matcher's POS patterns"""
+    for token in doc:
+        token.pos_ = "PROPN" if token.is_title else "NOUN"
+    return doc
+
+
+@pytest.fixture
+def small_pipeline(monkeypatch):
+    """
+    A blank English pipeline with rule-based "tagger", "parser" and "ner" stand-ins, registered in place
+    of the configured spaCy model so analyses run without downloading one.
+    """
+    nlp = spacy.blank("en")
+    nlp.add_pipe("title_case_tagger", name="tagger")
+    nlp.add_pipe("sentencizer", name="parser")
+    ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([
+        {"label": "ORG", "pattern": [{"LOWER": "acme"}, {"LOWER": "corp"}]},
+        {"label": "GPE", "pattern": "California"},
+        {"label": "DATE", "pattern": "January 1, 2024"},
+    ])
+    monkeypatch.setitem(model_registry._models, model_registry.DEFAULT_MODEL, nlp)
+    return nlp
+
+
+def _pdf_bytes(pages):
+    """A minimal PDF with one page per item of `pages`, each line of it drawn in Helvetica."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = " ".join(f"({line}) Tj T*" for line in text.split("\n"))
+        stream = f"BT /F1 12 Tf 14 TL 72 720 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return data
+
+
+@pytest.fixture
+def write_pdf(tmp_path):
+    """write_pdf(name, pages) saves a PDF with the given page texts under tmp_path and returns its path."""
+    def write(name, pages):
+        path = tmp_path / name
+        path.write_bytes(_pdf_bytes(pages))
+        return str(path)
+    return write
@@ -0,0 +1,98 @@
+import asyncio
+import os
+
+from analysis_cache import AnalysisCache, file_sha256
+from analyzer_config import AnalyzerConfig
+from legal_analyzer import AnalysisResult, LegalDocumentAnalyzer
+
+
+def result(summary="A summary."):
+    return AnalysisResult(summary=summary, cleaned_text="Some text.", statistics={"word_count": 2})
+
+
+def test_key_depends_on_content_fingerprint_and_extension():
+    key = AnalysisCache.make_key("abc", "fp", ".pdf")
+    assert key == AnalysisCache.make_key("abc", "fp", ".PDF")
+    assert key != AnalysisCache.make_key("abd", "fp", ".pdf")
+    assert key != AnalysisCache.make_key("abc", "fp", ".docx")
+    # Per-request options are appended to the fingerprint (see options_fingerprint in backend.py)
+    assert key != AnalysisCache.make_key("abc", "fp:textrank:None", ".pdf")
+    assert AnalysisCache.make_key("abc", "fp:textrank:None", ".pdf") != AnalysisCache.make_key("abc", "fp:lsa:None", ".pdf")
+
+
+def test_fingerprint_changes_with_analysis_settings():
+    lsa = LegalDocumentAnalyzer(config=AnalyzerConfig(summarizer="lsa"))
+    textrank = LegalDocumentAnalyzer(config=AnalyzerConfig(summarizer="textrank"))
+    assert lsa.fingerprint() == LegalDocumentAnalyzer(config=AnalyzerConfig(summarizer="lsa")).fingerprint()
+    assert lsa.fingerprint() != textrank.fingerprint()
+
+
+def test_key_for_file_hashes_bytes(tmp_path):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_bytes(b"same bytes")
+    second.write_bytes(b"same bytes")
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    assert file_sha256(str(first)) == file_sha256(str(second))
+    assert cache.key_for_file(str(first), "fp") == cache.key_for_file(str(second), "fp")
+    second.write_bytes(b"other bytes")
+    assert cache.key_for_file(str(first), "fp") != cache.key_for_file(str(second), "fp")
+
+
+def test_round_trip_through_memory_and_disk(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = AnalysisCache(directory)
+    assert cache.get("key") is None
+    cache.put("key", result())
+    assert cache.get("key") == result()
+    assert os.path.exists(os.path.join(directory, "key.json"))
+
+    # A new instance (e.g. after a restart) starts with an empty memory tier
+    reopened = AnalysisCache(directory)
+    assert reopened.get("key") == result()
+    assert reopened.stats()["memory_entries"] == 1
+    assert reopened.stats()["disk_bytes"] == cache.stats()["disk_bytes"] > 0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_memory_only(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"), max_disk_bytes=0, max_memory_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, result(key))
+    assert cache.get("a") is None
+    assert cache.get("c") == result("c")
+    assert not os.path.exists(str(tmp_path / "cache"))
+
+
+def test_async_variants(tmp_path):
+    directory = str(tmp_path / "cache")
+    source = tmp_path / "contract.txt"
+    source.write_text("The parties agree.")
+
+    async def run():
+        cache = AnalysisCache(directory)
+        key = await cache.key_for_file_async(str(source), "fp")
+        assert key == cache.key_for_file(str(source), "fp")
+        assert await cache.get_async(key) is None
+        await cache.put_async(key, result())
+        assert await cache.get_async(key) == result()
+        return key
+
+    key = asyncio.run(run())
+    assert asyncio.run(AnalysisCache(directory).get_async(key)) == result()
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    directory = str(tmp_path / "cache")
+    # Room for exactly two entries
+    probe = AnalysisCache(str(tmp_path / "probe"))
+    probe.put("probe", result())
+    entry_size = probe.stats()["disk_bytes"]
+
+    cache = AnalysisCache(directory, max_disk_bytes=2 * entry_size, max_memory_entries=0)
+    cache.put("old", result())
+    os.utime(os.path.join(directory, "old.json"), (1, 1))
+    cache.put("new", result())
+    cache.put("newer", result())
+    assert sorted(os.listdir(directory)) == ["new.json", "newer.json"]
+    assert cache.stats()["disk_bytes"] <= 2 * entry_size
+    assert cache.get("old") is None
@@ -0,0 +1,136 @@
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, normalize_question, question_stems, stem_similarity
+
+SCOPE = AnswerCache.scope("doc", "llama3.2", {"temperature": 0.7, "top_p": 0.9})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_normalize_question():
+    assert normalize_question("  What is the NOTICE period?? ") == "what is the notice period"
+    assert normalize_question("Who's the non-party?") == "who's the non-party"
+    assert normalize_question("Section 4.2 - fees") == "section 4 2 fees"
+
+
+def test_question_stems_and_similarity():
+    assert question_stems("What is the notice period?") == {"notic", "period"}
+    assert question_stems("Notices: periods") == {"notic", "period"}
+    notice = question_stems("What is the notice period?")
+    assert stem_similarity(notice, question_stems("What notice period applies?")) == pytest.approx(2 / 6 ** 0.5)
+    assert stem_similarity(notice, question_stems("What is the payment period?")) == 0.5
+    assert stem_similarity(notice, question_stems("What is it?")) == 0
+
+
+def test_exact_hit_ignores_case_spacing_and_punctuation(clock):
+    cache = AnswerCache(max_entries=10, ttl=60, similarity=0)
+    cache.put(SCOPE, "What is the notice period?", "30 days", [{"start": 0}])
+    entry, similarity = cache.get(SCOPE, "what is the  NOTICE period")
+    assert entry.answer == "30 days" and entry.sources == [{"start": 0}]
+    assert similarity is None
+    assert cache.get(SCOPE, "What is the term?") == (None, None)
+    assert cache.stats() == {"hits": 1, "similar_hits": 0, "misses": 1, "entries": 1}
+
+
+def test_scope_includes_document_model_and_options(clock):
+    cache = AnswerCache(max_entries=10, ttl=60)
+    cache.put(SCOPE, "q", "answer", [])
+    assert AnswerCache.scope("doc", "llama3.2", {"top_p": 0.9, "temperature": 0.7}) == SCOPE
+    for scope in (AnswerCache.scope("other", "llama3.2", {"temperature": 0.7, "top_p": 0.9}),
+                  AnswerCache.scope("doc", "mistral", {"temperature": 0.7, "top_p": 0.9}),
+                  AnswerCache.scope("doc", "llama3.2", {"temperature": 0, "top_p": 0.9})):
+        assert cache.get(scope, "q") == (None, None)
+
+
+def test_entries_expire_after_ttl_from_creation(clock):
+    cache = AnswerCache(max_entries=10, ttl=60)
+    cache.put(SCOPE, "q", "answer", [])
+    clock[0] += 59
+    assert cache.get(SCOPE, "q")[0] is not None
+    clock[0] += 1 # Using an entry doesn't extend its life
+    assert cache.get(SCOPE, "q") == (None, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = AnswerCache(max_entries=2, ttl=60)
+    cache.put(SCOPE, "a", "A", [])
+    cache.put(SCOPE, "b", "B", [])
+    cache.get(SCOPE, "a")
+    cache.put(SCOPE, "c", "C", [])
+    assert cache.get(SCOPE, "b") == (None, None)
+    assert cache.get(SCOPE, "a")[0].answer == "A"
+    assert cache.get(SCOPE, "c")[0].answer == "C"
+
+
+def test_entries_expire_in_creation_order(clock):
+    cache = AnswerCache(max_entries=10, ttl=60)
+    cache.put(SCOPE, "a", "A", [])
+    clock[0] += 30
+    cache.put(SCOPE, "b", "B", [])
+    cache.get(SCOPE, "a")
+    clock[0] += 30
+    assert cache.get(SCOPE, "a") == (None, None)
+    assert cache.get(SCOPE, "b")[0].answer == "B"
+    # Storing a question again restarts its life
+    cache.put(SCOPE, "b", "B2", [])
+    clock[0] += 59
+    assert cache.get(SCOPE, "b")[0].answer == "B2"
+    assert cache.stats()["entries"] == 1
+
+
+def test_similar_question_reuses_answer(clock):
+    cache = AnswerCache(max_entries=10, ttl=60, similarity=0.8)
+    cache.put(SCOPE, "What is the notice period?", "30 days", [])
+    cache.put(SCOPE, "Who pays the fees?", "The client", [])
+
+    entry, similarity = cache.get(SCOPE, "What notice period applies?")
+    assert entry.answer == "30 days"
+    assert similarity == 0.8165
+    assert cache.get(SCOPE, "What is the payment period?") == (None, None)
+    # Only answers about the same document (and model and options) are reused
+    other = AnswerCache.scope("other", "llama3.2", {"temperature": 0.7, "top_p": 0.9})
+    assert cache.get(other, "What notice period applies?") == (None, None)
+    assert cache.stats() == {"hits": 0, "similar_hits": 1, "misses": 2, "entries": 2}
+
+
+def test_similar_question_skips_expired_and_evicted_entries(clock):
+    cache = AnswerCache(max_entries=2, ttl=60, similarity=0.8)
+    cache.put(SCOPE, "What is the notice period?", "30 days", [])
+    clock[0] += 60
+    assert cache.get(SCOPE, "Notice period?") == (None, None)
+
+    cache.put(SCOPE, "What is the notice period?", "30 days", [])
+    cache.put(SCOPE, "Who pays the fees?", "The client", [])
+    cache.put(SCOPE, "What law governs?", "California", [])
+    assert cache.get(SCOPE, "Notice period?") == (None, None)
+    assert cache.get(SCOPE, "Who pays fees?")[0].answer == "The client"
+
+
+def test_similarity_off_needs_exact_question(clock):
+    cache = AnswerCache(max_entries=10, ttl=60, similarity=0)
+    cache.put(SCOPE, "What is the notice period?", "30 days", [])
+    assert cache.get(SCOPE, "Notice period?") == (None, None)
+
+
+def test_disabled_with_no_entries(clock):
+    cache = AnswerCache(max_entries=0, ttl=60)
+    assert not cache.enabled
+    cache.put(SCOPE, "q", "answer", [])
+    assert cache.get(SCOPE, "q") == (None, None)
+    assert cache.stats() == {"hits": 0, "similar_hits": 0, "misses": 0, "entries": 0}
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("LEGAL_ANALYZER_ANSWER_CACHE_ENTRIES", "5")
+    monkeypatch.setenv("LEGAL_ANALYZER_ANSWER_CACHE_TTL", "120")
+    monkeypatch.setenv("LEGAL_ANALYZER_ANSWER_CACHE_SIMILARITY", "0.95")
+    cache = AnswerCache()
+    assert (cache.max_entries, cache.ttl, cache.similarity) == (5, 120, 0.95)
+    assert AnswerCache(max_entries=1).max_entries == 1
@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+import benchmark
+
+
+def report(commit, analyze_ms, stage_ms, compare_ms):
+    return {
+        "meta": {"commit": commit},
+        "documents": [{"document": "nda.pdf", "scale": 10, "analyze": {"p50_ms": analyze_ms},
+                       "stages": {"load": {"p50_ms": stage_ms}}}],
+        "compare": [{"documents": ["a.txt", "b.txt"], "scale": 1, "compare_documents": {"p50_ms": compare_ms}}],
+    }
+
+
+def test_latency_stats_in_milliseconds():
+    stats = benchmark.latency_stats([0.001, 0.002, 0.003, 0.010])
+    assert stats == {"p50_ms": 2.5, "p95_ms": 8.95, "mean_ms": 4.0, "min_ms": 1.0}
+
+
+def test_compare_reports_marks_only_real_regressions():
+    lines = benchmark.compare_reports(report("old", 100.0, 0.5, 50.0), report("new", 120.0, 0.9, 52.0),
+                                      threshold=0.1, min_delta_ms=1.0)
+    assert lines[0] == "p50 change from old to new:"
+    by_key = {line.split(":")[0].strip(): line for line in lines[1:]}
+    assert by_key["nda.pdf x10 analyze"].endswith("REGRESSION")
+    # +80%, but under a millisecond: noise
+    assert not by_key["nda.pdf x10 load"].endswith("REGRESSION")
+    # +4%: within the threshold
+    assert not by_key["a.txt vs b.txt x1 compare_documents"].endswith("REGRESSION")
+
+
+def test_synthetic_rules_use_words_of_the_text():
+    text = "The supplier shall deliver goods and invoice the client within thirty days."
+    rules = benchmark.synthetic_rules(text, 5)
+    assert len(rules) == 5
+    assert rules == benchmark.synthetic_rules(text, 5)
+    for rule in rules.values():
+        words = re.findall(r"[a-z]+", rule["pattern"])
+        assert len(words) == 3 and all(word in text.lower() for word in words)
+
+
+def test_benchmark_rules_finds_the_same_matches(tmp_path):
+    (tmp_path / "contract.txt").write_text(
+        "The Supplier may terminate this agreement at any time without notice. "
+        "Liability is unlimited and the Client shall indemnify the Supplier.\n", encoding="utf-8"
+    )
+    result = benchmark.benchmark_rules(str(tmp_path), characters=20_000, rule_counts=[0, 20], repeats=1,
+                                       log=lambda message: None)
+    assert result["rules"][1]["rules"] - result["rules"][0]["rules"] == 20
+    assert all(entry["same_matches"] for entry in result["rules"])
+    assert result["meta"]["characters"] == 20_000
+
+
+def test_empty_corpus_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        benchmark.benchmark_rules(str(tmp_path), log=lambda message: None)
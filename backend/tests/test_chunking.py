@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from analyzer_config import AnalyzerConfig
+from chunking import chunk_text
+from legal_analyzer import LegalDocumentAnalyzer
+
+
+def assert_covers(text, spans, max_chars):
+    assert "".join(text[start:end] for start, end in spans) == text
+    assert all(0 < end - start <= max_chars for start, end in spans)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+
+def test_cuts_after_paragraph_then_line_then_space():
+    text = "First paragraph.\n\nSecond line one.\nSecond line two words"
+    assert chunk_text(text, 20) == [(0, 18), (18, 35), (35, 51), (51, len(text))]
+    assert [text[start:end] for start, end in chunk_text(text, 20)] == [
+        "First paragraph.\n\n", "Second line one.\n", "Second line two ", "words"
+    ]
+
+
+def test_text_without_separators_is_cut_at_max_chars():
+    assert chunk_text("x" * 25, 10) == [(0, 10), (10, 20), (20, 25)]
+
+
+def test_short_and_empty_text():
+    assert chunk_text("Short.", 100) == [(0, 6)]
+    assert chunk_text("", 100) == []
+
+
+def test_max_chars_must_be_positive():
+    with pytest.raises(ValueError):
+        chunk_text("text", 0)
+
+
+def test_random_texts_are_covered_exactly():
+    rng = random.Random(0)
+    pieces = ["word", " ", "\n", "\n\n", "Clause 1.", "  ", "x" * 40]
+    for _ in range(200):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 60)))
+        max_chars = rng.randint(1, 50)
+        assert_covers(text, chunk_text(text, max_chars), max_chars)
+
+
+def test_entity_offsets_do_not_depend_on_chunk_size(small_pipeline):
+    paragraph = ("This Agreement is made on January 1, 2024 between Acme Corp and the Client, "
+                 "under the laws of California.")
+    text = "\n\n".join([paragraph] * 20)
+
+    def spans(chunk_size):
+        analyzer = LegalDocumentAnalyzer(verbose=False, config=AnalyzerConfig(nlp_chunk_size=chunk_size))
+        return analyzer.find_entity_spans(text)
+
+    whole = spans(len(text))
+    assert ("ORG", text.index("Acme Corp"), text.index("Acme Corp") + len("Acme Corp")) in whole
+    assert spans(len(paragraph) + 2) == whole
+    assert spans(250) == whole
@@ -0,0 +1,130 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import cli
+
+
+def write_lines(path, records, tail=""):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + tail)
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_iter_documents_is_sorted_and_filtered(tmp_path):
+    for name in ("b.txt", "a.PDF", "notes.md", "sub/c.docx", "sub/deeper/d.txt", "0/e.txt"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x")
+    assert list(cli.iter_documents(str(tmp_path))) == ["a.PDF", "b.txt", "0/e.txt", "sub/c.docx", "sub/deeper/d.txt"]
+
+
+def test_load_checkpoint_missing_file(tmp_path):
+    assert cli.load_checkpoint(str(tmp_path / "results.jsonl")) == set()
+
+
+def test_load_checkpoint_truncates_a_torn_last_line(tmp_path):
+    out = tmp_path / "results.jsonl"
+    write_lines(out, [{"path": "a.txt", "status": "ok"}], tail='{"path": "b.txt", "sta')
+    assert cli.load_checkpoint(str(out)) == {"a.txt"}
+    assert out.read_text() == json.dumps({"path": "a.txt", "status": "ok"}) + "\n"
+
+
+def test_load_checkpoint_truncates_a_complete_record_without_newline(tmp_path):
+    out = tmp_path / "results.jsonl"
+    write_lines(out, [{"path": "a.txt", "status": "ok"}], tail=json.dumps({"path": "b.txt", "status": "ok"}))
+    assert cli.load_checkpoint(str(out)) == {"a.txt"}
+    assert read_records(out) == [{"path": "a.txt", "status": "ok"}]
+
+
+def test_load_checkpoint_skips_records_without_path(tmp_path):
+    out = tmp_path / "results.jsonl"
+    write_lines(out, [{"status": "ok"}, [1, 2], "text", {"path": "a.txt", "status": "ok"}])
+    assert cli.load_checkpoint(str(out)) == {"a.txt"}
+    assert len(read_records(out)) == 4
+
+
+def test_load_checkpoint_retry_errors_uses_last_record(tmp_path):
+    out = tmp_path / "results.jsonl"
+    write_lines(out, [
+        {"path": "ok.txt", "status": "ok"},
+        {"path": "failed.txt", "status": "error", "error": "boom"},
+        {"path": "fixed.txt", "status": "error", "error": "boom"},
+        {"path": "fixed.txt", "status": "ok"},
+        {"path": "broke.txt", "status": "ok"},
+        {"path": "broke.txt", "status": "error", "error": "boom"},
+    ])
+    assert cli.load_checkpoint(str(out)) == {"ok.txt", "failed.txt", "fixed.txt", "broke.txt"}
+    assert cli.load_checkpoint(str(out), retry_errors=True) == {"ok.txt", "fixed.txt"}
+
+
+def test_compact_results_keeps_last_record_per_path(tmp_path):
+    out = tmp_path / "results.jsonl"
+    write_lines(out, [
+        {"path": "a.txt", "status": "error", "error": "boom"},
+        {"path": "b.txt", "status": "ok"},
+        {"no": "path"},
+        {"path": "a.txt", "status": "ok"},
+    ])
+    cli.compact_results(str(out))
+    assert read_records(out) == [{"path": "b.txt", "status": "ok"}, {"path": "a.txt", "status": "ok"}]
+    assert not (tmp_path / "results.jsonl.tmp").exists()
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Run analyze_directory in threads, "analyzing" documents by reading them: FAIL fails, anything else is ok."""
+    analyzed = []
+
+    def analyze_group(root, paths, summarizer, summary_budget_ms, include_text):
+        analyzed.extend(paths)
+        lines = []
+        for path in paths:
+            with open(f"{root}/{path}") as f:
+                failed = f.read() == "FAIL"
+            record = {"path": path, "status": "error", "error": "boom"} if failed else \
+                {"path": path, "status": "ok", "result": {}}
+            lines.append((record["status"], json.dumps(record) + "\n"))
+        return lines
+
+    monkeypatch.setattr(cli, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(cli, "_analyze_group", analyze_group)
+    monkeypatch.setattr(cli.execution, "_init_worker", lambda config, pool_workers: None)
+    monkeypatch.setattr(cli.model_registry, "preload", lambda name: None)
+    return analyzed
+
+
+def test_analyze_directory_resumes_and_retries(tmp_path, fake_pool):
+    root = tmp_path / "docs"
+    root.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (root / name).write_text("text")
+    (root / "bad.txt").write_text("FAIL")
+    out = tmp_path / "results.jsonl"
+
+    # An interrupted run that got as far as a.txt and bad.txt, and a document since removed
+    write_lines(out, [
+        {"path": "a.txt", "status": "ok", "result": {}},
+        {"path": "bad.txt", "status": "error", "error": "boom"},
+        {"path": "gone.txt", "status": "ok", "result": {}},
+    ], tail='{"path": "b.t')
+    counts = cli.analyze_directory(str(root), str(out), workers=2, group_size=1)
+    assert counts == {"skipped": 2, "ok": 2, "error": 0}
+    assert sorted(fake_pool) == ["b.txt", "c.txt"]
+    assert sorted(record["path"] for record in read_records(out)) == ["a.txt", "b.txt", "bad.txt", "c.txt", "gone.txt"]
+
+    # Nothing left to do
+    fake_pool.clear()
+    assert cli.analyze_directory(str(root), str(out), workers=2) == {"skipped": 4, "ok": 0, "error": 0}
+    assert fake_pool == []
+
+    # Retrying analyzes bad.txt again and leaves one record per document
+    (root / "bad.txt").write_text("fixed")
+    counts = cli.analyze_directory(str(root), str(out), workers=2, retry_errors=True)
+    assert counts == {"skipped": 3, "ok": 1, "error": 0}
+    assert fake_pool == ["bad.txt"]
+    records = read_records(out)
+    assert sorted(record["path"] for record in records) == ["a.txt", "b.txt", "bad.txt", "c.txt", "gone.txt"]
+    assert next(record for record in records if record["path"] == "bad.txt")["status"] == "ok"
@@ -0,0 +1,53 @@
+from dataclasses import asdict
+
+from legal_analyzer import LegalDocumentAnalyzer
+
+FIRST = """SERVICES AGREEMENT
+
+This Agreement is made on January 1, 2024 between Acme Corp and the Client.
+
+1. Termination. Either party may terminate this Agreement with thirty days written notice.
+
+2. Confidentiality. The Client shall keep all confidential information secret.
+
+3. Governing Law. This Agreement is governed by the laws of California.
+"""
+
+SECOND = """SERVICES AGREEMENT
+
+This Agreement is made on January 1, 2024 between Acme Corp and the Vendor.
+
+1. Termination. Acme Corp may terminate this Agreement at any time without notice.
+
+2. Indemnification. The Vendor shall indemnify Acme Corp against all claims.
+
+3. Arbitration. Any dispute shall be settled by binding arbitration in California.
+"""
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_compare_documents_matches_comparing_separate_analyses(tmp_path, small_pipeline):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    path1, path2 = write(tmp_path, "first.txt", FIRST), write(tmp_path, "second.txt", SECOND)
+
+    compared = analyzer.compare_documents(path1, path2)
+    expected = analyzer.compare_results(analyzer.analyze(path1), analyzer.analyze(path2), path1, path2)
+
+    assert asdict(compared) == asdict(expected)
+
+
+def test_compare_documents_raises_for_an_unreadable_document(tmp_path, small_pipeline):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    path1 = write(tmp_path, "first.txt", FIRST)
+
+    try:
+        analyzer.compare_documents(path1, str(tmp_path / "missing.txt"))
+    except Exception:
+        pass
+    else:
+        raise AssertionError("compare_documents should fail when a document cannot be read")
@@ -0,0 +1,66 @@
+import pytest
+
+import document_sessions
+from document_sessions import DocumentSessions
+from retrieval import ChunkIndex, text_digest
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(document_sessions.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_open_uses_text_digest_as_id(clock):
+    sessions = DocumentSessions()
+    session = sessions.open("The term is one year.")
+    assert session.document_id == text_digest("The term is one year.")
+    assert sessions.open("The term is one year.") is session
+    assert sessions.get(session.document_id) is session
+    assert sessions.get("unknown") is None
+
+
+def test_open_fills_a_missing_index(clock):
+    sessions = DocumentSessions()
+    session = sessions.open("The term is one year.")
+    assert session.index is None
+    index = ChunkIndex.build(session.text)
+    sessions.open(session.text, index)
+    assert session.index is index
+    # An existing index is kept
+    sessions.open(session.text, ChunkIndex.build(session.text))
+    assert session.index is index
+
+
+def test_sessions_expire_after_ttl_from_last_use(clock):
+    sessions = DocumentSessions(ttl=60)
+    document_id = sessions.open("a").document_id
+    clock[0] += 59
+    assert sessions.get(document_id) is not None # Using a session extends its life
+    clock[0] += 59
+    assert sessions.get(document_id) is not None
+    clock[0] += 60
+    assert sessions.get(document_id) is None
+
+
+def test_len_drops_expired_sessions(clock):
+    sessions = DocumentSessions(ttl=60)
+    sessions.open("a")
+    clock[0] += 30
+    sessions.open("b")
+    assert len(sessions) == 2
+    clock[0] += 30
+    assert len(sessions) == 1
+    clock[0] += 30
+    assert len(sessions) == 0
+
+
+def test_least_recently_used_is_evicted(clock):
+    sessions = DocumentSessions(max_entries=2)
+    a, b = sessions.open("a"), sessions.open("b")
+    sessions.get(a.document_id)
+    sessions.open("c")
+    assert sessions.get(b.document_id) is None
+    assert sessions.get(a.document_id) is a
+    assert len(sessions) == 2
@@ -0,0 +1,64 @@
+import asyncio
+import operator
+import time
+
+import pytest
+
+from analyzer_config import AnalyzerConfig
+from execution import AnalysisExecutor, ExecutorSaturated
+
+
+@pytest.fixture
+def executor(small_pipeline):
+    # Workers are forked after small_pipeline is registered, so they load it instead of a real model
+    executor = AnalysisExecutor(config=AnalyzerConfig(), max_workers=1, max_queue=0, timeout=30)
+    yield executor
+    executor.shutdown()
+
+
+def test_runs_tasks_in_a_worker(executor):
+    assert asyncio.run(executor.run(operator.add, 2, 3)) == 5
+    assert executor.in_flight == 0
+
+
+def test_rejects_tasks_beyond_capacity_and_cleans_up(executor):
+    cleaned = []
+
+    async def scenario():
+        busy = asyncio.ensure_future(executor.run(time.sleep, 0.5, cleanup=lambda: cleaned.append("busy")))
+        await asyncio.sleep(0.05)
+        assert not executor.has_capacity()
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(operator.add, 1, 1, cleanup=lambda: cleaned.append("rejected"))
+        assert cleaned == ["rejected"]
+        await busy
+        # A task may wait for the slot instead of being rejected
+        return await executor.run(operator.add, 1, 1, wait=5)
+
+    assert asyncio.run(scenario()) == 2
+    assert cleaned == ["rejected", "busy"]
+
+
+def test_cleanup_waits_for_a_task_that_outlives_its_timeout(executor):
+    cleaned = []
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(time.sleep, 0.5, timeout=0.05, cleanup=lambda: cleaned.append(time.monotonic()))
+        timed_out = time.monotonic()
+        assert cleaned == []
+        # The worker is still busy until the task really ends
+        assert not executor.has_capacity()
+        while not cleaned:
+            await asyncio.sleep(0.05)
+        return timed_out
+
+    timed_out = asyncio.run(scenario())
+    assert len(cleaned) == 1 and cleaned[0] > timed_out
+    assert executor.has_capacity()
+
+
+def test_task_errors_reach_the_caller(executor):
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(executor.run(operator.truediv, 1, 0))
+    assert executor.in_flight == 0
@@ -0,0 +1,73 @@
+import cProfile
+import os
+
+import pytest
+
+import instrumentation
+from instrumentation import StageTimings, profile_report, prune_profiles
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(instrumentation.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def test_nested_spans_exclude_inner_time(clock):
+    timings = StageTimings()
+    with timings.span("load", pages=1):
+        clock[0] += 1
+        with timings.span("clean") as counters:
+            clock[0] += 2
+            counters["characters"] = 50
+        clock[0] += 3
+    with timings.span("load", pages=1):
+        clock[0] += 4
+
+    report = timings.as_dict()
+    assert report["total_ms"] == 10_000
+    assert report["stages"] == [
+        {"stage": "load", "duration_ms": 8_000, "calls": 2, "pages": 2},
+        {"stage": "clean", "duration_ms": 2_000, "calls": 1, "characters": 50},
+    ]
+
+
+def test_stages_are_reported_in_analysis_order(clock):
+    timings = StageTimings()
+    for stage in ("custom", "scoring", "load", "other"):
+        with timings.span(stage):
+            clock[0] += 1
+    assert [entry["stage"] for entry in timings.as_dict()["stages"]] == ["load", "scoring", "custom", "other"]
+
+
+def test_span_records_time_when_the_block_raises(clock):
+    timings = StageTimings()
+    with pytest.raises(ValueError):
+        with timings.span("ner"):
+            clock[0] += 1
+            raise ValueError
+    assert timings.as_dict()["stages"] == [{"stage": "ner", "duration_ms": 1_000, "calls": 1}]
+
+
+def test_profile_report_saves_stats_and_lists_top_functions(tmp_path):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    sorted(range(1000), key=str)
+    profiler.disable()
+
+    report = profile_report(profiler, profile_dir=str(tmp_path), keep=5)
+    assert os.path.dirname(report["path"]) == str(tmp_path)
+    assert os.path.exists(report["path"])
+    assert "cumulative" in report["top"]
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path):
+    for age in range(5):
+        path = tmp_path / f"analyze-{age}.prof"
+        path.write_bytes(b"")
+        os.utime(path, (1000 - age, 1000 - age))
+    (tmp_path / "notes.txt").write_text("kept")
+
+    prune_profiles(str(tmp_path), 2)
+    assert sorted(os.listdir(tmp_path)) == ["analyze-0.prof", "analyze-1.prof", "notes.txt"]
@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+
+import pytest
+
+import job_store
+from job_store import JobStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(job_store.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def test_jobs_are_claimed_oldest_first(path, clock):
+    store = JobStore(path)
+    first = store.create("analyze", {"files": ["a"]})
+    clock[0] += 1
+    second = store.create("compare", {"files": ["b", "c"]})
+    with pytest.raises(ValueError):
+        store.create("summarize", {})
+
+    job = store.claim_next()
+    assert (job["job_id"], job["status"], job["params"]) == (first, "running", {"files": ["a"]})
+    assert store.claim_next()["job_id"] == second
+    assert store.claim_next() is None
+    assert store.counts() == {"queued": 0, "running": 2, "done": 0, "failed": 0}
+
+
+def test_concurrent_claims_never_share_a_job(path):
+    store = JobStore(path)
+    created = {store.create("analyze", {}) for _ in range(20)}
+    claimed, lock = [], threading.Lock()
+
+    def claim():
+        other = JobStore(path) # Like another server process sharing the file
+        while (job := other.claim_next()) is not None:
+            with lock:
+                claimed.append(job["job_id"])
+
+    threads = [threading.Thread(target=claim) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(created)
+
+
+def test_progress_and_result(path):
+    store = JobStore(path)
+    job_id = store.create("analyze", {})
+    # Progress before the job is claimed, or from a worker of another owner, is ignored
+    store.report_stage(job_id, store.owner, "load", pages=3)
+    assert store.get(job_id)["progress"]["stage"] is None
+    store.claim_next()
+    store.report_stage(job_id, "someone else", "load", pages=3)
+    assert store.get(job_id)["progress"]["stage"] is None
+
+    store.report_stage(job_id, store.owner, "ner", pages=7)
+    progress = store.get(job_id)["progress"]
+    assert (progress["stage"], progress["pages"]) == ("ner", 7)
+    assert 0 < progress["fraction"] < 1
+
+    assert store.finish(job_id, {"summary": "done"})
+    job = store.get(job_id)
+    assert (job["status"], job["result"], job["progress"]["fraction"]) == ("done", {"summary": "done"}, 1.0)
+    assert "result" not in store.get(job_id, include_result=False)
+    # Finished jobs take no more progress or outcomes
+    store.report_stage(job_id, store.owner, "load")
+    assert not store.fail(job_id, "late")
+    assert store.get(job_id)["status"] == "done"
+
+
+def test_compare_progress_counts_both_documents():
+    progress = job_store.job_progress("compare", "running", "load", 2, 0)
+    stages = progress["stages"]
+    assert stages[-1] == "compare" and stages.index("document2:load") == (len(stages) - 1) // 2
+    assert progress["fraction"] == round(stages.index("document2:load") / len(stages), 3)
+
+
+def test_only_stale_jobs_are_requeued(path, clock):
+    alive, stopped = JobStore(path), JobStore(path)
+    alive_job = alive.create("analyze", {})
+    stopped_job = stopped.create("analyze", {})
+    alive.claim_next()
+    stopped.claim_next()
+
+    clock[0] += 50
+    assert alive.heartbeat() == 1
+    assert alive.requeue_stale(60) == 0
+    clock[0] += 20
+    # Another server starting up requeues only the job whose server went quiet
+    assert JobStore(path).requeue_stale(60) == 1
+    assert alive.get(alive_job)["status"] == "running"
+    requeued = alive.get(stopped_job)
+    assert (requeued["status"], requeued["started_at"], requeued["progress"]["stage"]) == ("queued", None, None)
+
+
+def test_outcome_of_a_requeued_job_is_discarded(path, clock):
+    first, second = JobStore(path), JobStore(path)
+    job_id = first.create("analyze", {})
+    first.claim_next()
+    clock[0] += 61
+    assert second.requeue_stale(60) == 1
+    assert second.claim_next()["job_id"] == job_id
+
+    # The first server was only slow: its late outcome must not overwrite the rerun
+    assert not first.finish(job_id, {"summary": "stale"})
+    assert not first.fail(job_id, "stale")
+    assert second.get(job_id)["status"] == "running"
+    assert second.fail(job_id, "boom")
+    assert second.get(job_id)["error"] == "boom"
+
+
+def test_purge_finished(path, clock):
+    store = JobStore(path)
+    old, recent, queued = (store.create("analyze", {}) for _ in range(3))
+    store.claim_next()
+    store.fail(old, "boom")
+    clock[0] += 100
+    store.claim_next()
+    store.finish(recent, {})
+    clock[0] += 50
+    assert store.purge_finished(120) == [old]
+    assert store.get(old) is None
+    assert store.get(recent)["status"] == "done"
+    assert store.get(queued)["status"] == "queued"
+
+
+def test_schema_uses_wal(path):
+    JobStore(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_database_from_before_job_owners_is_migrated(path, clock):
+    schema = job_store._SCHEMA.replace("    owner TEXT,\n    heartbeat_at REAL,\n", "")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(schema)
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, params, created_at, updated_at) VALUES ('old', 'analyze', 'running', '{}', ?, ?)",
+            (clock[0], clock[0])
+        )
+    conn.close()
+
+    store = JobStore(path)
+    assert store.requeue_stale(60) == 0
+    clock[0] += 61
+    assert store.requeue_stale(60) == 1
+    assert store.claim_next()["job_id"] == "old"
+    assert store.finish("old", {})
@@ -0,0 +1,44 @@
+import random
+
+from line_index import LineIndex
+
+
+def counted_line_col(text, offset):
+    """The reference: count newlines from the top of the document."""
+    line = text.count("\n", 0, offset) + 1
+    return line, offset - (text.rfind("\n", 0, offset) + 1) + 1
+
+
+def test_line_col_matches_counting_newlines():
+    rng = random.Random(0)
+    for _ in range(50):
+        text = "".join(rng.choice("ab \n") for _ in range(rng.randrange(0, 200)))
+        index = LineIndex(text)
+        for offset in range(len(text) + 1):
+            assert index.line_col(offset) == counted_line_col(text, offset)
+            assert index.line_number(offset) == counted_line_col(text, offset)[0]
+
+
+def test_line_span_excludes_newline():
+    text = "first\n\nthird line\nlast"
+    index = LineIndex(text)
+    lines = text.split("\n")
+    assert len(index) == len(lines)
+    for number, line in enumerate(lines, start=1):
+        start, end = index.line_span(number, len(text))
+        assert text[start:end] == line
+
+
+def test_from_starts_round_trip():
+    text = "a\nbb\n\nccc\n"
+    index = LineIndex(text)
+    rebuilt = LineIndex.from_starts(index.starts)
+    assert rebuilt.starts == index.starts == [0, 2, 5, 6, 10]
+    assert rebuilt.line_col(7) == index.line_col(7) == (4, 2)
+
+
+def test_empty_text():
+    index = LineIndex("")
+    assert len(index) == 1
+    assert index.line_col(0) == (1, 1)
+    assert index.line_span(1, 0) == (0, 0)
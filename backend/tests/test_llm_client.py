@@ -0,0 +1,208 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, LLMError, LLMTimeout, LLMUnavailable, OllamaClient
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_client.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        assert breaker.before_call() is False
+        breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(LLMUnavailable) as refused:
+        breaker.before_call()
+    assert refused.value.retry_after == 30
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_one_trial_after_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 29
+    with pytest.raises(LLMUnavailable):
+        breaker.before_call()
+    clock[0] += 1
+    assert breaker.before_call() is True
+    # Only one trial at a time
+    with pytest.raises(LLMUnavailable):
+        breaker.before_call()
+
+
+def test_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    with breaker.attempt():
+        breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.before_call() is False
+
+
+def test_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    with breaker.attempt():
+        breaker.record_failure()
+    assert breaker.is_open
+    clock[0] += 29
+    with pytest.raises(LLMUnavailable):
+        breaker.before_call()
+    clock[0] += 1
+    assert breaker.before_call() is True
+
+
+@pytest.mark.parametrize("error", [RuntimeError, asyncio.CancelledError])
+def test_abandoned_trial_lets_the_next_call_try(clock, error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    with pytest.raises(error):
+        with breaker.attempt():
+            raise error()
+    assert breaker.is_open
+    assert breaker.before_call() is True
+
+
+def make_client(handler, **kwargs):
+    client = OllamaClient(base_url="http://ollama.test", model="test-model", backoff=0, **kwargs)
+    client._http = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def answering(*responses):
+    """Handler returning the given responses (or raising the given exceptions) in turn."""
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        response = responses[min(len(requests), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler, requests
+
+
+def test_generate_sends_model_and_options():
+    handler, requests = answering(httpx.Response(200, json={"response": " An answer. "}))
+    client = make_client(handler, options={"temperature": 0})
+    assert asyncio.run(client.generate("Question?")) == "An answer."
+    assert requests == [{"model": "test-model", "prompt": "Question?", "stream": False, "options": {"temperature": 0}}]
+    assert client.in_flight == 0
+
+
+def test_retryable_status_is_retried():
+    handler, requests = answering(httpx.Response(503, text="loading"), httpx.Response(200, json={"response": "ok"}))
+    client = make_client(handler, retries=2)
+    assert asyncio.run(client.generate("q")) == "ok"
+    assert len(requests) == 2
+    assert client.breaker.failures == 0
+
+
+def test_connect_errors_exhaust_retries_and_count_against_breaker():
+    handler, requests = answering(httpx.ConnectError("refused"))
+    client = make_client(handler, retries=2, breaker=CircuitBreaker(failure_threshold=3))
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.generate("q"))
+    assert len(requests) == 3
+    assert client.breaker.is_open
+
+    # Open: refused without a request
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.generate("q"))
+    assert len(requests) == 3
+    assert client.in_flight == 0
+
+
+def test_client_error_is_not_retried_or_counted():
+    handler, requests = answering(httpx.Response(404, text="model not found"))
+    client = make_client(handler, retries=2)
+    with pytest.raises(LLMError, match="model not found") as error:
+        asyncio.run(client.generate("q"))
+    assert not isinstance(error.value, LLMUnavailable)
+    assert len(requests) == 1
+    assert client.breaker.failures == 0
+
+
+def test_read_timeout_is_not_retried():
+    handler, requests = answering(httpx.ReadTimeout("slow"))
+    client = make_client(handler, retries=2)
+    with pytest.raises(LLMTimeout):
+        asyncio.run(client.generate("q"))
+    assert len(requests) == 1
+
+
+def test_stream_yields_tokens_and_releases_slot():
+    lines = [{"response": "Hello"}, {"response": ", world"}, {"response": "", "done": True}]
+    body = "".join(json.dumps(line) + "\n" for line in lines)
+    handler, requests = answering(httpx.Response(200, text=body))
+    client = make_client(handler, max_concurrency=1)
+
+    async def run():
+        stream = await client.stream("q")
+        assert client.in_flight == 1
+        try:
+            return [token async for token in stream.tokens()]
+        finally:
+            await stream.aclose()
+            await stream.aclose() # Closing twice releases the slot once
+
+    assert asyncio.run(run()) == ["Hello", ", world"]
+    assert requests[0]["stream"] is True
+    assert client.in_flight == 0
+
+
+def test_stream_error_chunk():
+    handler, _ = answering(httpx.Response(200, text=json.dumps({"error": "out of memory"}) + "\n"))
+    client = make_client(handler)
+
+    async def run():
+        stream = await client.stream("q")
+        try:
+            async for _ in stream.tokens():
+                pass
+        finally:
+            await stream.aclose()
+
+    with pytest.raises(LLMError, match="out of memory"):
+        asyncio.run(run())
+
+
+def test_busy_slots_time_out():
+    handler, _ = answering(httpx.Response(200, text=json.dumps({"response": "x", "done": True}) + "\n"))
+    client = make_client(handler, max_concurrency=1, queue_timeout=0.01)
+
+    async def run():
+        stream = await client.stream("q")
+        try:
+            with pytest.raises(LLMUnavailable) as busy:
+                await client.generate("q")
+            assert busy.value.retry_after == 5
+        finally:
+            await stream.aclose()
+        assert await client.generate("q") == "x"
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+import os
+import re
+
+import numpy as np
+import pytest
+from sumy.models.dom import ObjectDocumentModel, Paragraph, Sentence
+from sumy.summarizers.lsa import LsaSummarizer as SumyLsaSummarizer
+
+from summarization import LsaSummarizer, sentence_words
+
+CONTRACT = os.path.join(os.path.dirname(__file__), "..", "..", "DOCUMENTS", "high.txt")
+
+
+class WordTokenizer:
+    """sumy's word pattern, without the NLTK data its own Tokenizer needs."""
+    language = "english"
+
+    def to_words(self, text):
+        return re.findall(r"[^\W\d_](?:[^\W\d_]|['-])*", text)
+
+
+@pytest.fixture(scope="module")
+def sentences():
+    with open(CONTRACT, encoding="utf-8") as f:
+        text = f.read()
+    return [sentence for sentence in re.split(r"(?<=[.;:])\s+", text) if sentence_words([sentence])[0]]
+
+
+def test_full_svd_picks_what_sumy_picks(sentences):
+    sentences = sentences[:120]
+    document = ObjectDocumentModel([Paragraph([Sentence(sentence, WordTokenizer()) for sentence in sentences])])
+    expected = [str(sentence) for sentence in SumyLsaSummarizer()(document, 5)]
+    assert [sentences[index] for index in LsaSummarizer()(sentences, 5)] == expected
+
+
+def test_randomized_svd_keeps_the_top_ranks(sentences):
+    words = sentence_words(sentences)
+    full = LsaSummarizer(max_dimensions=10_000)._rank(words, sentences)
+    randomized = LsaSummarizer(max_dimensions=40)._rank(words, sentences)
+    assert min(len(words), len({word for sentence in words for word in sentence})) > 40
+    assert np.corrcoef(full, randomized)[0, 1] > 0.95
+    top = set(np.argsort(-full)[:10])
+    assert len(top & set(np.argsort(-randomized)[:10])) >= 8
+
+
+def test_randomized_svd_is_deterministic(sentences):
+    assert LsaSummarizer(max_dimensions=20)(sentences, 5) == LsaSummarizer(max_dimensions=20)(sentences, 5)
@@ -0,0 +1,51 @@
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative_per_label():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/analyze")
+    histogram.observe(0.2, "/chat")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/analyze",le="0.1"} 2',
+        'latency_seconds_bucket{route="/analyze",le="1.0"} 3',
+        'latency_seconds_bucket{route="/analyze",le="+Inf"} 4',
+        'latency_seconds_sum{route="/analyze"} 3.65',
+        'latency_seconds_count{route="/analyze"} 4',
+        'latency_seconds_bucket{route="/chat",le="0.1"} 0',
+        'latency_seconds_bucket{route="/chat",le="1.0"} 1',
+        'latency_seconds_bucket{route="/chat",le="+Inf"} 1',
+        'latency_seconds_sum{route="/chat"} 0.2',
+        'latency_seconds_count{route="/chat"} 1',
+    ]
+
+
+def test_counter_sums_per_label_and_escapes_values():
+    counter = Counter("items_total", "Items", ("stage",))
+    counter.inc(2, "ner")
+    counter.inc(3, "ner")
+    counter.inc(1, 'say "hi"\n')
+    assert counter.render()[2:] == [
+        'items_total{stage="ner"} 5',
+        'items_total{stage="say \\"hi\\"\\n"} 1',
+    ]
+
+
+def test_unlabelled_metrics_and_registry_render():
+    registry = MetricsRegistry()
+    registry.register(Counter("requests_total", "Requests")).inc()
+    registry.register(Gauge("workers", "Workers", lambda: {(): 4}))
+    assert registry.render() == (
+        "# HELP requests_total Requests\n# TYPE requests_total counter\nrequests_total 1\n"
+        "# HELP workers Workers\n# TYPE workers gauge\nworkers 4\n"
+    )
+
+
+def test_gauge_is_read_at_render_time():
+    state = {"busy": 1}
+    gauge = Gauge("analyses", "Analyses", lambda: {("busy",): state["busy"], ("idle",): 3}, ("state",))
+    state["busy"] = 2
+    assert gauge.render()[2:] == ['analyses{state="busy"} 2', 'analyses{state="idle"} 3']
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+import spacy
+
+import model_registry
+from legal_analyzer import LegalDocumentAnalyzer
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Names passed to spacy.load, which returns a blank pipeline instead of reading a model."""
+    calls = []
+
+    def load(name):
+        calls.append(name)
+        return spacy.blank("en")
+
+    monkeypatch.setattr(model_registry, "_models", {})
+    monkeypatch.setattr(model_registry.spacy, "load", load)
+    return calls
+
+
+def test_each_model_is_loaded_once(loads):
+    small = model_registry.get_model("en_core_web_sm")
+    assert model_registry.get_model("en_core_web_sm") is small
+    assert model_registry.get_model("en_core_web_md") is not small
+    assert loads == ["en_core_web_sm", "en_core_web_md"]
+    assert model_registry.loaded_models() == ["en_core_web_sm", "en_core_web_md"]
+    assert small.max_length == 10_000_000
+
+
+def test_default_model(loads):
+    model_registry.get_model()
+    assert loads == [model_registry.DEFAULT_MODEL]
+
+
+def test_concurrent_first_use_loads_once(loads):
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(model_registry.get_model("en_core_web_sm")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["en_core_web_sm"]
+    assert all(model is models[0] for model in models)
+
+
+def test_missing_model_explains_how_to_install_it(monkeypatch):
+    monkeypatch.setattr(model_registry, "_models", {})
+
+    def load(name):
+        raise OSError(f"[E050] Can't find model '{name}'")
+
+    monkeypatch.setattr(model_registry.spacy, "load", load)
+    with pytest.raises(ImportError, match="spacy download en_core_web_md"):
+        model_registry.get_model("en_core_web_md")
+    assert model_registry.loaded_models() == []
+
+
+def test_analyzer_loads_the_model_on_first_use(loads):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    assert loads == []
+    analyzer.nlp
+    assert loads == [analyzer.config.model_name]
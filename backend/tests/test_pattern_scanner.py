@@ -0,0 +1,130 @@
+import json
+import random
+import re
+
+import pytest
+
+import pattern_scanner
+from pattern_scanner import LiteralGatedScanner, PatternScanner, literal_prefixes
+from rule_engine import DEFAULT_RULES_PATH
+
+WORDS = ["confidential", "information", "agreement", "indemnify", "liability", "termination",
+         "terminate", "notice", "the", "of", "a", "ab", "aab", "x", "12", "30 days", ",", ".", "\n"]
+# Characters re matches case-insensitively that plain lowercasing doesn't line up with
+UNICODE_WORDS = ["ſecret", "İNDEMNİFY", "\u212aey", "waıver", "ARBİTRATİON", "Éé", "’", "€100", "ς", "Σ"]
+
+
+def per_pattern(patterns, text, flags=re.IGNORECASE):
+    """What PatternScanner must reproduce: one finditer per pattern."""
+    return {name: [(m.start(), m.end()) for m in re.finditer(pattern, text, flags)]
+            for name, pattern in patterns.items()}
+
+
+def scanned(scanner, text):
+    found = {name: [] for name in scanner.names}
+    for name, start, end in scanner.scan(text):
+        found[name].append((start, end))
+    return found
+
+
+def random_text(rng, words=60):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def rule_patterns():
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)
+    return {name: info["pattern"]
+            for section in ("risk_patterns", "favorable_patterns") for name, info in rules[section].items()}
+
+
+PATTERN_SETS = {
+    "overlapping": {"short": "a", "long": "a+b", "alt": "ab|aab", "word": r"\bab\b"},
+    "empty_matches": {"maybe": "x*", "lookahead": "(?=notice)", "digits": r"\d*"},
+    "legal_terms": {
+        "confidentiality": "confidential(?:ity| information| agreement)",
+        "indemnification": "indemnif(?:y|ication|ies|ing)",
+        "termination": r"terminat(?:e|ion)|notice period|\d+ days",
+    },
+    "scoring_rules": rule_patterns(),
+    "unicode": {"secret": "secret", "indemnify": "indemnif(?:y|ication)", "key": "key|kelvin", "euro": "€\\d+",
+                "waiver": r"\bwaive", "accent": "éé", "sigma": "σ", "mixed": "(?i:ARB)itration|(?-i:Secret)"},
+}
+
+
+@pytest.mark.parametrize("name", PATTERN_SETS)
+def test_scan_matches_finditer_per_pattern(name):
+    patterns = PATTERN_SETS[name]
+    scanner = PatternScanner(patterns)
+    rng = random.Random(name)
+    for _ in range(200):
+        text = random_text(rng)
+        assert scanned(scanner, text) == per_pattern(patterns, text)
+
+
+def test_scan_is_ordered_by_start():
+    scanner = PatternScanner(PATTERN_SETS["overlapping"])
+    text = random_text(random.Random(1), 200)
+    starts = [start for _, start, _ in scanner.scan(text)]
+    assert starts == sorted(starts)
+
+
+def test_case_sensitive_flags():
+    patterns = {"upper": "Agreement", "lower": "agreement"}
+    text = "Agreement agreement AGREEMENT"
+    assert scanned(PatternScanner(patterns, flags=0), text) == per_pattern(patterns, text, flags=0)
+
+
+def test_no_patterns():
+    assert list(PatternScanner({}).scan("anything")) == []
+
+
+@pytest.mark.parametrize("name", PATTERN_SETS)
+def test_gated_scan_matches_finditer_per_pattern(name):
+    patterns = PATTERN_SETS[name]
+    scanner = LiteralGatedScanner(patterns)
+    rng = random.Random(name)
+    for unicode in (False, True):
+        for _ in range(200):
+            text = " ".join(rng.choice(WORDS + UNICODE_WORDS if unicode else WORDS) for _ in range(60))
+            assert scanned(scanner, text) == per_pattern(patterns, text), text
+
+
+@pytest.mark.parametrize("flags", [0, re.IGNORECASE])
+def test_gated_scan_flags(flags):
+    patterns = {"upper": "Agreement", "lower": "agreement", "inline": "(?i)notice", "ſ": "ſecret", "kelvin": "\u212a"}
+    text = "Agreement agreement AGREEMENT NOTICE notice ſecret SECRET secret \u212a k K"
+    assert scanned(LiteralGatedScanner(patterns, flags=flags), text) == per_pattern(patterns, text, flags=flags)
+
+
+def test_only_candidate_positions_are_tried():
+    scanner = LiteralGatedScanner(rule_patterns())
+    text = "The parties agree to binding arbitration. " * 100
+    starts = scanner.candidates(text)
+    # "binding arbitration" and the "arbitration" in it, both for one rule, which matches once per sentence
+    assert [len(positions) for positions in starts if positions] == [200]
+    assert len(list(scanner.scan(text))) == 100
+    assert scanner.candidates("nothing to see here") == [[] for _ in scanner.names]
+
+
+def test_literal_prefixes():
+    assert literal_prefixes("unlimited liability|all liability") == ["all liability", "unlimited liability"]
+    assert literal_prefixes("(?:binding )?arbitration|mediation") == ["mediation", "arbitration", "binding arbitration"]
+    assert literal_prefixes(r"\bwaive(?:s|r of) (?:right|jury)") == \
+        ["waives jury", "waives right", "waiver of jury", "waiver of right"]
+    assert literal_prefixes("not assign.{1,50}consent") == ["not assign"]
+    assert literal_prefixes("[$€]\\d") == ["$", "€"]
+    # No literal every match starts with
+    for pattern in ("x*", r"\d+ days", "a|b|", "[a-z]+ing", "(?-i:Agree)ment", "("):
+        assert literal_prefixes(pattern) is None
+
+
+def test_fold_matches_re_case_folding():
+    others = "".join(chr(c) for c in range(0x80, 0x110000) if not 0xD800 <= c <= 0xDFFF)
+    # Every non-ASCII character re matches to an ASCII letter ignoring case is folded to it
+    equivalents = set(re.findall("[a-z]", others, re.IGNORECASE))
+    assert equivalents == set(pattern_scanner._ASCII_CASE_EQUIVALENTS)
+    for char in equivalents:
+        assert re.fullmatch(pattern_scanner._ASCII_CASE_EQUIVALENTS[char], char, re.IGNORECASE)
+    # and folding keeps positions
+    assert len(pattern_scanner._fold_text(others)) == len(others)
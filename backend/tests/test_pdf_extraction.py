@@ -0,0 +1,80 @@
+import pytest
+
+from analyzer_config import AnalyzerConfig
+from execution import worker_config
+from legal_analyzer import LegalDocumentAnalyzer
+
+
+def page_text(number):
+    if number % 7 == 0:
+        return "" # Blank pages are skipped but still counted
+    return f"Page {number} of the agreement.\nSection {number}. Termination requires notice."
+
+
+PAGES = [page_text(number) for number in range(1, 24)]
+
+
+@pytest.fixture
+def analyzer():
+    """analyzer(pdf_workers) extracting PDFs of 2 pages or more in parallel; their processes are stopped afterwards."""
+    analyzers = []
+
+    def create(pdf_workers):
+        analyzers.append(LegalDocumentAnalyzer(
+            verbose=False, config=AnalyzerConfig(pdf_workers=pdf_workers, pdf_parallel_min_pages=2)
+        ))
+        return analyzers[-1]
+
+    yield create
+    for created in analyzers:
+        if created._pdf_pool is not None:
+            created._pdf_pool.shutdown()
+
+
+def test_parallel_extraction_keeps_page_order(write_pdf, analyzer):
+    path = write_pdf("long.pdf", PAGES)
+    serial = list(analyzer(1).iter_pages(path))
+
+    assert [number for number, _ in serial] == [number for number in range(1, 24) if number % 7]
+    assert serial[0][1].startswith("Page 1 of the agreement.")
+    assert list(analyzer(3).iter_pages(path)) == serial
+
+
+def test_parallel_extraction_gives_the_same_offsets(write_pdf, analyzer, small_pipeline):
+    path = write_pdf("long.pdf", PAGES)
+    serial = analyzer(1).analyze(path)
+    parallel = analyzer(3).analyze(path)
+
+    assert parallel.cleaned_text == serial.cleaned_text
+    assert parallel.pages == serial.pages
+    assert parallel.line_starts == serial.line_starts
+    assert parallel.clauses == serial.clauses
+    for page in parallel.pages:
+        assert parallel.cleaned_text[page["start"]:page["end"]].startswith(f"Page {page['page_number']} ")
+
+
+def test_extraction_processes_are_reused(write_pdf, analyzer):
+    parallel = analyzer(2)
+    first, second = write_pdf("first.pdf", PAGES), write_pdf("second.pdf", PAGES[:5])
+    list(parallel.iter_pages(first))
+    pool = parallel._pdf_pool
+    assert pool is not None
+
+    # Stopping early leaves the pool usable
+    pages = parallel.iter_pages(first)
+    next(pages)
+    pages.close()
+    assert len(list(parallel.iter_pages(second))) == 5
+    assert parallel._pdf_pool is pool
+
+
+@pytest.mark.parametrize("pdf_workers, nlp_n_process, pool_workers, cpus, expected", [
+    (8, 8, 2, 8, (4, 4)), # Capped at the worker's share
+    (2, 1, 2, 8, (2, 1)), # Within the share
+    (8, -1, 4, 8, (2, 2)), # spaCy's "every CPU" is the worker's share
+    (4, 4, 8, 4, (1, 1)), # More workers than CPUs still leaves one each
+    (0, 0, 1, 4, (1, 1)),
+])
+def test_worker_config_shares_the_cpus(pdf_workers, nlp_n_process, pool_workers, cpus, expected):
+    config = worker_config(AnalyzerConfig(pdf_workers=pdf_workers, nlp_n_process=nlp_n_process), pool_workers, cpus)
+    assert (config.pdf_workers, config.nlp_n_process) == expected
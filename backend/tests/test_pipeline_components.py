@@ -0,0 +1,35 @@
+from analyzer_config import AnalyzerConfig
+from legal_analyzer import LegalDocumentAnalyzer
+
+TEXT = ("This Agreement between Acme Corp and Beta Industries is governed by the laws of California. "
+        "It starts on January 1, 2024. The Client Services Director signs it.")
+
+
+def analyzer(mode):
+    return LegalDocumentAnalyzer(verbose=False, config=AnalyzerConfig(pipeline_mode=mode))
+
+
+def test_trimmed_mode_skips_components_the_matcher_does_not_need(small_pipeline):
+    trimmed = analyzer("trimmed")
+    # The matcher's patterns use POS, set by the tagger; doc.ents needs ner; nothing needs the parser
+    trimmed.matcher
+    assert "POS" in trimmed._matcher_attrs
+    assert trimmed.required_components() == ["tagger", "ner"]
+    assert trimmed.disabled_components() == ["parser"]
+    assert trimmed.active_components() == ["tagger", "ner"]
+
+
+def test_full_mode_runs_every_component(small_pipeline):
+    full = analyzer("full")
+    assert full.disabled_components() == []
+    assert full.active_components() == small_pipeline.pipe_names
+
+
+def test_trimmed_and_full_modes_find_the_same_entities(small_pipeline):
+    entities = analyzer("trimmed").extract_entities(TEXT)
+    assert entities["ORGANIZATIONS"] == ["Acme Corp"]
+    assert entities == analyzer("full").extract_entities(TEXT)
+
+
+def test_pipeline_mode_is_part_of_the_fingerprint():
+    assert analyzer("trimmed").fingerprint() != analyzer("full").fingerprint()
@@ -0,0 +1,79 @@
+import numpy as np
+
+from retrieval import ChunkIndex, paragraph_chunks, text_digest
+
+CONTRACT = """1. Definitions
+Confidential Information means any information disclosed by either party.
+
+2. Payment
+The Client shall pay each invoice within thirty (30) days of receipt.
+
+3. Termination
+Either party may terminate this Agreement on sixty (60) days written notice.
+Termination does not affect accrued payment obligations.
+
+4. Governing Law
+This Agreement is governed by the laws of California."""
+
+
+def sections(index, chunks):
+    return [index.text[chunk.start:chunk.end].split("\n")[0] for chunk in chunks]
+
+
+def test_paragraphs_are_merged_while_they_fit_and_long_ones_split():
+    text = "Heading\nBody line.\n\nSecond paragraph.\n\n" + "word " * 60
+    spans = paragraph_chunks(text, 30)
+    assert [text[start:end] for start, end in spans[:2]] == ["Heading\nBody line.", "Second paragraph."]
+    assert all(end - start <= 30 for start, end in spans)
+    assert "".join(text[start:end] for start, end in spans[2:]).split() == ["word"] * 60
+
+
+def test_search_matches_word_stems():
+    index = ChunkIndex.build(CONTRACT, max_chars=160)
+    best = index.search("When can the agreement be terminated?", k=1)
+    assert sections(index, best) == ["3. Termination"]
+    assert best[0].text == CONTRACT[best[0].start:best[0].end]
+    assert best[0].score > 0
+
+
+def test_numbers_are_searchable():
+    index = ChunkIndex.build(CONTRACT, max_chars=160)
+    assert sections(index, index.search("30 days", k=1)) == ["2. Payment"]
+
+
+def test_results_come_back_in_document_order():
+    index = ChunkIndex.build(CONTRACT, max_chars=160)
+    chunks = index.search("payment termination notice", k=2)
+    assert sections(index, chunks) == ["2. Payment", "3. Termination"]
+    assert [chunk.start for chunk in chunks] == sorted(chunk.start for chunk in chunks)
+
+
+def test_max_chars_keeps_the_best_chunk_first():
+    index = ChunkIndex.build(CONTRACT, max_chars=160)
+    best = index.search("terminate notice", k=1)[0]
+    limited = index.search("terminate notice", k=4, max_chars=len(best.text) + 10)
+    assert [chunk.start for chunk in limited] == [best.start]
+    # The best chunk is returned even if it alone is over the limit
+    assert [chunk.start for chunk in index.search("terminate notice", k=4, max_chars=1)] == [best.start]
+
+
+def test_empty_text_and_unknown_words():
+    assert ChunkIndex.build("").search("anything") == []
+    index = ChunkIndex.build(CONTRACT, max_chars=160)
+    assert all(chunk.score == 0 for chunk in index.search("zebra", k=4))
+
+
+def test_word_vectors_break_bm25_ties():
+    # "invoice" and "law" share a direction; only the query word "invoice" is in the payment section
+    directions = {"invoice": [1.0, 0.0], "law": [0.9, 0.1], "california": [0.9, 0.1]}
+
+    def word_vectors(words):
+        return np.array([directions.get(word, [0.0, 0.0]) for word in words])
+
+    index = ChunkIndex.build(CONTRACT, max_chars=160, word_vectors=word_vectors)
+    ranked = index.search("invoice", k=2)
+    assert sections(index, ranked) == ["2. Payment", "4. Governing Law"]
+
+
+def test_text_digest_identifies_text():
+    assert text_digest("a") == text_digest("a") != text_digest("b")
@@ -0,0 +1,61 @@
+import random
+import re
+
+import pytest
+
+from rule_engine import ScoringRuleEngine
+
+PHRASES = ["unlimited liability", "may modify at any time", "sole discretion", "terminate for convenience",
+           "mutual", "reasonable notice", "limitation of liability", "governed by the laws of",
+           "indemnify", "confidential", "thirty (30) days", "the parties agree", "\n\n"]
+
+
+def reference_evaluate(engine, text):
+    """Scoring as calculate_signing_recommendation did it before the rule engine: one finditer per rule."""
+    score = 0
+    findings = {"favorable_factors": [], "risk_factors": []}
+    for kind, patterns in (("risk_factors", engine.risk_patterns), ("favorable_factors", engine.favorable_patterns)):
+        for name, info in patterns.items():
+            matches = list(re.finditer(info["pattern"], text, re.IGNORECASE))
+            if matches:
+                impact = info["weight"] * min(len(matches), 3)
+                score += impact
+                findings[kind].append({
+                    "type": name,
+                    "description": info["description"],
+                    "weight": impact,
+                    "matches": len(matches),
+                    "examples": [text[max(0, m.start()-50):min(len(text), m.end()+50)] for m in matches[:2]]
+                })
+    return score, findings
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ScoringRuleEngine.from_file()
+
+
+def test_evaluate_matches_per_rule_scoring(engine):
+    rng = random.Random(0)
+    for _ in range(200):
+        text = " ".join(rng.choice(PHRASES) for _ in range(rng.randrange(0, 40)))
+        assert engine.evaluate(text) == reference_evaluate(engine, text)
+
+
+def test_impact_is_capped(engine):
+    score, findings = engine.evaluate(" ".join(["unlimited liability"] * 5))
+    finding = next(f for f in findings["risk_factors"] if f["type"] == "unlimited_liability")
+    assert finding["matches"] == 5
+    assert finding["weight"] == engine.risk_patterns["unlimited_liability"]["weight"] * 3
+    assert len(finding["examples"]) == 2
+
+
+def test_no_matches(engine):
+    assert engine.evaluate("") == (0, {"favorable_factors": [], "risk_factors": []})
+
+
+def test_unreadable_rules_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text("{not json")
+    with pytest.raises(ValueError):
+        ScoringRuleEngine.from_file(str(path))
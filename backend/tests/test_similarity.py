@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from similarity import SIMILARITY_BACKENDS, TextSimilarity
+
+WORDS = ("party agreement notice term payment client supplier law court days written consent "
+         "breach cure period fees invoice delivery goods services warranty").split()
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def edited(rng, text, fraction):
+    words = text.split()
+    for index in rng.sample(range(len(words)), int(len(words) * fraction)):
+        words[index] = rng.choice(WORDS) + "x"
+    return " ".join(words)
+
+
+@pytest.mark.parametrize("backend", SIMILARITY_BACKENDS)
+def test_identical_disjoint_and_empty_texts(backend):
+    similarity = TextSimilarity(backend)
+    text = "The Supplier shall deliver the goods within thirty days."
+    assert similarity(text, text) == 1.0
+    assert similarity(text, text.upper()) == 1.0
+    assert similarity("", "") == 1.0
+    assert similarity(text, "") == 0.0
+
+
+def test_texts_without_common_words():
+    assert TextSimilarity("shingle")("alpha beta gamma", "delta epsilon zeta") == 0.0
+    assert TextSimilarity("minhash")("alpha beta gamma", "delta epsilon zeta") == 0.0
+    # Characters still overlap
+    assert TextSimilarity("sequence")("alpha beta gamma", "delta epsilon zeta") < 0.5
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        TextSimilarity("cosine")
+
+
+def test_backends_agree_on_the_order_of_edits():
+    rng = random.Random(0)
+    # Under 200 characters, where SequenceMatcher's automatic junk heuristic does not apply
+    base = sentence(rng, 20)
+    assert len(base) < 200
+    variants = [edited(rng, base, fraction) for fraction in (0.1, 0.3, 0.6)]
+    for backend in ("sequence", "shingle", "minhash"):
+        similarity = TextSimilarity(backend)
+        scores = [similarity(base, variant) for variant in variants]
+        assert scores == sorted(scores, reverse=True), backend
+
+
+def test_minhash_estimates_shingle_jaccard():
+    rng = random.Random(1)
+    shingle, minhash = TextSimilarity("shingle"), TextSimilarity("minhash", num_perm=256)
+    for _ in range(20):
+        base = sentence(rng, 80)
+        variant = edited(rng, base, rng.uniform(0.0, 0.6))
+        assert minhash(base, variant) == pytest.approx(shingle(base, variant), abs=0.12)
+
+
+def test_short_texts_use_smaller_shingles():
+    shingle = TextSimilarity("shingle", shingle_size=3)
+    assert shingle("termination", "termination notice") == pytest.approx(1 / 2)
+    assert shingle("notice", "termination") == 0.0
+
+
+def test_auto_switches_from_sequence_to_shingles_on_large_pairs():
+    rng = random.Random(2)
+    small1, small2 = sentence(rng, 10), sentence(rng, 10)
+    large1 = sentence(rng, 300)
+    large2 = edited(rng, large1, 0.3)
+    auto = TextSimilarity("auto", auto_max_product=10_000)
+    assert auto(small1, small2) == TextSimilarity("sequence")(small1, small2)
+    assert auto(large1, large2) == TextSimilarity("shingle")(large1, large2)
+
+
+def test_results_are_memoized():
+    similarity = TextSimilarity("sequence")
+    similarity("first text", "second text")
+    similarity._cache[("first text", "second text")] = 0.123
+    assert similarity("first text", "second text") == 0.123
@@ -0,0 +1,81 @@
+from dataclasses import asdict
+
+from legal_analyzer import LegalDocumentAnalyzer, _StreamedDocument
+from line_index import LineIndex
+
+PAGES = [
+    "MASTER SERVICES AGREEMENT\nThis Agreement contains confidential information.\n\nTermination: either party may terminate.",
+    "", # An empty page in the middle
+    "Section 4. Indemnification\nThe Supplier shall indemnify the Client.\nGoverning law: California.",
+    "Section 5. Force majeure and arbitration.\nAny amendment must be in writing.",
+]
+
+
+def stream(analyzer, path):
+    document = _StreamedDocument(analyzer, path)
+    segments = list(document.segments())
+    return document, segments
+
+
+def test_streamed_pages_lines_and_clauses_match_the_joined_text(write_pdf):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    path = write_pdf("contract.pdf", PAGES)
+    document, segments = stream(analyzer, path)
+    text = "\n".join(document.page_texts)
+
+    assert text == analyzer.load_document(path)
+    assert [page["page_number"] for page in document.pages] == [1, 3, 4]
+    for page, page_text in zip(document.pages, document.page_texts):
+        assert text[page["start"]:page["end"]] == page_text
+    assert document.line_starts == LineIndex(text).starts
+    assert document.clauses == analyzer.identify_clauses(text)
+    assert document.clauses["termination"] and document.clauses["indemnification"]
+    # The segments fed to spaCy cover every page at its offset in the joined text
+    for offset, segment in segments:
+        assert text[offset:offset + len(segment)] == segment
+
+
+def test_streamed_text_file_is_one_page(tmp_path):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    path = tmp_path / "contract.txt"
+    path.write_text("\n\n".join(PAGES), encoding="utf-8")
+    document, _ = stream(analyzer, str(path))
+    text = analyzer.load_document(str(path))
+
+    assert document.pages == [{"page_number": 1, "start": 0, "end": len(text)}]
+    assert document.line_starts == LineIndex(text).starts
+    assert document.clauses == analyzer.identify_clauses(text)
+
+
+def test_analyze_matches_the_streamed_document(write_pdf, small_pipeline):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    path = write_pdf("contract.pdf", PAGES)
+    document, _ = stream(analyzer, path)
+    result = analyzer.analyze(path)
+
+    assert result.cleaned_text == "\n".join(document.page_texts)
+    assert result.pages == document.pages
+    assert result.line_starts == document.line_starts
+    assert result.clauses == document.clauses
+
+
+def test_analyze_many_isolates_failing_documents(tmp_path, write_pdf, small_pipeline):
+    analyzer = LegalDocumentAnalyzer(verbose=False)
+    good_pdf = write_pdf("good.pdf", PAGES)
+    broken_pdf = tmp_path / "broken.pdf"
+    broken_pdf.write_bytes(b"%PDF-1.4 not really a pdf")
+    good_text = tmp_path / "good.txt"
+    good_text.write_text(PAGES[0], encoding="utf-8")
+    missing = str(tmp_path / "missing.txt")
+    paths = [good_pdf, str(broken_pdf), str(good_text), missing]
+
+    outcomes = list(analyzer.analyze_many(paths))
+
+    assert [path for path, _, _ in outcomes] == paths
+    (_, pdf_result, pdf_error), (_, broken, broken_error), (_, text_result, text_error), (_, absent, absent_error) = outcomes
+    assert pdf_error is None and text_error is None
+    assert broken is None and "Error reading PDF" in broken_error
+    assert absent is None and absent_error
+    # The good documents are analyzed as if on their own
+    assert asdict(pdf_result) == asdict(analyzer.analyze(good_pdf))
+    assert asdict(text_result) == asdict(analyzer.analyze(str(good_text)))
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import summarization
+from summarization import (CentroidSummarizer, ExtractiveSummarizer, SUMMARIZER_CLASSES, SUMMARIZER_QUALITY_ORDER,
+                           TextRankSummarizer, choose_summarizer)
+
+SENTENCES = [
+    "The Supplier shall deliver the goods to the Buyer within thirty days.",
+    "Payment for the goods is due within thirty days of delivery to the Buyer.",
+    "The weather was pleasant.",
+    "If the goods are late, the Buyer may cancel the order and recover any payment.",
+    "1.2.3",
+    "The Buyer shall inspect the goods on delivery and report defects to the Supplier.",
+]
+
+
+def test_extractive_summarizer_requires_rank():
+    with pytest.raises(TypeError):
+        ExtractiveSummarizer()
+
+
+@pytest.mark.parametrize("name", sorted(SUMMARIZER_CLASSES))
+def test_summaries_are_distinct_indices_in_document_order(name):
+    best = SUMMARIZER_CLASSES[name]()(SENTENCES, 3)
+    assert best == sorted(set(best))
+    assert len(best) == 3
+    # Sentences without words are never candidates
+    assert 4 not in best
+
+
+@pytest.mark.parametrize("name", sorted(SUMMARIZER_CLASSES))
+def test_no_words_no_summary(name):
+    assert SUMMARIZER_CLASSES[name]()(["1.", "2 3", ""], 2) == []
+
+
+def test_candidates_are_capped_preferring_priority_then_longer_sentences():
+    ranked = []
+
+    class Recording(ExtractiveSummarizer):
+        def _rank(self, sentence_words, sentences):
+            ranked.extend(sentences)
+            return np.zeros(len(sentences))
+
+    priority = [False, False, True, False, False, False]
+    Recording(max_sentences=2)(SENTENCES, 1, priority)
+    # The priority sentence, then the one with the most distinct words (the earlier one of a tie), in document order
+    assert ranked == [SENTENCES[1], SENTENCES[2]]
+
+
+def test_textrank_prefers_the_sentence_linked_to_the_others():
+    sentences = [
+        "Goods delivery payment.",
+        "Goods delivery inspection.",
+        "Goods payment inspection.",
+        "Unrelated sunny afternoon.",
+    ]
+    ranks = TextRankSummarizer()._rank(summarization.sentence_words(sentences), sentences)
+    assert ranks.sum() == pytest.approx(1.0)
+    assert ranks[3] == ranks.min()
+
+
+def test_textrank_without_edges_ranks_evenly():
+    sentences = ["Alpha beta.", "Gamma delta.", "Epsilon zeta."]
+    ranks = TextRankSummarizer()._rank(summarization.sentence_words(sentences), sentences)
+    assert np.allclose(ranks, 1 / 3)
+
+
+def test_centroid_skips_near_duplicates():
+    sentences = [SENTENCES[0], SENTENCES[0], SENTENCES[1], SENTENCES[3]]
+    assert CentroidSummarizer()(sentences, 2) == [0, 2]
+
+
+def test_centroid_uses_given_vectors():
+    vectors = {"a": [1.0, 0.0], "b": [1.0, 0.1], "c": [0.0, 1.0]}
+    summarizer = CentroidSummarizer(vectorize=lambda sentences: [vectors[sentence] for sentence in sentences])
+    assert summarizer(["a", "b", "c"], 1) in ([0], [1])
+
+
+def test_choose_summarizer_takes_the_best_that_fits():
+    def estimate(name, sentences):
+        return (summarization.PREPARE_COST_PER_SENTENCE_MS * sentences
+                + SUMMARIZER_CLASSES[name].cost_per_sentence_ms * min(sentences, 400))
+
+    best = SUMMARIZER_QUALITY_ORDER[0]
+    assert choose_summarizer(estimate(best, 1000), 1000) == best
+    assert choose_summarizer(float("inf"), 10 ** 6) == best
+
+
+def test_choose_summarizer_falls_back_to_the_cheapest(monkeypatch):
+    cheapest = min(SUMMARIZER_QUALITY_ORDER, key=lambda name: SUMMARIZER_CLASSES[name].cost_per_sentence_ms)
+    assert choose_summarizer(0.0, 1000) == cheapest
+
+    monkeypatch.setattr(summarization.LsaSummarizer, "cost_per_sentence_ms", 0.001)
+    assert choose_summarizer(0.0, 1000) == "lsa"
+    # lsa is cheap now, but textrank still fits and reads better
+    assert choose_summarizer(10 ** 6, 1000) == "textrank"
@@ -58,6 +58,7 @@ interface AnalysisResult {
   summary: string
   statistics: Record<string, number>
   cleaned_text: string
+  document_id: string
   signing_recommendation: SigningRecommendation
 }
 
@@ -98,25 +99,56 @@ export default function Analyzer() {
     setIsChatLoading(true)
 
     try {
-      const res = await fetch("http://localhost:8000/chat", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          question: chatInput,
-          document_text: results.cleaned_text,
-        }),
-      })
+      const askChat = (document: { document_id: string } | { document_text: string }) =>
+        fetch("http://localhost:8000/chat", {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({
+            question: chatInput,
+            stream: true,
+            ...document,
+          }),
+        })
+
+      // The server keeps the analyzed document; send the full text only if its session expired
+      let res = await askChat({ document_id: results.document_id })
+      if (res.status === 404) {
+        res = await askChat({ document_text: results.cleaned_text })
+      }
 
       if (!res.ok) {
         const errorData = await res.json().catch(() => ({ detail: "Chat request failed" }))
         throw new Error(errorData.detail || "Chat request failed")
       }
 
-      const data = await res.json()
-      const assistantMessage: ChatMessage = { role: "assistant", content: data.answer }
-      setChatMessages((prev) => [...prev, assistantMessage])
+      // The answer streams in as NDJSON lines; show tokens as soon as they arrive
+      const reader = res.body!.getReader()
+      const decoder = new TextDecoder()
+      let buffered = ""
+      let answer = ""
+      let started = false
+      for (;;) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffered += decoder.decode(value, { stream: true })
+        const lines = buffered.split("\n")
+        buffered = lines.pop() || ""
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.type === "error") throw new Error(event.error)
+          if (event.type !== "token") continue
+          answer += event.text
+          const assistantMessage: ChatMessage = { role: "assistant", content: answer }
+          // Updaters run later, after `started` has changed, so each one gets its own copy
+          const replace = started
+          setChatMessages((prev) => (replace ? [...prev.slice(0, -1), assistantMessage] : [...prev, assistantMessage]))
+          started = true
+          setIsChatLoading(false)
+        }
+      }
     } catch (error) {
       console.error("[v0] Chat error:", error)
       const errorMessage: ChatMessage = {
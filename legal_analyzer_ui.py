@@ -9,6 +9,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 from legal_analyzer import LegalDocumentAnalyzer
+from line_index import LineIndex
 
 
 st.set_page_config(page_title="Legal Document Analyzer", layout="wide")
@@ -32,16 +33,23 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_analyzer() -> LegalDocumentAnalyzer:
+    # One analyzer per Streamlit server; the spaCy model itself is cached by model_registry
+    return LegalDocumentAnalyzer(verbose=False)
+
 if uploaded_file and analyze_button:
     with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
         tmp_file.write(uploaded_file.read())
         file_path = tmp_file.name
 
-    analyzer = LegalDocumentAnalyzer(verbose=False)
+    analyzer = get_analyzer()
 
     with st.spinner("🔎 Analyzing... Please wait."):
         try:
-            results = analyzer.analyze(file_path)
+            # Interactive use: let the analyzer pick a summarizer that answers within ~100 ms
+            results = analyzer.analyze(file_path, summary_budget_ms=100)
+            line_index = LineIndex.from_starts(results.line_starts)
             tabs = st.tabs(["🔍 Summary", "📌 Clauses", "🧠 Entities", "📊 Statistics", "📝 Recommendation"])
 
             # Tab 1: Summary
@@ -53,13 +61,16 @@ if uploaded_file and analyze_button:
             with tabs[1]:
                 st.subheader("📌 Detected Clauses")
                 if results.clauses:
+                    doc = None
                     for clause_name, matches in results.clauses.items():
                         if matches:
                             unique_lines = sorted(set([m['line_number'] for m in matches]))
                             line_str = ", ".join(map(str, unique_lines))
                             st.markdown(f"**{clause_name.replace('_', ' ').title()}** found on line(s): `{line_str}` ({len(matches)} match(es))")
                             with st.expander(f"📄 Show matches for {clause_name.replace('_', ' ').title()}"):
-                                doc = analyzer.nlp(results.cleaned_text)
+                                if doc is None:
+                                    # Parse the document once for every clause category, not once per category
+                                    doc = analyzer.nlp(results.cleaned_text)
                                 for i, m in enumerate(matches):
                                     text = m['text']
                                     start, end = m['positions']
@@ -78,7 +89,8 @@ if uploaded_file and analyze_button:
 
                                     # Highlight clause
                                     highlighted = sentence.replace(text, f"<span class='highlight'>{text}</span>", 1)
-                                    st.markdown(f"- **Match {i+1} (Line {m['line_number']}):**<br>{highlighted}", unsafe_allow_html=True)
+                                    line, col = line_index.line_col(start)
+                                    st.markdown(f"- **Match {i+1} (Line {line}, Col {col}):**<br>{highlighted}", unsafe_allow_html=True)
                         else:
                             st.markdown(f"- **{clause_name.replace('_', ' ').title()}**: Not found.")
                 else: